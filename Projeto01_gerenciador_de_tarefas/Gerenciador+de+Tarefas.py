@@ -16,6 +16,14 @@ from tkinter import ttk, messagebox
 # dados MongoDB, permitindo operações como ler e escrever dados.
 from pymongo import MongoClient
 
+import os
+import sys
+
+# Os índices das tarefas estão no manifesto `indices_mongodb.py`, um nível
+#       acima desta pasta; aplicar_indices() os cria ao conectar.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indices_mongodb import aplicar_indices
+
 # Importa a classe ObjectId do módulo bson.
 # ObjectId é um identificador único utilizado pelo MongoDB para documentos.
 # É frequentemente usado para buscar ou referenciar documentos específicos.
@@ -59,6 +67,9 @@ class GerenciadorTarefasApp:
         # MongoDB são equivalentes a tabelas em bancos de dados relacionais.
         self.colecao = self.bd["tarefas"]
 
+        # Cria os índices declarados no manifesto para este sistema.
+        aplicar_indices(self.bd, "projeto01")
+
         # Criação de estilo para o Treeview
         # Cria uma instância de Style do módulo ttk para customizar a
         # aparência dos widgets ttk.
@@ -12,6 +12,14 @@ from tkcalendar import Calendar
 # Importa o MongoClient, usado para conectar e interagir com o banco de dados MongoDB.
 from pymongo import MongoClient
 
+import os
+import sys
+
+# `indices_mongodb.py`, na raiz do repositório, descreve os índices das
+#       consultas (médico/data e cliente).
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indices_mongodb import aplicar_indices
+
 # Importa ObjectId para manipular os identificadores únicos gerados pelo MongoDB.
 from bson.objectid import ObjectId
 
@@ -54,6 +62,9 @@ class SistemaAgendamentoConsultas:
         # Acessa a coleção "consultas" dentro do banco de dados.
         self.colecao_consultas = self.bd["consultas"]
 
+        # Cria os índices declarados no manifesto para este sistema.
+        aplicar_indices(self.bd, "projeto02")
+
         # Criar Menus
         # Chama o método para criar os menus da aplicação.
         self.criar_menus()
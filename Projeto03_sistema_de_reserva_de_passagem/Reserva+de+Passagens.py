@@ -19,6 +19,13 @@ from datetime import datetime
 # permite conexão com um servidor MongoDB.
 from pymongo import MongoClient
 
+import os
+import sys
+
+# Índice de dia/lugar das reservas: definido em `indices_mongodb.py` (pasta pai).
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indices_mongodb import aplicar_indices
+
 
 # Define a classe Onibus, responsável pela gestão das
 # reservas de um ônibus.
@@ -44,6 +51,9 @@ class Onibus:
         # Seleciona a coleção 'reservas' dentro do banco de dados especificado.
         self.colecao_reservas = self.bd["reservas"]
 
+        # Cria os índices declarados no manifesto para este sistema.
+        aplicar_indices(self.bd, "projeto03")
+
 
     # Define o método 'carregar_reservas' que atualiza o status dos
     # lugares do ônibus com base nas reservas para uma data específica.
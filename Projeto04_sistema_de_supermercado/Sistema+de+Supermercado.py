@@ -9,17 +9,54 @@ from tkinter import ttk, messagebox, simpledialog, Toplevel
 # Importação do módulo 'datetime' para manipulação de datas e horários.
 import datetime
 
+# Importação do módulo 're', usado para escapar o texto dos filtros
+#       transformados em consultas '$regex'.
+import re
+
+# Importação dos módulos 'threading' e 'time', usados pela atualização
+#       do catálogo de produtos do caixa em segundo plano.
+import threading
+import time
+
+# Importação dos módulos 'tempfile' e 'tracemalloc', usados pelo
+#       benchmark da exportação para Excel.
+import tempfile
+import tracemalloc
+
+# Importação dos módulos 'hashlib', 'hmac' e 'secrets', usados para gerar e
+#       conferir os hashes (com sal) das senhas dos usuários.
+import hashlib
+import hmac
+import secrets
+
 from numpy.random import weibull
 # Importação do módulo 'MongoClient' de 'pymongo', que permite a conexão e
         # manipulação de bancos de dados MongoDB.
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+
+# Importação do 'ObjectId', usado para identificar cada venda do caixa.
+from bson.objectid import ObjectId
+
+# Importação da exceção base do PyMongo, para que falhas momentâneas do
+#       banco não interrompam a atualização do catálogo do caixa.
+from pymongo.errors import PyMongoError, DuplicateKeyError
+
+import os
+import sys
+
+# Da raiz do repositório vêm o manifesto de índices e a baixa de estoque
+#       com compensação (`estoque_mongodb.py`) usada pelo caixa.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indices_mongodb import aplicar_indices
+from estoque_mongodb import (esquema_estoque, baixar_estoque, devolver_baixa, confirmar_baixa,
+                             recuperar_baixas_pendentes, limite_pendencia)
 
 # Importação da classe 'FPDF' da biblioteca 'fpdf', usada para criar arquivos PDF.
 from fpdf import FPDF  # Biblioteca necessária para criar PDFs
 
-"""Exporta os dados filtrados para um arquivo Excel."""
-# Importa a biblioteca pandas para manipulação e exportação de dados.
-import pandas as pd
+# Importa a biblioteca xlsxwriter, usada para exportar as vendas para Excel
+#       linha a linha, em memória constante ('constant_memory').
+import xlsxwriter
 
 ############################################
 # Conexão com o MongoDB
@@ -43,6 +80,10 @@ colecao_funcionarios = banco["funcionarios"]  # Coleção para armazenar dados d
 colecao_vendas = banco["vendas"]  # Coleção para armazenar dados de vendas
 colecao_usuarios = banco["usuarios"]  # Coleção para armazenar dados de usuários (para controle de acesso)
 colecao_fornecedores = banco["fornecedores"]  # Coleção para armazenar dados de fornecedores
+colecao_vendas_diarias = banco["vendas_diarias"]  # Resumo diário das vendas (usado pelos relatórios)
+
+# Cria os índices declarados no manifesto para este sistema.
+aplicar_indices(banco, "projeto04")
 
 
 
@@ -102,61 +143,1112 @@ def obter_estoque_baixo(limite=5):
     # Converte o resultado (cursor) em uma lista antes de retornar.
 
 
+# Converte a validade digitada ("dd/mm/aaaa") em data, gravada no campo
+#       'validade_data' do produto ao lado do texto original.
+# Retorna None se o texto estiver vazio ou em formato inválido.
+def converter_validade(validade_str):
+
+    try:
+        return datetime.datetime.strptime((validade_str or "").strip(), "%d/%m/%Y")
+
+    except ValueError:
+        return None
+
+
+# Retorna a data de hoje (à meia-noite), usada nas comparações de validade.
+def inicio_de_hoje():
+
+    return datetime.datetime.combine(datetime.date.today(), datetime.time())
+
+
+# Preenche 'validade_data' nos produtos gravados antes desse campo existir.
+# Validades inválidas recebem False, para não serem convertidas de novo
+#       a cada inicialização.
+def migrar_validades():
+
+    operacoes = []
+
+    for p in colecao_produtos.find({"validade_data": None}, {"validade": 1}):
+
+        validade = converter_validade(p.get("validade"))
+
+        operacoes.append(UpdateOne({"_id": p["_id"]},
+                                   {"$set": {"validade_data": validade if validade else False}}))
+
+    if operacoes:
+        colecao_produtos.bulk_write(operacoes, ordered=False)
+
+    return len(operacoes)
+
+
+# Executa a migração ao iniciar o sistema (sem efeito se já concluída).
+migrar_validades()
+
+
 # Define uma função para encontrar produtos com data de validade ultrapassada.
+# A comparação é feita no banco, pelo índice de 'validade_data'.
 def obter_produtos_vencidos():
 
-    # Obtém a data atual usando o método 'date' para remover a informação de hora.
-    hoje = datetime.datetime.now().date()
+    return list(colecao_produtos.find({"validade_data": {"$lt": inicio_de_hoje()}})
+                .sort("validade_data", 1))
+
+
+# Colunas de cada tabela da janela de estoque (projeção das consultas).
+CAMPOS_PAINEL_ESTOQUE = {"_id": 0, "codigo": 1, "nome": 1, "quantidade": 1, "validade": 1}
+CAMPOS_PAINEL_TODOS = {"_id": 0, "codigo": 1, "nome": 1, "categoria": 1, "quantidade": 1,
+                       "preco": 1, "fornecedor": 1, "validade": 1, "unidade": 1}
+
+
+# Monta os três painéis da janela de estoque: estoque baixo, vencidos ou a
+#       vencer, e todos os produtos.
+# Cada painel é uma consulta própria, com projeção das colunas exibidas:
+#       'baixo' e 'validade' usam os índices de 'quantidade' e 'validade_data'
+#       (um '$facet' não usa índices e devolve tudo em um único documento,
+#       limitado a 16 MB), e 'todos' é lido do cursor, sem juntar o catálogo.
+# limite: quantidade abaixo da qual o estoque é considerado baixo.
+# dias: 0 para os produtos já vencidos; N para os que vencem nos próximos N dias.
+# Retorna um dicionário com as listas "baixo" e "validade" e o cursor "todos".
+def obter_paineis_estoque(limite=5, dias=0):
+
+    hoje = inicio_de_hoje()
+
+    if dias > 0:
+        filtro_validade = {"validade_data": {"$gte": hoje,
+                                             "$lt": hoje + datetime.timedelta(days=dias + 1)}}
+    else:
+        filtro_validade = {"validade_data": {"$lt": hoje}}
+
+    return {
+        "baixo": list(colecao_produtos.find({"quantidade": {"$lt": limite}}, CAMPOS_PAINEL_ESTOQUE)),
+        "validade": list(colecao_produtos.find(filtro_validade, CAMPOS_PAINEL_ESTOQUE)
+                         .sort("validade_data", 1)),
+        "todos": colecao_produtos.find({}, CAMPOS_PAINEL_TODOS),
+    }
+
+
+
+############################################
+# Senhas e Sessões
+############################################
+
+# As senhas não são gravadas em texto puro: o campo 'senha_hash' guarda
+#       "pbkdf2_sha256$<iterações>$<sal>$<hash>", com um sal aleatório por usuário.
+# O custo (número de iterações) pode ser ajustado ao hardware do caixa pela
+#       variável de ambiente SUPERMERCADO_ITERACOES_SENHA; a opção
+#       --benchmark-login mede o tempo de login de cada custo.
+# Hashes gravados com outro custo continuam válidos e são refeitos no
+#       próximo login com o custo atual.
+ITERACOES_SENHA = int(os.environ.get("SUPERMERCADO_ITERACOES_SENHA", "600000"))
+
+
+# Gera o hash (com sal) de uma senha, no formato do campo 'senha_hash'.
+def gerar_hash_senha(senha, iteracoes=None):
+
+    iteracoes = iteracoes or ITERACOES_SENHA
+    sal = secrets.token_bytes(16)
+    chave = hashlib.pbkdf2_hmac("sha256", senha.encode("utf-8"), sal, iteracoes)
+
+    return f"pbkdf2_sha256${iteracoes}${sal.hex()}${chave.hex()}"
+
+
+# Confere uma senha com o hash gravado. A comparação tem tempo constante.
+def conferir_senha(senha, senha_hash):
+
+    try:
+        algoritmo, iteracoes, sal, chave = senha_hash.split("$")
+        iteracoes, sal, chave = int(iteracoes), bytes.fromhex(sal), bytes.fromhex(chave)
+    except (AttributeError, ValueError):
+        return False
+
+    if algoritmo != "pbkdf2_sha256":
+        return False
+
+    calculada = hashlib.pbkdf2_hmac("sha256", senha.encode("utf-8"), sal, iteracoes)
+
+    return hmac.compare_digest(calculada, chave)
+
+
+# Migração: troca as senhas em texto puro ('senha') pelo hash ('senha_hash').
+# A coleção de usuários é pequena (um documento por funcionário), então é
+#       percorrida inteira; usuários já migrados são ignorados.
+def migrar_senhas(banco=banco):
+
+    usuarios = banco["usuarios"]
+
+    operacoes = [
+        UpdateOne({"_id": u["_id"]},
+                  {"$set": {"senha_hash": gerar_hash_senha(str(u["senha"]))},
+                   "$unset": {"senha": ""}})
+        for u in usuarios.find({}, {"senha": 1})
+        if "senha" in u
+    ]
+
+    if operacoes:
+        usuarios.bulk_write(operacoes, ordered=False)
+
+    return len(operacoes)
+
+
+# Executa a migração ao iniciar o sistema (sem efeito se já concluída).
+migrar_senhas()
+
+
+# Sessões abertas neste processo: usuario -> {"dados": ..., "expira": ...}.
+# Os dados do usuário (usuario, cargo, id_func) ficam em memória por
+#       TTL_SESSAO_S segundos: as checagens de permissão nesse prazo não vão
+#       ao banco. Vencido o prazo, uma consulta pelo índice de 'usuario'
+#       renova a sessão, ou a encerra se o usuário tiver sido removido.
+TTL_SESSAO_S = 300
+
+_sessoes = {}
+
+
+# Abre (ou renova) a sessão de um usuário.
+def abrir_sessao(dados):
+
+    _sessoes[dados["usuario"]] = {"dados": dados, "expira": time.monotonic() + TTL_SESSAO_S}
+
+
+# Retorna os dados da sessão do usuário, ou None se não houver sessão ativa.
+def sessao_ativa(usuario, banco=banco):
+
+    sessao = _sessoes.get(usuario)
+
+    if sessao is None:
+        return None
+
+    if time.monotonic() < sessao["expira"]:
+        return sessao["dados"]
+
+    usuarios = banco["usuarios"]
+
+    dados = usuarios.find_one({"usuario": usuario}, {"_id": 0, "usuario": 1, "cargo": 1, "id_func": 1})
+
+    if dados is None:
+        _sessoes.pop(usuario, None)
+        return None
+
+    abrir_sessao(dados)
+
+    return dados
+
+
+# Encerra as sessões dos usuários de um funcionário (ex.: ao removê-lo).
+def encerrar_sessoes_do_funcionario(id_func):
+
+    for usuario in [u for u, sessao in _sessoes.items() if sessao["dados"].get("id_func") == id_func]:
+        del _sessoes[usuario]
+
+
+# Define uma função para verificar as credenciais de login de um usuário.
+# Busca o usuário pelo índice único de 'usuario' e confere a senha com o
+#       hash gravado. Se estiver correta, abre a sessão e retorna os dados
+#       do usuário (usuario, cargo, id_func); se não, retorna 'None'.
+def verificar_login(usuario, senha, banco=banco):
+
+    usuarios = banco["usuarios"]
+
+    user = usuarios.find_one({"usuario": usuario}, {"usuario": 1, "cargo": 1, "id_func": 1, "senha_hash": 1})
+
+    if not user or not conferir_senha(senha, user.get("senha_hash")):
+        return None
+
+    # Hash gravado com outro custo: refaz com o custo atual.
+    if not user["senha_hash"].startswith(f"pbkdf2_sha256${ITERACOES_SENHA}$"):
+        usuarios.update_one({"_id": user["_id"]}, {"$set": {"senha_hash": gerar_hash_senha(senha)}})
+
+    dados = {"usuario": user["usuario"], "cargo": user.get("cargo"), "id_func": user.get("id_func")}
+
+    abrir_sessao(dados)
+
+    return dados
+
+
+# Benchmark do login: mede o tempo de conferência da senha para cada custo
+#       (número de iterações), o login completo com o custo configurado e a
+#       checagem de sessão em memória e no banco.
+# Os usuários do benchmark são criados em 'nome_banco', descartado no final.
+# Execução: python "Sistema+de+Supermercado.py" --benchmark-login [iterações ...]
+def executar_benchmark_login(custos=(100000, 200000, 400000, 600000),
+                             tentativas=5,
+                             nome_banco="supermercado_db_benchmark_login"):
+
+    cliente_mongo.drop_database(nome_banco)
+    banco_teste = cliente_mongo[nome_banco]
+
+    try:
+
+        aplicar_indices(banco_teste, "projeto04")
+
+        for custo in custos:
+
+            senha_hash = gerar_hash_senha("senha-benchmark", custo)
+
+            inicio = time.perf_counter()
+
+            for _ in range(tentativas):
+                conferir_senha("senha-benchmark", senha_hash)
+
+            duracao = (time.perf_counter() - inicio) / tentativas
+
+            marcador = " (configurado)" if custo == ITERACOES_SENHA else ""
+
+            print(f"{custo:>9} iterações: {duracao * 1000:7.1f} ms por conferência{marcador}")
+
+        banco_teste["usuarios"].insert_one({"usuario": "benchmark",
+                                            "senha_hash": gerar_hash_senha("senha-benchmark"),
+                                            "cargo": "Caixa",
+                                            "id_func": "0"})
+
+        inicio = time.perf_counter()
+
+        for _ in range(tentativas):
+            verificar_login("benchmark", "senha-benchmark", banco=banco_teste)
+
+        duracao_login = (time.perf_counter() - inicio) / tentativas
+
+        # Checagem de sessão dentro do TTL: só memória.
+        checagens = 10000
+        inicio = time.perf_counter()
+
+        for _ in range(checagens):
+            sessao_ativa("benchmark", banco=banco_teste)
+
+        duracao_cache = (time.perf_counter() - inicio) / checagens
+
+        # Checagem de sessão vencida: renova pelo banco.
+        _sessoes["benchmark"]["expira"] = 0
+        inicio = time.perf_counter()
+        sessao_ativa("benchmark", banco=banco_teste)
+        duracao_banco = time.perf_counter() - inicio
+
+        print(f"Login completo ({ITERACOES_SENHA} iterações): {duracao_login * 1000:.1f} ms")
+        print(f"Checagem de sessão em memória: {duracao_cache * 1000000:.2f} µs "
+              f"| renovada pelo banco: {duracao_banco * 1000:.2f} ms")
+        print("Ajuste o custo com a variável de ambiente SUPERMERCADO_ITERACOES_SENHA.")
+
+        return True
+
+    finally:
+
+        _sessoes.pop("benchmark", None)
+        cliente_mongo.drop_database(nome_banco)
+
+
+############################################
+# Catálogo de Produtos do Caixa
+############################################
+
+# O caixa consulta os produtos em um dicionário em memória, indexado
+#       pelo código de barras, em vez de ir ao banco a cada leitura.
+# O catálogo é carregado no login e mantido atualizado por uma thread
+#       que busca, a cada INTERVALO_CATALOGO_S segundos, os produtos com
+#       `atualizado_em` recente. Se o banco ficar indisponível por alguns
+#       instantes, o caixa continua vendendo com o catálogo que já tem.
+
+# Intervalo (em segundos) entre as buscas de produtos alterados.
+INTERVALO_CATALOGO_S = 5
 
-    # Busca todos os produtos na coleção 'produtos' e converte o resultado em uma lista.
-    produtos = list(colecao_produtos.find({}))
+# Intervalo (em segundos) entre recargas completas do catálogo. Elas
+#       também descartam os produtos excluídos, que a busca por
+#       alterações não enxerga.
+RECARGA_COMPLETA_CATALOGO_S = 600
 
-    # Inicia uma lista vazia para armazenar os produtos vencidos.
-    vencidos = []
+# Margem aplicada à última alteração vista, para tolerar pequenas
+#       diferenças de relógio entre os computadores que gravam produtos.
+MARGEM_CATALOGO = datetime.timedelta(minutes=2)
+
+# Campos do produto mantidos no catálogo.
+CAMPOS_CATALOGO = {"_id": 0, "codigo": 1, "nome": 1, "preco": 1,
+                   "quantidade": 1, "fornecedor": 1, "atualizado_em": 1}
+
+# Catálogo: {codigo: produto}.
+catalogo_produtos = {}
+
+# Última alteração vista ("marca") e thread de atualização do catálogo.
+_estado_catalogo = {"marca": None, "thread": None}
+
+
+# Retorna o momento atual em UTC, gravado em `atualizado_em` dos produtos.
+def agora_utc():
+
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+# Acrescenta (ou substitui) produtos no catálogo e avança a marca
+#       da última alteração vista.
+def aplicar_no_catalogo(produtos, catalogo=None):
+
+    catalogo = catalogo_produtos if catalogo is None else catalogo
+    marca = _estado_catalogo["marca"]
 
-    # Itera sobre cada produto na lista de produtos.
     for p in produtos:
 
-        # Tenta obter o campo 'validade' do produto. Se não existir,
-        #       define como uma string vazia.
-        validade_str = p.get("validade", "")
+        catalogo[p.get("codigo")] = p
 
-        # Se o campo 'validade' estiver vazio, pula para a próxima iteração do loop.
-        if not validade_str:
-            continue
+        alterado = p.get("atualizado_em")
+
+        if alterado and (marca is None or alterado > marca):
+            marca = alterado
+
+    _estado_catalogo["marca"] = marca
+
+
+# Carrega o catálogo completo do banco.
+# O novo dicionário só substitui o anterior depois de pronto, para que
+#       as leituras do caixa nunca encontrem um catálogo pela metade.
+def aquecer_catalogo():
+
+    global catalogo_produtos
+
+    # O PyMongo devolve as datas sem fuso (em UTC); a marca segue o mesmo padrão.
+    _estado_catalogo["marca"] = agora_utc().replace(tzinfo=None)
+
+    novo = {}
+    aplicar_no_catalogo(colecao_produtos.find({}, CAMPOS_CATALOGO), novo)
+
+    catalogo_produtos = novo
+
+
+# Busca no banco apenas os produtos alterados desde a última marca.
+def atualizar_catalogo():
+
+    desde = _estado_catalogo["marca"] - MARGEM_CATALOGO
+
+    aplicar_no_catalogo(colecao_produtos.find({"atualizado_em": {"$gte": desde}},
+                                              CAMPOS_CATALOGO))
+
+
+# Laço da thread de atualização do catálogo.
+def _sincronizar_catalogo():
+
+    ultima_recarga = time.monotonic()
+
+    while True:
+
+        time.sleep(INTERVALO_CATALOGO_S)
 
         try:
 
-            # Tenta converter a string de validade para um objeto de data.
-            validade = datetime.datetime.strptime(validade_str, "%d/%m/%Y").date()
+            if time.monotonic() - ultima_recarga >= RECARGA_COMPLETA_CATALOGO_S:
+                aquecer_catalogo()
+                ultima_recarga = time.monotonic()
+
+            else:
+                atualizar_catalogo()
 
-            # Compara a data de validade com a data atual. Se a validade for menor
-            #       que hoje, adiciona o produto à lista de vencidos.
-            if validade < hoje:
-                vencidos.append(p)
+        except PyMongoError:
 
-        # Se a conversão de data falhar (por estar em formato incorreto),
-        #       ignora o produto e continua o loop.
-        except:
+            # Banco indisponível: mantém o catálogo atual e tenta de novo
+            #       no próximo intervalo.
             pass
 
-    # Retorna a lista de produtos vencidos.
-    return vencidos
 
+# Carrega o catálogo e inicia (uma única vez) a thread de atualização.
+def iniciar_catalogo():
 
+    aquecer_catalogo()
 
-# Define uma função para verificar as credenciais de login de um usuário.
-def verificar_login(usuario, senha):
+    if _estado_catalogo["thread"] is None:
+
+        _estado_catalogo["thread"] = threading.Thread(target=_sincronizar_catalogo,
+                                                      daemon=True)
+        _estado_catalogo["thread"].start()
+
+
+# Retorna o produto com o código informado, a partir do catálogo.
+# Um código ainda fora do catálogo (ex.: produto cadastrado há instantes)
+#       é buscado no banco e acrescentado ao catálogo.
+def produto_do_catalogo(codigo):
+
+    produto = catalogo_produtos.get(codigo)
+
+    if produto is None:
+
+        try:
+            produto = colecao_produtos.find_one({"codigo": codigo}, CAMPOS_CATALOGO)
+
+        except PyMongoError:
+            return None
+
+        if produto:
+            aplicar_no_catalogo([produto])
+
+    return produto
+
+
+############################################
+# Registro de Vendas
+############################################
+
+# Campos do estoque do mercado para o módulo 'estoque_mongodb': os produtos
+#       são identificados pelo código, e cada baixa pendente guarda o
+#       'venda_id' (mesmo campo das linhas da venda).
+ESQUEMA_ESTOQUE = esquema_estoque(chave="codigo", quantidade="quantidade",
+                                  marcas="baixas_pendentes", id_marca="venda_id",
+                                  carimbo="atualizado_em")
+
+
+# Função que registra uma venda do caixa: baixa o estoque de todos os
+#       itens e grava uma linha por item na coleção 'vendas'.
+# A baixa usa baixar_estoque() (um bulk_write condicional, com a venda
+#       marcada nos produtos até as linhas serem gravadas); se a gravação
+#       falhar, devolver_baixa() devolve o estoque dos produtos marcados.
+# Levanta ValueError com os produtos sem estoque; nesse caso nada é gravado.
+# Retorna o ID da venda, repetido em cada linha ('venda_id').
+def registrar_venda(itens_venda, cpf_cliente, metodo_pagamento, desconto, data_venda,
+                    banco=banco):
+
+    produtos = banco["produtos"]
+    vendas = banco["vendas"]
+
+    venda_id = ObjectId()
+
+    # Soma as quantidades por produto (o mesmo código pode aparecer
+    #       em mais de uma linha do carrinho).
+    quantidades = {}
+
+    for item in itens_venda:
+        quantidades[item["codigo"]] = quantidades.get(item["codigo"], 0) + item["quantidade"]
+
+    # Algum produto não tinha estoque (ou não existe): a baixa já foi
+    #       desfeita; informa quais itens faltaram.
+    if not baixar_estoque(produtos, quantidades, venda_id, ESQUEMA_ESTOQUE):
+
+        estoque = {p["codigo"]: p for p in produtos.find({"codigo": {"$in": list(quantidades)}},
+                                                         {"codigo": 1, "nome": 1, "quantidade": 1})}
+
+        faltando = [estoque.get(cod, {}).get("nome", cod) for cod, qtd in quantidades.items()
+                    if estoque.get(cod, {}).get("quantidade", 0) < qtd]
+
+        raise ValueError("Estoque insuficiente para: " + ", ".join(faltando or ["produto"]) + ".")
+
+    try:
+
+        # Grava todas as linhas da venda de uma só vez.
+        vendas.insert_many([{
+            "venda_id": venda_id,  # Identificador comum a todas as linhas da venda.
+            "data": data_venda,  # A data e hora da venda.
+            "cliente_codigo": cpf_cliente if cpf_cliente else None,  # O CPF do cliente, se fornecido.
+            "produto_codigo": item["codigo"],  # O código do produto vendido.
+            "produto_nome": item["nome"],  # O nome do produto vendido.
+            "quantidade": item["quantidade"],  # A quantidade do produto vendido.
+            "preco_unit": item["preco_unit"],  # O preço unitário do produto.
+            "subtotal_com_desconto": item["subtotal_com_desconto"],  # O subtotal após aplicar descontos.
+            "total_item": item["subtotal_com_desconto"],
+            "pagamento": metodo_pagamento,  # O método de pagamento usado.
+            "desconto_total": desconto,  # O valor total de desconto aplicado à venda.
+            "fornecedor": item["fornecedor"],  # O nome do fornecedor do produto.
+        } for item in itens_venda])
+
+    except PyMongoError:
+
+        # As linhas não foram gravadas: devolve o estoque e remove o
+        #       que tiver sido inserido antes da falha.
+        devolver_baixa(produtos, quantidades, venda_id, ESQUEMA_ESTOQUE)
+        vendas.delete_many({"venda_id": venda_id})
+        raise
+
+    # Venda concluída: retira a marca dos produtos.
+    confirmar_baixa(produtos, venda_id, ESQUEMA_ESTOQUE)
+
+    # Atualiza o estoque no catálogo local do caixa.
+    for cod, qtd in quantidades.items():
+        if cod in catalogo_produtos:
+            catalogo_produtos[cod]["quantidade"] -= qtd
+
+    # Soma a venda no resumo diário dos relatórios.
+    # A venda já está gravada: se o resumo falhar, ele é refeito a
+    #       partir da coleção 'vendas' com reconstruir_vendas_diarias().
+    try:
+        atualizar_vendas_diarias(itens_venda, metodo_pagamento, data_venda, banco)
+    except PyMongoError as e:
+        print(f"Erro ao atualizar o resumo diário de vendas: {e}")
+
+    return venda_id
+
+
+# Resolve, ao abrir o sistema, as baixas deixadas por um caixa que caiu entre
+#       a baixa do estoque e a gravação da venda. Uma venda conta como gravada
+#       se alguma linha de 'vendas' tiver o seu 'venda_id'.
+try:
+    recuperar_baixas_pendentes(banco["produtos"], banco["vendas"], ESQUEMA_ESTOQUE,
+                               campo_documento="venda_id")
+except PyMongoError as e:
+    print(f"Erro ao recuperar baixas de estoque pendentes: {e}")
+
+
+# Teste de concorrência do caixa: vários caixas vendem os mesmos produtos
+#       ao mesmo tempo; ao final, confere que o estoque final é exatamente
+#       o inicial menos o que foi gravado em 'vendas', sem estoque negativo
+#       e sem marcas de baixa pendentes. Em seguida simula marcas deixadas
+#       por quedas do caixa e confere que recuperar_baixas_pendentes()
+#       devolve o estoque só das vendas não gravadas.
+# Produtos e vendas de teste ficam no banco 'nome_banco', removido ao terminar.
+# Execução: python "Sistema+de+Supermercado.py" --teste-concorrencia-caixa
+def executar_teste_concorrencia_caixa(nome_banco="supermercado_db_teste_concorrencia",
+                                      caixas=8,
+                                      vendas_por_caixa=100):
+
+    cliente_mongo.drop_database(nome_banco)
+    banco_teste = cliente_mongo[nome_banco]
+
+    try:
+
+        aplicar_indices(banco_teste, "projeto04")
+
+        # Dois produtos: o segundo acaba antes, forçando vendas recusadas
+        #       que precisam devolver o estoque do primeiro.
+        estoque_inicial = {"T1": 1000, "T2": 300}
+
+        banco_teste["produtos"].insert_many([
+            {"codigo": cod, "nome": f"Produto {cod}", "quantidade": qtd, "preco": 1.0,
+             "fornecedor": "Teste", "atualizado_em": agora_utc()}
+            for cod, qtd in estoque_inicial.items()
+        ])
+
+        itens = [{"codigo": cod, "nome": f"Produto {cod}", "quantidade": qtd, "preco_unit": 1.0,
+                  "subtotal_com_desconto": float(qtd), "fornecedor": "Teste"}
+                 for cod, qtd in (("T1", 3), ("T2", 2))]
+
+        resultado = {"vendidas": 0, "recusadas": 0, "erros": 0}
+        trava = threading.Lock()
+
+        # Rotina de um caixa.
+        def caixa():
+
+            for _ in range(vendas_por_caixa):
+
+                try:
+                    registrar_venda(itens, "", "Dinheiro", 0.0, datetime.datetime.now(),
+                                    banco=banco_teste)
+                    chave = "vendidas"
+                except ValueError:
+                    chave = "recusadas"
+                except Exception:
+                    chave = "erros"
+
+                with trava:
+                    resultado[chave] += 1
+
+        threads = [threading.Thread(target=caixa) for _ in range(caixas)]
+
+        inicio = time.perf_counter()
+
+        for t in threads:
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        duracao = time.perf_counter() - inicio
+
+        # Conferência do estoque de cada produto com as linhas gravadas.
+        vendido = {cod: 0 for cod in estoque_inicial}
+
+        for linha in banco_teste["vendas"].find({}, {"produto_codigo": 1, "quantidade": 1}):
+            vendido[linha["produto_codigo"]] += linha["quantidade"]
+
+        ok = True
+
+        for p in banco_teste["produtos"].find({}, {"codigo": 1, "quantidade": 1, "baixas_pendentes": 1}):
+
+            esperado = estoque_inicial[p["codigo"]] - vendido[p["codigo"]]
+
+            print(f"{p['codigo']}: inicial {estoque_inicial[p['codigo']]} | vendido {vendido[p['codigo']]} "
+                  f"| final {p['quantidade']} | esperado {esperado}")
+
+            if p["quantidade"] != esperado or p["quantidade"] < 0 or p.get("baixas_pendentes"):
+                ok = False
+
+        total = sum(resultado.values())
+
+        print(f"Caixas: {caixas} | Vendas tentadas: {total} | Tempo: {duracao:.2f} s "
+              f"| Vazão: {total / duracao:.1f} vendas/s")
+        print(f"Concluídas: {resultado['vendidas']} | Recusadas por estoque: "
+              f"{resultado['recusadas']} | Erros: {resultado['erros']}")
+
+        if not ok or resultado["erros"]:
+            print("FALHA: o estoque final não confere com as vendas gravadas.")
+            return False
+
+        print("OK: o estoque final confere com as vendas gravadas.")
+
+        # Recuperação: duas quedas antigas em T1, uma antes de gravar a venda
+        #       (o estoque deve voltar) e outra depois (a marca só sai), e uma
+        #       venda recente ainda em andamento (não pode ser tocada).
+        antiga = limite_pendencia().generation_time - datetime.timedelta(minutes=1)
+        sem_venda = ObjectId.from_datetime(antiga)
+        com_venda = ObjectId.from_datetime(antiga - datetime.timedelta(seconds=1))
+        recente = ObjectId()
+
+        produtos = banco_teste["produtos"]
+        estoque_t1 = produtos.find_one({"codigo": "T1"}, {"quantidade": 1})["quantidade"]
+
+        produtos.update_one({"codigo": "T1"}, {
+            "$inc": {"quantidade": -(2 + 3 + 1)},
+            "$push": {"baixas_pendentes": {"$each": [{"venda_id": sem_venda, "qtd": 2},
+                                                     {"venda_id": com_venda, "qtd": 3},
+                                                     {"venda_id": recente, "qtd": 1}]}},
+        })
+        banco_teste["vendas"].insert_one({"venda_id": com_venda, "produto_codigo": "T1", "quantidade": 3})
+
+        recuperar_baixas_pendentes(produtos, banco_teste["vendas"], ESQUEMA_ESTOQUE,
+                                   campo_documento="venda_id")
+
+        p = produtos.find_one({"codigo": "T1"}, {"quantidade": 1, "baixas_pendentes": 1})
+        restantes = [marca["venda_id"] for marca in p.get("baixas_pendentes", [])]
+
+        print(f"Recuperação T1: final {p['quantidade']} | esperado {estoque_t1 - 3 - 1} "
+              f"| marcas restantes {len(restantes)} | esperado 1")
+
+        if p["quantidade"] != estoque_t1 - 3 - 1 or restantes != [recente]:
+            print("FALHA: a recuperação de baixas pendentes não confere.")
+            return False
+
+        print("OK: a recuperação de baixas pendentes confere.")
+        return True
+
+    finally:
+        cliente_mongo.drop_database(nome_banco)
+
+
+############################################
+# Resumo Diário de Vendas
+############################################
+
+# Os relatórios não leem mais as linhas de 'vendas' (uma por item vendido):
+#       leem a coleção 'vendas_diarias', com um documento por
+#       dia × produto × fornecedor × forma de pagamento, contendo a
+#       quantidade, o total e o número de linhas vendidas.
+# O resumo é somado a cada venda do caixa (atualizar_vendas_diarias) e
+#       pode ser refeito inteiro a partir de 'vendas' (reconstruir_vendas_diarias).
+
+
+# Retorna a meia-noite do dia de uma data (chave 'dia' do resumo).
+def inicio_do_dia(data):
+
+    return data.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+# Soma os itens de uma venda no resumo diário com um único bulk_write
+#       de upserts "$inc", um por produto × fornecedor do carrinho.
+def atualizar_vendas_diarias(itens_venda, metodo_pagamento, data_venda, banco=banco):
+
+    dia = inicio_do_dia(data_venda)
+
+    # Agrupa o carrinho pela chave do resumo (o mesmo produto pode
+    #       aparecer em mais de uma linha).
+    grupos = {}
+
+    for item in itens_venda:
+
+        grupo = grupos.setdefault((item["codigo"], item["fornecedor"]),
+                                  {"nome": item["nome"], "quantidade": 0, "total": 0.0, "linhas": 0})
+
+        grupo["quantidade"] += item["quantidade"]
+        grupo["total"] += item["subtotal_com_desconto"]
+        grupo["linhas"] += 1
+
+    if not grupos:
+        return
+
+    banco["vendas_diarias"].bulk_write([
+        UpdateOne({"dia": dia,
+                   "produto_codigo": codigo,
+                   "fornecedor": fornecedor,
+                   "pagamento": metodo_pagamento},
+                  {"$inc": {"quantidade": grupo["quantidade"],
+                            "total": grupo["total"],
+                            "linhas": grupo["linhas"]},
+                   "$set": {"produto_nome": grupo["nome"]}},
+                  upsert=True)
+        for (codigo, fornecedor), grupo in grupos.items()
+    ], ordered=False)
+
+
+# Refaz o resumo diário inteiro a partir da coleção 'vendas', no próprio
+#       servidor: um "$group" por dia × produto × fornecedor × pagamento
+#       seguido de "$out", que troca a coleção de uma vez e mantém os índices.
+# Vendas registradas durante a reconstrução podem ficar de fora; por isso
+#       deve ser executada com os caixas parados.
+def reconstruir_vendas_diarias(banco=banco):
+
+    banco["vendas"].aggregate([
+        {"$group": {
+            "_id": {
+                "dia": {"$dateFromParts": {"year": {"$year": "$data"},
+                                           "month": {"$month": "$data"},
+                                           "day": {"$dayOfMonth": "$data"}}},
+                "produto_codigo": {"$ifNull": ["$produto_codigo", ""]},
+                "fornecedor": {"$ifNull": ["$fornecedor", "Fornecedor Desconhecido"]},
+                "pagamento": {"$ifNull": ["$pagamento", "Método Desconhecido"]},
+            },
+            "produto_nome": {"$last": "$produto_nome"},
+            "quantidade": {"$sum": "$quantidade"},
+            "total": {"$sum": "$total_item"},
+            "linhas": {"$sum": 1},
+        }},
+        {"$project": {
+            "_id": 0,
+            "dia": "$_id.dia",
+            "produto_codigo": "$_id.produto_codigo",
+            "produto_nome": {"$ifNull": ["$produto_nome", "Produto Desconhecido"]},
+            "fornecedor": "$_id.fornecedor",
+            "pagamento": "$_id.pagamento",
+            "quantidade": 1,
+            "total": 1,
+            "linhas": 1,
+        }},
+        {"$out": "vendas_diarias"},
+    ], allowDiskUse=True)
+
+    return banco["vendas_diarias"].estimated_document_count()
+
+
+# Na primeira execução com vendas já gravadas, monta o resumo.
+if colecao_vendas_diarias.estimated_document_count() == 0 and colecao_vendas.estimated_document_count() > 0:
+    reconstruir_vendas_diarias()
+
+
+############################################
+# Tarefas em Segundo Plano e Exportação
+############################################
+
+# Intervalo, em milissegundos, com que a janela confere o andamento de
+#       uma tarefa em segundo plano.
+INTERVALO_TAREFA_MS = 100
+
+
+# Executa 'tarefa(progresso)' em uma thread separada, sem travar a interface.
+# A thread só grava o andamento em um dicionário; a janela confere esse
+#       dicionário com 'after' e chama os retornos na thread do Tkinter
+#       (os widgets não podem ser usados a partir de outras threads).
+# 'ao_progredir(feitas, total)' é chamada enquanto a tarefa roda;
+#       ao final, 'ao_concluir(resultado)' ou 'ao_falhar(erro)'.
+def executar_em_segundo_plano(janela, tarefa, ao_concluir, ao_falhar, ao_progredir=None):
+
+    estado = {"feitas": 0, "total": 0, "fim": False, "resultado": None, "erro": None}
+
+    def progresso(feitas, total):
+
+        estado["feitas"] = feitas
+        estado["total"] = total
+
+    def executar():
+
+        try:
+            estado["resultado"] = tarefa(progresso)
+        except Exception as e:
+            estado["erro"] = e
+        finally:
+            estado["fim"] = True
+
+    def acompanhar():
+
+        # A janela foi fechada: a tarefa termina sozinha, sem avisos.
+        if not janela.winfo_exists():
+            return
+
+        if not estado["fim"]:
+
+            if ao_progredir:
+                ao_progredir(estado["feitas"], estado["total"])
+
+            janela.after(INTERVALO_TAREFA_MS, acompanhar)
+
+        elif estado["erro"] is not None:
+            ao_falhar(estado["erro"])
+
+        else:
+            ao_concluir(estado["resultado"])
+
+    threading.Thread(target=executar, daemon=True).start()
+    janela.after(INTERVALO_TAREFA_MS, acompanhar)
+
+
+# Colunas da planilha de vendas: título e campo da linha de venda.
+COLUNAS_EXPORTACAO_VENDAS = [
+    ("Data", "data"),
+    ("Produto", "produto_nome"),
+    ("Fornecedor", "fornecedor"),
+    ("Quantidade", "quantidade"),
+    ("Preço Unitário", "preco_unit"),
+    ("Total", "total_item"),
+    ("Pagamento", "pagamento"),
+]
+
+# Linhas de dados por planilha: o limite do Excel (1.048.576) menos o cabeçalho.
+LINHAS_POR_PLANILHA = 1048575
+
+# A cada quantas linhas exportadas o progresso é informado.
+INTERVALO_PROGRESSO_EXPORTACAO = 5000
+
+
+# Exporta para Excel as linhas de 'vendas' que atendem à consulta, lidas
+#       do cursor em lotes e gravadas uma a uma com o modo 'constant_memory'
+#       do xlsxwriter: cada linha vai para o disco assim que a próxima
+#       começa, então a memória não cresce com o tamanho do relatório.
+# Ao passar do limite de linhas do Excel, continua em uma nova planilha.
+# 'progresso(feitas, total)' é chamada a cada INTERVALO_PROGRESSO_EXPORTACAO linhas.
+# Retorna a quantidade de linhas exportadas.
+def exportar_vendas_excel(caminho, query, progresso=None, banco=banco):
+
+    vendas = banco["vendas"]
+
+    total = vendas.count_documents(query)
+
+    cursor = vendas.find(query,
+                         {"_id": 0, "data": 1, "produto_nome": 1, "fornecedor": 1, "quantidade": 1,
+                          "preco_unit": 1, "total_item": 1, "pagamento": 1},
+                         batch_size=INTERVALO_PROGRESSO_EXPORTACAO).sort("data", 1)
+
+    livro = xlsxwriter.Workbook(caminho, {"constant_memory": True})
+
+    formato_titulo = livro.add_format({"bold": True})
+    formato_data = livro.add_format({"num_format": "dd/mm/yyyy hh:mm"})
+    formato_moeda = livro.add_format({"num_format": "R$ #,##0.00"})
+
+    planilha = None
+    linha = LINHAS_POR_PLANILHA
+    feitas = 0
+
+    try:
+
+        for venda in cursor:
+
+            # Primeira linha ou planilha cheia: abre uma nova planilha com o cabeçalho.
+            if linha == LINHAS_POR_PLANILHA:
+
+                planilha = livro.add_worksheet(f"Vendas {len(livro.worksheets()) + 1}")
+                planilha.write_row(0, 0, [titulo for titulo, _ in COLUNAS_EXPORTACAO_VENDAS], formato_titulo)
+                linha = 0
+
+            linha += 1
+
+            data_venda = venda.get("data")
+
+            if isinstance(data_venda, datetime.datetime):
+                planilha.write_datetime(linha, 0, data_venda, formato_data)
+            else:
+                planilha.write_string(linha, 0, "Data desconhecida")
+
+            planilha.write(linha, 1, venda.get("produto_nome", "Produto Desconhecido"))
+            planilha.write(linha, 2, venda.get("fornecedor", "Fornecedor Desconhecido"))
+            planilha.write_number(linha, 3, venda.get("quantidade", 0) or 0)
+            planilha.write_number(linha, 4, float(venda.get("preco_unit", 0) or 0), formato_moeda)
+            planilha.write_number(linha, 5, float(venda.get("total_item", 0) or 0), formato_moeda)
+            planilha.write(linha, 6, venda.get("pagamento", "Método Desconhecido"))
+
+            feitas += 1
+
+            if progresso and feitas % INTERVALO_PROGRESSO_EXPORTACAO == 0:
+                progresso(feitas, total)
+
+        # Nenhuma venda no filtro: grava só o cabeçalho.
+        if planilha is None:
+
+            planilha = livro.add_worksheet("Vendas 1")
+            planilha.write_row(0, 0, [titulo for titulo, _ in COLUNAS_EXPORTACAO_VENDAS], formato_titulo)
+
+    finally:
+
+        cursor.close()
+        livro.close()
+
+    if progresso:
+        progresso(feitas, total)
+
+    return feitas
+
+
+# Benchmark da exportação para Excel: grava 'linhas' linhas de venda em um
+#       banco separado (apagado ao final), exporta todas e mede o tempo e o
+#       pico de memória do Python durante a exportação.
+# Execução: python "Sistema+de+Supermercado.py" --benchmark-exportacao-excel [linhas]
+def executar_benchmark_exportacao(linhas=1000000,
+                                  nome_banco="supermercado_db_benchmark_exportacao"):
+
+    cliente_mongo.drop_database(nome_banco)
+    banco_teste = cliente_mongo[nome_banco]
+
+    caminho = os.path.join(tempfile.gettempdir(), "benchmark_relatorio_vendas.xlsx")
+
+    try:
+
+        aplicar_indices(banco_teste, "projeto04")
+
+        data_inicial = datetime.datetime(2024, 1, 1, 8, 0)
+        metodos = ["Dinheiro", "Cartão de Crédito", "Cartão de Débito", "Pix"]
+        lote = []
+
+        for i in range(linhas):
+
+            quantidade = i % 5 + 1
+            preco = round(1 + (i % 97) * 0.5, 2)
+
+            lote.append({
+                "venda_id": ObjectId(),
+                "data": data_inicial + datetime.timedelta(seconds=30 * i),
+                "cliente_codigo": None,
+                "produto_codigo": f"B{i % 500}",
+                "produto_nome": f"Produto {i % 500}",
+                "quantidade": quantidade,
+                "preco_unit": preco,
+                "subtotal_com_desconto": quantidade * preco,
+                "total_item": quantidade * preco,
+                "pagamento": metodos[i % len(metodos)],
+                "desconto_total": 0.0,
+                "fornecedor": f"Fornecedor {i % 20}",
+            })
+
+            if len(lote) == 10000:
+                banco_teste["vendas"].insert_many(lote, ordered=False)
+                lote = []
+
+        if lote:
+            banco_teste["vendas"].insert_many(lote, ordered=False)
+
+        print(f"{linhas} linhas de venda gravadas. Exportando para {caminho} ...")
+
+        def progresso(feitas, total):
+            print(f"\r{feitas}/{total} linhas", end="", flush=True)
+
+        tracemalloc.start()
+        inicio = time.perf_counter()
+
+        exportadas = exportar_vendas_excel(caminho, {}, progresso, banco=banco_teste)
+
+        duracao = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print()
+        print(f"Linhas exportadas: {exportadas} | Tempo: {duracao:.1f} s "
+              f"| Vazão: {exportadas / duracao:.0f} linhas/s")
+        print(f"Pico de memória do Python: {pico / 1024 / 1024:.1f} MB "
+              f"| Arquivo: {os.path.getsize(caminho) / 1024 / 1024:.1f} MB")
 
-    # Busca um único documento na coleção 'usuarios' que corresponda
-    #       tanto ao usuário quanto à senha fornecidos.
-    user = colecao_usuarios.find_one({"usuario": usuario, "senha": senha})
+        return exportadas == linhas
 
-    # O método 'find_one' retorna o documento se um usuário com o nome de
-    #       usuário e senha especificados for encontrado.
-    return user
-    # Se as credenciais estiverem corretas, retorna o documento do
-    #       usuário; se não, retorna 'None'.
+    finally:
+
+        cliente_mongo.drop_database(nome_banco)
+
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+
+############################################
+# Histórico de Compras dos Clientes
+############################################
+
+# O histórico de compras não fica mais em um array dentro do documento do
+#       cliente (que crescia a cada venda e era regravado inteiro): ele é
+#       lido das linhas da coleção 'vendas' pelo CPF/CNPJ do cliente
+#       ('cliente_codigo'), com o índice (cliente_codigo, data).
+
+# Quantidade de linhas do histórico trazidas do banco em cada página.
+TAMANHO_PAGINA_HISTORICO = 100
+
+
+# Converte o texto do filtro de data do histórico em um intervalo
+#       [inicio, fim). Aceita "dd/mm/aaaa" (dia), "mm/aaaa" (mês) ou "aaaa" (ano).
+# Retorna None se o texto não estiver em nenhum desses formatos.
+def intervalo_filtro_data(texto):
+
+    for formato, unidade in (("%d/%m/%Y", "dia"), ("%m/%Y", "mes"), ("%Y", "ano")):
+
+        try:
+            inicio = datetime.datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+
+        if unidade == "dia":
+            return inicio, inicio + datetime.timedelta(days=1)
+
+        if unidade == "mes":
+            return inicio, (inicio + datetime.timedelta(days=32)).replace(day=1)
+
+        return inicio, inicio.replace(year=inicio.year + 1)
+
+    return None
+
+
+# Monta a consulta das linhas de venda de um cliente.
+# produto e metodo filtram por trecho do texto, sem diferenciar maiúsculas;
+#       como a consulta já está restrita ao cliente pelo índice, o '$regex'
+#       só percorre as compras desse cliente.
+# Retorna None se o filtro de data for inválido.
+def consulta_historico_cliente(cpf_cnpj, data="", produto="", metodo=""):
+
+    consulta = {"cliente_codigo": cpf_cnpj}
+
+    if data:
+
+        intervalo = intervalo_filtro_data(data)
+
+        if intervalo is None:
+            return None
+
+        consulta["data"] = {"$gte": intervalo[0], "$lt": intervalo[1]}
+
+    if produto:
+        consulta["produto_nome"] = {"$regex": re.escape(produto), "$options": "i"}
+
+    if metodo:
+        consulta["pagamento"] = {"$regex": re.escape(metodo), "$options": "i"}
+
+    return consulta
+
+
+# Busca uma página do histórico, da compra mais recente para a mais antiga.
+# A paginação é por chave (keyset): `apos` é a chave (data, _id) da última
+#       linha da página anterior, sem `skip` (que fica mais lento a cada página).
+# Retorna a lista de linhas e a chave da próxima página, ou `None`
+#       quando não há mais linhas.
+def buscar_pagina_historico(consulta, apos=None, tamanho=TAMANHO_PAGINA_HISTORICO):
+
+    filtro = consulta
+
+    if apos:
+        data_apos, id_apos = apos
+        filtro = {"$and": [consulta, {"$or": [
+            {"data": {"$lt": data_apos}},
+            {"data": data_apos, "_id": {"$lt": id_apos}},
+        ]}]}
+
+    pagina = list(colecao_vendas.find(filtro, {"data": 1, "produto_nome": 1, "pagamento": 1,
+                                              "quantidade": 1, "preco_unit": 1})
+                  .sort([("data", -1), ("_id", -1)])
+                  .limit(tamanho))
+
+    # Uma página incompleta indica que o histórico terminou.
+    if len(pagina) < tamanho:
+        return pagina, None
+
+    ultima = pagina[-1]
+
+    return pagina, (ultima["data"], ultima["_id"])
+
+
+# Calcula no servidor, com uma agregação `$group`, os totais do histórico:
+#       quantidade de linhas, de itens e o valor (quantidade x preço unitário).
+# Retorna a tupla (linhas, itens, valor).
+def totalizar_historico(consulta):
+
+    resultado = list(colecao_vendas.aggregate([
+        {"$match": consulta},
+        {"$group": {"_id": None,
+                    "linhas": {"$sum": 1},
+                    "itens": {"$sum": "$quantidade"},
+                    "valor": {"$sum": {"$multiply": ["$quantidade", "$preco_unit"]}}}}
+    ]))
+
+    if not resultado:
+        return 0, 0, 0.0
+
+    return resultado[0]["linhas"], resultado[0]["itens"], resultado[0]["valor"]
 
 
 ############################################
@@ -220,8 +1312,23 @@ class JanelaBase:
 
 # Define a função para cadastrar um novo funcionário no sistema, recebendo
 #       seus dados pessoais e credenciais de acesso.
+# Levanta ValueError se o nome de usuário já existir (índice único de 'usuario').
 def cadastrar_funcionario(id_func, nome, cargo, turno, salario, usuario, senha):
 
+    # Grava primeiro as credenciais de acesso do funcionário, para que um
+    #       usuário repetido seja recusado antes de criar o funcionário.
+    try:
+
+        colecao_usuarios.insert_one({
+            "usuario": usuario,  # Nome de usuário para acesso ao sistema.
+            "senha_hash": gerar_hash_senha(senha),  # Hash (com sal) da senha de acesso.
+            "cargo": cargo,  # Cargo é replicado aqui para controle de acesso baseado em cargo.
+            "id_func": id_func  # Identificador do funcionário vinculado às credenciais.
+        })
+
+    except DuplicateKeyError:
+        raise ValueError(f"O usuário '{usuario}' já existe.")
+
     # Cria um dicionário com as informações básicas do funcionário.
     funcionario = {
         "id_func": id_func,  # Identificador único do funcionário.
@@ -235,14 +1342,6 @@ def cadastrar_funcionario(id_func, nome, cargo, turno, salario, usuario, senha):
     #       'funcionarios' do banco de dados.
     colecao_funcionarios.insert_one(funcionario)
 
-    # Cria um dicionário com as credenciais de acesso do funcionário.
-    colecao_usuarios.insert_one({
-        "usuario": usuario,  # Nome de usuário para acesso ao sistema.
-        "senha": senha,  # Senha para acesso ao sistema.
-        "cargo": cargo,  # Cargo é replicado aqui para controle de acesso baseado em cargo.
-        "id_func": id_func  # Identificador do funcionário vinculado às credenciais.
-    })
-
 
 # Define uma função para cadastrar um novo fornecedor no banco de dados.
 def cadastrar_fornecedor(nome, endereco, telefone):
@@ -289,7 +1388,9 @@ def cadastrar_produto(codigo, nome, categoria, quantidade, preco, fornecedor, va
         "preco": float(preco),  # Preço unitário do produto (convertido para número decimal).
         "fornecedor": fornecedor,  # Nome do fornecedor do produto.
         "validade": validade,  # Data de validade do produto (no formato de string, como "01/12/2030").
-        "unidade": unidade  # Unidade de medida do produto (exemplo: "kg", "un").
+        "validade_data": converter_validade(validade) or False,  # A mesma validade como data (indexada).
+        "unidade": unidade,  # Unidade de medida do produto (exemplo: "kg", "un").
+        "atualizado_em": agora_utc()  # Momento da gravação (usado pelo catálogo do caixa).
     }
 
     # Inserção do dicionário 'produto' na coleção 'produtos' do banco de dados MongoDB.
@@ -382,10 +1483,15 @@ def editar_produto(codigo, nome, categoria, quantidade, preco, fornecedor, valid
             "preco": float(preco),  # Atualiza o preço, convertendo para número decimal.
             "fornecedor": fornecedor,  # Atualiza o nome do fornecedor.
             "validade": validade,  # Atualiza a data de validade.
-            "unidade": unidade  # Atualiza a unidade de medida.
+            "validade_data": converter_validade(validade) or False,  # Validade como data (indexada).
+            "unidade": unidade,  # Atualiza a unidade de medida.
+            "atualizado_em": agora_utc()  # Avisa o catálogo dos caixas da alteração.
         }}
     )
 
+    # Descarta a cópia local do produto; a próxima leitura busca a versão nova.
+    catalogo_produtos.pop(codigo, None)
+
 
 # Define uma função para remover um fornecedor do banco de dados.
 def remover_fornecedor(nome):
@@ -415,6 +1521,9 @@ def remover_produto(codigo):
     # Se um produto com o código especificado existe, ele é removido.
     #       Caso contrário, nada acontece.
 
+    # Retira o produto do catálogo local do caixa.
+    catalogo_produtos.pop(codigo, None)
+
 
 
 
@@ -422,16 +1531,15 @@ def remover_produto(codigo):
 #       para registrar um cliente.
 def cadastrar_cliente(codigo, nome, cpf_cnpj, telefone, endereco):
 
-    # Cria um dicionário com as informações do cliente, incluindo um
-    #       histórico de compras vazio.
+    # Cria um dicionário com as informações do cliente.
+    # O histórico de compras é lido da coleção 'vendas' (consulta_historico_cliente).
     cliente = {
 
         "codigo": codigo,  # Armazena o código identificador do cliente.
         "nome": nome,  # Armazena o nome do cliente.
         "cpf_cnpj": cpf_cnpj,  # Armazena o CPF ou CNPJ do cliente.
         "telefone": telefone,  # Armazena o número de telefone do cliente.
-        "endereco": endereco,  # Armazena o endereço do cliente.
-        "historico_compras": []  # Inicializa uma lista vazia para o histórico de compras do cliente.
+        "endereco": endereco  # Armazena o endereço do cliente.
 
     }
 
@@ -847,7 +1955,11 @@ class JanelaFuncionarios(JanelaBase):
 
             # Chama a função 'cadastrar_funcionario' (fora da classe) para
             #       inserir o funcionário no banco de dados.
-            cadastrar_funcionario(i, n, c, t, s, u, pw)
+            try:
+                cadastrar_funcionario(i, n, c, t, s, u, pw)
+            except ValueError as e:
+                messagebox.showerror("Erro", str(e), parent=self.master)
+                return
 
             # Exibe uma mensagem de sucesso ao usuário.
             messagebox.showinfo("Sucesso", "Funcionário cadastrado.", parent=self.master)
@@ -953,6 +2065,9 @@ class JanelaFuncionarios(JanelaBase):
             # Remove o usuário associado ao funcionário da coleção de usuários.
             resultado_usuario = colecao_usuarios.delete_one({"id_func": id_func})
 
+            # Encerra as sessões abertas do usuário removido.
+            encerrar_sessoes_do_funcionario(id_func)
+
             # Verifica se a exclusão do funcionário foi bem-sucedida.
             if resultado_funcionario.deleted_count > 0:
 
@@ -2163,12 +3278,11 @@ class JanelaClientes(JanelaBase):
             messagebox.showerror("Erro", "Cliente não encontrado.", parent=self.master)
             return  # Encerra o método se o cliente não existir.
 
-        # Obtém o histórico de compras do cliente a partir do campo "historico_compras".
-        # Caso o campo não exista, retorna uma lista vazia como padrão.
-        historico = cliente.get("historico_compras", [])
+        # O histórico vem das linhas da coleção 'vendas' com o CPF/CNPJ do cliente.
+        cpf_cnpj = cliente.get("cpf_cnpj", "")
 
-        # Verifica se o histórico de compras está vazio.
-        if not historico:
+        # Verifica se o cliente tem alguma compra (consulta pelo índice).
+        if not colecao_vendas.find_one({"cliente_codigo": cpf_cnpj}, {"_id": 1}):
 
             # Exibe uma mensagem informando que nenhuma compra foi
             #       encontrada para o cliente.
@@ -2353,10 +3467,8 @@ class JanelaClientes(JanelaBase):
                                orient="vertical",
                                command=tabela.yview)
 
-        # Configuração da tabela para usar a barra de rolagem criada.
-        # O parâmetro `yscrollcommand=scroll.set` garante que o movimento da
-        #       barra sincronize com o conteúdo da tabela.
-        tabela.configure(yscrollcommand=scroll.set)
+        # A tabela é ligada à barra de rolagem mais abaixo, por
+        #       `ao_rolar_tabela`, que também carrega as próximas páginas.
 
         # Posicionamento da barra de rolagem no layout usando o
         #       gerenciador de geometria `grid`.
@@ -2388,132 +3500,105 @@ class JanelaClientes(JanelaBase):
                          columnspan=6,
                          pady=10)
 
-        # Preenchendo a tabela
-        # Define a função para atualizar os dados exibidos na tabela.
-        def atualizar_tabela():
+        # Estado do histórico exibido: consulta do filtro atual, chave da
+        #       próxima página, se já terminou, se uma página está sendo
+        #       carregada, se há uma página na fila do Tkinter e o filtro
+        #       aguardando o fim da digitação.
+        estado = {"consulta": None, "apos": None, "fim": True,
+                  "carregando": False, "pagina_agendada": False, "agendamento": None}
 
-            # Remove todos os itens existentes na tabela.
-            # `tabela.get_children()` retorna os identificadores de todos os
-            #       itens, e `tabela.delete()` os remove.
-            tabela.delete(*tabela.get_children())
+        # Carrega a próxima página do histórico e a acrescenta à tabela.
+        def carregar_pagina():
 
-            # Inicializa o total acumulado como zero.
-            total = 0
+            estado["pagina_agendada"] = False
 
-            # Itera sobre cada compra no histórico de compras do cliente.
-            for compra in historico:
+            if estado["fim"] or estado["carregando"]:
+                return
+
+            estado["carregando"] = True
+
+            try:
 
-                # Obtém a data da compra.
-                data = compra["data"]
+                pagina, apos = buscar_pagina_historico(estado["consulta"], estado["apos"])
 
-                # Itera sobre cada item na lista de itens comprados.
-                for item in compra["itens"]:
+                for linha in pagina:
 
                     # Calcula o total para o item atual (quantidade * preço unitário).
-                    total_item = item["quantidade"] * item["preco_unit"]
-
-                    # Insere os dados do item na tabela.
-                    # `""` indica que o item será inserido na raiz da tabela.
-                    # `"end"` adiciona o item no final da lista de itens da tabela.
-                    # Os valores inseridos são:
-                    # - `data`: Data da compra.
-                    # - `item["nome"]`: Nome do produto.
-                    # - `compra["metodo_pagamento"]`: Método de pagamento usado na compra.
-                    # - `item["quantidade"]`: Quantidade do produto comprado.
-                    # - `f"R$ {item['preco_unit']:.2f}"`: Preço unitário formatado
-                    #       como moeda com 2 casas decimais.
-                    # - `f"R$ {total_item:,.2f}"`: Total do item formatado como
-                    #       moeda com separador de milhares.
+                    total_item = linha["quantidade"] * linha["preco_unit"]
+
+                    # Insere a linha da venda na tabela: data, produto, método de
+                    #       pagamento, quantidade, preço unitário e total do item.
                     tabela.insert("", "end", values=(
-                        data,
-                        item["nome"],
-                        compra["metodo_pagamento"],
-                        item["quantidade"],
-                        f"R$ {item['preco_unit']:.2f}",
+                        linha["data"].strftime("%d/%m/%Y %H:%M"),
+                        linha.get("produto_nome", ""),
+                        linha.get("pagamento", ""),
+                        linha["quantidade"],
+                        f"R$ {linha['preco_unit']:.2f}",
                         f"R$ {total_item:,.2f}",
                     ))
 
-                    # Adiciona o total do item ao acumulador do total geral.
-                    total += total_item
+                estado["apos"] = apos
+                estado["fim"] = apos is None
 
-            # Atualiza o texto do rótulo que exibe o total acumulado.
-            # O total é formatado como moeda com separador de milhares e 2 casas decimais.
-            label_total.config(text=f"Total: R$ {total:,.2f}")
+            finally:
+                estado["carregando"] = False
 
-        # Chama a função `atualizar_tabela` para exibir todos os dados iniciais.
-        atualizar_tabela()
+        # Recebe as mudanças de posição da tabela (`yscrollcommand`) e, quando a
+        #       parte visível chega perto do fim, agenda a próxima página.
+        # Só uma página fica na fila por vez: a inserção de uma página chama
+        #       esta função de novo, e sem a marca cada chamada pediria outra.
+        def ao_rolar_tabela(primeiro, ultimo):
 
-        # Define a função `filtrar` para aplicar os filtros inseridos pelo usuário.
-        def filtrar():
+            scroll.set(primeiro, ultimo)
+
+            if float(ultimo) >= 0.9 and not estado["fim"] and not estado["pagina_agendada"]:
+                estado["pagina_agendada"] = True
+                janela_historico.after_idle(carregar_pagina)
+
+        tabela.configure(yscrollcommand=ao_rolar_tabela)
+
+        # Define a função para atualizar os dados exibidos na tabela
+        #       conforme os filtros preenchidos.
+        def atualizar_tabela():
 
-            # Remove todos os itens existentes na tabela antes de exibir
-            #       os resultados filtrados.
+            estado["agendamento"] = None
+
+            # Remove todos os itens existentes na tabela.
             tabela.delete(*tabela.get_children())
 
-            # Inicializa a variável para calcular o total filtrado como zero.
-            total_filtrado = 0
+            consulta = consulta_historico_cliente(cpf_cnpj,
+                                                  campo_filtro_data.get().strip(),
+                                                  campo_filtro_produto.get().strip(),
+                                                  campo_filtro_metodo.get().strip())
 
-            # Itera sobre cada compra no histórico de compras.
-            for compra in historico:
+            # Filtro de data incompleto ou inválido: aguarda a digitação.
+            if consulta is None:
+                label_total.config(text="Data: use dd/mm/aaaa, mm/aaaa ou aaaa")
+                estado.update(consulta=None, apos=None, fim=True)
+                return
 
-                # Obtém a data da compra.
-                data = compra["data"]
+            estado.update(consulta=consulta, apos=None, fim=False)
 
-                # Verifica se o campo de filtro de data está preenchido.
-                # Se estiver, apenas as compras que contêm o valor digitado
-                #       na data serão consideradas.
-                if campo_filtro_data.get().strip() and campo_filtro_data.get().strip() not in data:
-                    continue
+            # Totais calculados no servidor, sobre todas as compras do filtro.
+            linhas, itens, valor = totalizar_historico(consulta)
 
-                # Itera sobre os itens comprados dentro de cada compra.
-                for item in compra["itens"]:
+            # O total é formatado como moeda com separador de milhares e 2 casas decimais.
+            label_total.config(text=f"Total: R$ {valor:,.2f} ({itens} itens em {linhas} registros)")
 
-                    # Verifica se o campo de filtro de produto está preenchido.
-                    # Se estiver, apenas os itens cujo nome contém o texto
-                    #       digitado (ignorando maiúsculas e minúsculas) serão considerados.
-                    if campo_filtro_produto.get().strip() and campo_filtro_produto.get().strip().lower() not in \
-                            item[
-                                "nome"].lower():
-                        continue
+            carregar_pagina()
 
-                    # Verifica se o campo de filtro de método de pagamento está preenchido.
-                    # Se estiver, apenas as compras cujo método de pagamento contém o
-                    #       texto digitado (ignorando maiúsculas e minúsculas) serão consideradas.
-                    if campo_filtro_metodo.get().strip() and campo_filtro_metodo.get().strip().lower() not in \
-                            compra[
-                                "metodo_pagamento"].lower():
-                        continue
+        # Chama a função `atualizar_tabela` para exibir os dados iniciais.
+        atualizar_tabela()
 
-                    # Calcula o total para o item atual (quantidade * preço unitário).
-                    total_item = item["quantidade"] * item["preco_unit"]
-
-                    # Insere os dados do item filtrado na tabela.
-                    # `""` indica que o item será inserido na raiz da tabela.
-                    # `"end"` adiciona o item no final da lista de itens da tabela.
-                    # Os valores inseridos são:
-                    # - `data`: Data da compra.
-                    # - `item["nome"]`: Nome do produto.
-                    # - `compra["metodo_pagamento"]`: Método de pagamento usado na compra.
-                    # - `item["quantidade"]`: Quantidade do produto comprado.
-                    # - `f"R$ {item['preco_unit']:.2f}"`: Preço unitário formatado
-                    #       como moeda com 2 casas decimais.
-                    # - `f"R$ {total_item:,.2f}"`: Total do item formatado como
-                    #       moeda com separador de milhares.
-                    tabela.insert("", "end", values=(
-                        data,
-                        item["nome"],
-                        compra["metodo_pagamento"],
-                        item["quantidade"],
-                        f"R$ {item['preco_unit']:.2f}",
-                        f"R$ {total_item:,.2f}",
-                    ))
+        # Define a função `filtrar`, chamada a cada tecla nos campos de filtro.
+        # A consulta só é feita 300 ms depois da última tecla, para não
+        #       consultar o banco a cada caractere digitado.
+        def filtrar():
 
-                    # Adiciona o total do item ao acumulador do total filtrado.
-                    total_filtrado += total_item
+            if estado["agendamento"]:
+                janela_historico.after_cancel(estado["agendamento"])
 
-            # Atualiza o texto do rótulo que exibe o total acumulado dos resultados filtrados.
-            # O total é formatado como moeda com separador de milhares e 2 casas decimais.
-            label_total.config(text=f"Total: R$ {total_filtrado:,.2f}")
+            estado["agendamento"] = janela_historico.after(300, atualizar_tabela)
 
         # Eventos para aplicar filtro
         # Associa o evento de pressionar uma tecla (KeyRelease) no campo
@@ -3150,6 +4235,22 @@ class JanelaEstoque(JanelaBase):
         self.notebook.add(self.frame_vencidos,
                           text="Produtos Vencidos")
 
+        # Controles da aba: com 0 dias a aba lista os produtos já vencidos;
+        #       com N dias, os produtos que vencem nos próximos N dias.
+        frame_dias = ttk.Frame(self.frame_vencidos)
+        frame_dias.pack(fill=tk.X, pady=5)
+
+        ttk.Label(frame_dias,
+                  text="Vencendo nos próximos (dias, 0 = já vencidos):").pack(side=tk.LEFT, padx=5)
+
+        self.campo_dias = ttk.Spinbox(frame_dias, from_=0, to=365, width=5)
+        self.campo_dias.set(0)
+        self.campo_dias.pack(side=tk.LEFT, padx=5)
+
+        ttk.Button(frame_dias,
+                   text="Atualizar",
+                   command=self.atualizar_listas).pack(side=tk.LEFT, padx=5)
+
         # Cria uma tabela (Treeview) dentro do frame destinado aos produtos vencidos.
         # 'columns=("codigo","nome","validade","quantidade")'
         #       especifica as colunas da tabela.
@@ -3246,11 +4347,16 @@ class JanelaEstoque(JanelaBase):
             #       nenhum dado antigo permaneça antes da atualização.
             self.tabela_todos.delete(i)
 
-        # A função 'obter_estoque_baixo' é chamada com o parâmetro 5, o que
-        #       significa que ela retornará todos os produtos
-        #       cuja quantidade em estoque é inferior a 5 unidades.
-        # Este valor é armazenado na variável 'baixo'.
-        baixo = obter_estoque_baixo(5)
+        # Quantidade de dias da aba de validade (0 = produtos já vencidos).
+        try:
+            dias = max(int(self.campo_dias.get() or 0), 0)
+        except ValueError:
+            dias = 0
+
+        # Os três painéis vêm de obter_paineis_estoque(), uma consulta por painel.
+        # 'baixo': produtos cuja quantidade em estoque é inferior a 5 unidades.
+        paineis = obter_paineis_estoque(5, dias)
+        baixo = paineis["baixo"]
 
         # Este loop percorre cada produto na lista 'baixo'. Cada produto 'p' na
         #       lista tem detalhes como código, nome e quantidade.
@@ -3266,11 +4372,12 @@ class JanelaEstoque(JanelaBase):
                                      tk.END,
                                      values=(p["codigo"], p["nome"], p["quantidade"]))
 
-        # Consulta todos os produtos que estão vencidos utilizando a
-        #       função 'obter_produtos_vencidos'.
-        # Esta função retorna uma lista de produtos cuja
-        #       data de validade já passou.
-        vencidos = obter_produtos_vencidos()
+        # Produtos vencidos (ou a vencer nos próximos dias), do painel 'validade'.
+        vencidos = paineis["validade"]
+
+        # O título da aba acompanha o modo escolhido.
+        self.notebook.tab(self.frame_vencidos,
+                          text=f"Vencendo em {dias} dias" if dias else "Produtos Vencidos")
 
         # Este loop itera sobre cada produto 'p' na lista de produtos vencidos.
         for p in vencidos:
@@ -3281,11 +4388,10 @@ class JanelaEstoque(JanelaBase):
             #       clara dos itens que precisam ser retirados do estoque.
             self.tabela_vencidos.insert("",
                                         tk.END,
-                                        values=(p["codigo"], p["nome"], p["validade"], p["quantidade"]))
+                                        values=(p["codigo"], p["nome"], p.get("validade", ""), p["quantidade"]))
 
-        # Consulta todos os produtos em estoque utilizando a função 'obter_produtos'.
-        # Esta função retorna uma lista com todos os produtos disponíveis no inventário.
-        todos = obter_produtos()
+        # Todos os produtos em estoque, do painel 'todos' (lidos do cursor).
+        todos = paineis["todos"]
 
         # Este loop itera sobre cada produto 'p' na lista de todos os produtos.
         for p in todos:
@@ -3596,6 +4702,14 @@ class JanelaRelatorios(JanelaBase):
         #       quando a janela é redimensionada.
         self.frame.rowconfigure(9, weight=1)
 
+        # Botão que refaz o resumo diário a partir de todas as vendas gravadas.
+        ttk.Button(self.frame,
+                   text="Reconstruir Resumo Diário",
+                   command=self.reconstruir_resumo).grid(row=10,
+                                                         column=0,
+                                                         columnspan=2,
+                                                         pady=10)
+
         # Configura a segunda coluna do frame para se ajustar ao tamanho da janela.
         # 'columnconfigure(1, weight=1)' permite que a segunda coluna se
         #       expanda quando a janela é redimensionada.
@@ -3653,7 +4767,7 @@ class JanelaRelatorios(JanelaBase):
 
                 # Adiciona ao dicionário de consulta uma condição que busca
                 #       registros com datas entre as especificadas, incluindo os limites.
-                query["data"] = {"$gte": data_inicial_obj, "$lte": data_final_obj}
+                query["dia"] = {"$gte": data_inicial_obj, "$lte": data_final_obj}
 
             # Captura um erro de valor, que ocorre se a conversão da
             #       data falhar devido a formato incorreto.
@@ -3685,7 +4799,7 @@ class JanelaRelatorios(JanelaBase):
                 #       especifica que os registros devem ter uma data maior ou igual ('$gte' -
                 #       greater than or equal) à data inicial. Isso filtra os dados
                 #       para mostrar todas as vendas a partir dessa data.
-                query["data"] = {"$gte": data_inicial_obj}
+                query["dia"] = {"$gte": data_inicial_obj}
 
             # Captura e trata o erro caso a data inicial não esteja no formato
             #       correto, evitando interrupções no programa.
@@ -3720,7 +4834,7 @@ class JanelaRelatorios(JanelaBase):
                 #       que os registros devem ter uma data
                 # menor ou igual ('$lte' - less than or equal) à data final. Isso filtra os
                 #       dados para mostrar todas as vendas até essa data.
-                query["data"] = {"$lte": data_final_obj}
+                query["dia"] = {"$lte": data_final_obj}
 
             # Captura e trata o erro caso a data final não esteja no formato correto,
             #       evitando interrupções no programa.
@@ -3739,227 +4853,148 @@ class JanelaRelatorios(JanelaBase):
         #       contenha a string fornecida, ignorando diferenças entre maiúsculas e
         #       minúsculas ('$options': 'i').
         if produto:
-            query["produto_nome"] = {"$regex": produto, "$options": "i"}
+            query["produto_nome"] = {"$regex": re.escape(produto), "$options": "i"}
 
         # Se o campo fornecedor estiver preenchido, adiciona um filtro semelhante ao de produto.
         # Busca por registros que contenham a string de fornecedor, também utilizando
         #       expressão regular para ignorar maiúsculas e minúsculas.
         if fornecedor:
-            query["fornecedor"] = {"$regex": fornecedor, "$options": "i"}
+            query["fornecedor"] = {"$regex": re.escape(fornecedor), "$options": "i"}
 
         # Se o campo método de pagamento estiver preenchido, adiciona outro filtro
         #       usando expressão regular.
         # Permite buscar por registros que contenham a string do método de pagamento
         #       especificado, também de forma insensível a maiúsculas.
         if pagamento:
-            query["pagamento"] = {"$regex": pagamento, "$options": "i"}
-
-        # Executa a consulta no banco de dados com os filtros aplicados, se houver, e
-        #       armazena os resultados em 'vendas_filtradas'.
-        # 'colecao_vendas.find(query)' retorna todos os documentos que correspondem ao
-        #       critério de pesquisa definido no dicionário 'query'.
-        vendas_filtradas = colecao_vendas.find(query)
-
-        # Antes de adicionar novos dados, limpa todos os itens existentes na
-        #       tabela para evitar duplicações.
-        # '*self.tabela.get_children()' retorna uma lista de todos os elementos
-        #       atuais na Treeview, que são então deletados.
-        self.tabela.delete(*self.tabela.get_children())
+            query["pagamento"] = {"$regex": re.escape(pagamento), "$options": "i"}
 
-        # Inicializa a variável que irá acumular o total dos valores filtrados
-        #       para exibição futura.
-        total_filtrado = 0
+        # Exibe as linhas do resumo diário que atendem aos filtros.
+        self.exibir_resumo(query)
 
-        # Itera sobre cada documento de venda obtido na consulta
-        #       filtrada à base de dados.
-        for venda in vendas_filtradas:
 
-            # Extrai o campo 'data' do documento de venda.
-            data_venda = venda.get("data")
 
-            # Verifica se o campo 'data' é um dicionário que contém a chave '$date', o
-            #       que indica um formato específico de data.
-            # Isso é comum em bases de dados que armazenam datas em um
-            #       formato especial para serialização.
-            if isinstance(data_venda, dict) and "$date" in data_venda:
+    # Preenche a tabela com as linhas do resumo diário que atendem à
+    #       consulta: uma linha por dia × produto × fornecedor × pagamento.
+    # O preço unitário exibido é o preço médio do dia (total / quantidade).
+    def exibir_resumo(self, query):
 
-                # Converte esse formato específico para um objeto de data.
-                data_venda = data_venda["$date"]
+        # Guarda o filtro exibido, usado na exportação para Excel.
+        self.filtro_atual = query
 
-            # Verifica se existe uma 'data_venda' válida para formatar.
-            if data_venda:
+        # Limpa a tabela antes de inserir novos dados.
+        self.tabela.delete(*self.tabela.get_children())
 
-                # Formata a data para o formato 'Dia/Mês/Ano'.
-                data_formatada = data_venda.strftime("%d/%m/%Y")
+        # Soma dos totais exibidos.
+        total_filtrado = 0
 
-            else:
+        for linha in colecao_vendas_diarias.find(query).sort([("dia", 1), ("produto_nome", 1)]):
 
-                # Se não houver uma data válida, define a string 'Data desconhecida'
-                #       para representar esse valor na tabela.
-                data_formatada = "Data desconhecida"
+            quantidade = linha.get("quantidade", 0)
+            total = float(linha.get("total", 0) or 0)
+            preco_medio = total / quantidade if quantidade else 0
 
-            # Extrai o nome do produto da venda ou usa um valor padrão
-            #       se não estiver disponível.
-            produto_nome = venda.get("produto_nome", "Produto Desconhecido")
+            total_filtrado += total
 
-            # Extrai o nome do fornecedor da venda ou usa um valor padrão
-            #       se não estiver disponível.
-            fornecedor_nome = venda.get("fornecedor", "Fornecedor Desconhecido")
+            self.tabela.insert("", "end", values=(
+                linha["dia"].strftime("%d/%m/%Y"),  # Dia das vendas, no formato "dd/mm/aaaa".
+                linha.get("produto_nome", "Produto Desconhecido"),  # Nome do produto vendido.
+                linha.get("fornecedor", "Fornecedor Desconhecido"),  # Nome do fornecedor do produto.
+                quantidade,  # Quantidade vendida no dia.
+                f"R$ {preco_medio:.2f}",  # Preço unitário médio do dia.
+                f"R$ {total:.2f}",  # Total vendido no dia.
+                linha.get("pagamento", "Método Desconhecido")  # Método de pagamento utilizado.
+            ))
 
-            # Extrai a quantidade do produto vendido ou atribui zero se
-            #       não estiver disponível.
-            quantidade = venda.get("quantidade", 0)
+        # Atualiza o rótulo com o total das linhas exibidas.
+        self.label_total.config(text=f"Total: R$ {total_filtrado:,.2f}")
 
-            # Extrai o preço unitário do produto ou atribui zero se
-            #       não estiver disponível.
-            preco_unitario = venda.get("preco_unit", 0)
 
-            # Extrai o total do item ou atribui zero se não estiver disponível.
-            total_item = float(venda.get("total_item", 0) or 0)
 
-            # Extrai o método de pagamento usado na venda ou usa um
-            #       valor padrão se não estiver disponível.
-            forma_pagamento = venda.get("pagamento", "Método Desconhecido")
+    # Refaz o resumo diário a partir da coleção 'vendas' e recarrega a tabela.
+    def reconstruir_resumo(self):
 
-            # Acumula o valor total dos itens filtrados.
-            total_filtrado += total_item
+        if not messagebox.askyesno("Reconstruir Resumo",
+                                   "Refazer o resumo diário a partir de todas as vendas?\n"
+                                   "Faça isso com os caixas parados.",
+                                   parent=self.master):
+            return
 
-            # Insere uma nova linha na tabela 'self.tabela'. Esta ação adiciona os
-            #       dados formatados de cada venda filtrada.
-            self.tabela.insert("", "end", values=(
-                data_formatada,  # Data da venda formatada como "dd/mm/aaaa".
-                produto_nome,  # Nome do produto vendido.
-                fornecedor_nome,  # Nome do fornecedor do produto.
-                quantidade,  # Quantidade do produto vendido.
-                f"R$ {preco_unitario:.2f}",  # Preço unitário do produto formatado como moeda.
-                f"R$ {total_item:.2f}",  # Total pago pelo item, também formatado como moeda.
-                forma_pagamento  # Método de pagamento utilizado na venda.
-            ))
+        try:
 
-        # Atualiza o texto do rótulo 'self.label_total' para mostrar o
-        #       valor total dos itens filtrados.
-        # O valor 'total_filtrado' é formatado como um valor monetário em
-        #       reais, incluindo duas casas decimais e separador de milhares.
-        self.label_total.config(text=f"Total: R$ {total_filtrado:,.2f}")
+            linhas = reconstruir_vendas_diarias()
+
+        except PyMongoError as e:
+
+            messagebox.showerror("Erro", f"Erro ao reconstruir o resumo: {e}", parent=self.master)
+            return
 
+        messagebox.showinfo("Resumo Reconstruído",
+                            f"Resumo diário refeito com {linhas} linhas.",
+                            parent=self.master)
 
+        self.aplicar_filtros()
 
+
+
+    # Exporta para Excel as linhas de venda do filtro exibido (a tabela
+    #       mostra o resumo diário; a planilha traz cada linha vendida).
+    # A exportação roda em segundo plano e o botão mostra o andamento.
     def exportar_excel(self):
 
+        # O período do resumo ('dia') corresponde à data das linhas de venda ('data').
+        query = dict(self.filtro_atual)
 
+        if "dia" in query:
+            query["data"] = query.pop("dia")
 
-        # Inicializa uma lista para armazenar os dados da tabela.
-        dados = []
+        arquivo = "relatorio_vendas.xlsx"
 
-        # Itera sobre cada item na Treeview para extrair seus valores.
-        for item in self.tabela.get_children():
+        self.botao_exportar.config(state="disabled", text="Exportando...")
 
-            # Obtém os valores de cada linha da tabela e os adiciona à lista 'dados'.
-            valores = self.tabela.item(item, "values")
-            dados.append(valores)
+        def ao_progredir(feitas, total):
 
-        # Define os nomes das colunas para o DataFrame.
-        colunas = ["Data", "Produto", "Fornecedor", "Quantidade", "Preço Unitário", "Total", "Pagamento"]
+            if total:
+                self.botao_exportar.config(text=f"Exportando... {feitas * 100 // total}%")
 
-        # Cria um DataFrame a partir dos dados extraídos da tabela.
-        df = pd.DataFrame(dados, columns=colunas)
+        def restaurar_botao():
 
-        try:
+            self.botao_exportar.config(state="normal", text="Exportar para Excel")
 
-            # Tenta exportar o DataFrame para um arquivo Excel chamado "relatorio_vendas.xlsx".
-            df.to_excel("relatorio_vendas.xlsx", index=False)
+        def ao_concluir(linhas):
+
+            restaurar_botao()
 
             # Exibe uma mensagem informando que a exportação foi concluída com sucesso.
             messagebox.showinfo(
                 "Exportação Concluída",
-                "Os dados foram exportados para 'relatorio_vendas.xlsx'.",
+                f"{linhas} linhas de venda foram exportadas para '{arquivo}'.",
                 parent=self.master
             )
 
-        except Exception as e:
+        def ao_falhar(erro):
+
+            restaurar_botao()
 
             # Em caso de erro durante a exportação, exibe uma mensagem de
             #       erro com a descrição do problema.
             messagebox.showerror(
                 "Erro na Exportação",
-                f"Erro ao exportar os dados: {e}",
+                f"Erro ao exportar os dados: {erro}",
                 parent=self.master
             )
 
+        executar_em_segundo_plano(self.master,
+                                  lambda progresso: exportar_vendas_excel(arquivo, query, progresso),
+                                  ao_concluir,
+                                  ao_falhar,
+                                  ao_progredir)
 
 
-    def listar_todas_vendas(self):
 
-        # Limpa a tabela antes de inserir novos dados.
-        # '*self.tabela.get_children()' retorna todos os itens da
-        #       tabela, que são deletados.
-        self.tabela.delete(*self.tabela.get_children())
-
-        # Obtém todas as vendas armazenadas no banco de dados.
-        vendas = colecao_vendas.find()
-
-        # Variável para somar o total geral de todas as vendas.
-        total_geral = 0
-
-        # Itera por cada venda recuperada do banco de dados.
-        for venda in vendas:
-
-            # Obtém a data da venda, tratando casos onde a data pode
-            #       estar formatada como um dicionário.
-            data_venda = venda.get("data")
-            if isinstance(data_venda, dict) and "$date" in data_venda:
-
-                # Extrai o valor da chave "$date" se a data estiver no
-                #       formato de dicionário.
-                data_venda = data_venda["$date"]
-
-            # Formata a data em um formato legível (dd/mm/aaaa). Caso a data
-            #       seja inexistente, usa "Data desconhecida".
-            data_formatada = data_venda.strftime("%d/%m/%Y") if data_venda else "Data desconhecida"
-
-            # Obtém o nome do produto. Caso o campo esteja ausente,
-            #       exibe "Produto Desconhecido".
-            produto = venda.get("produto_nome", "Produto Desconhecido")
-
-            # Obtém o fornecedor. Caso o campo esteja ausente, exibe "Fornecedor Desconhecido".
-            fornecedor = venda.get("fornecedor", "Fornecedor Desconhecido")
-
-            # Obtém a quantidade vendida. Caso o campo esteja ausente, usa o valor padrão 0.
-            quantidade = venda.get("quantidade", 0)
-
-            # Obtém o preço unitário do produto. Caso o campo esteja ausente, usa o valor padrão 0.
-            preco_unitario = venda.get("preco_unit", 0)
-
-            # Obtém o total do item vendido. Caso o campo esteja ausente, usa o valor padrão 0.
-            total = venda.get("total_item", 0)
-
-            # Obtém o método de pagamento utilizado na venda. Caso o campo
-            #       esteja ausente, exibe "Método Desconhecido".
-            pagamento = venda.get("pagamento", "Método Desconhecido")
-
-            # Soma o total geral
-            total_geral += total
-
-            # Adiciona os dados de cada venda na tabela da interface.
-            # Os valores são adicionados em uma nova linha ("end") e
-            #       organizados em colunas correspondentes.
-            self.tabela.insert(
-
-                "",  # Especifica que a nova linha será inserida como um nó raiz na Treeview.
-                "end",  # Adiciona a linha no final da tabela.
-                values=(
-                    data_formatada,  # Data da venda formatada no formato dd/mm/aaaa.
-                    produto,  # Nome do produto vendido.
-                    fornecedor,  # Nome do fornecedor do produto.
-                    quantidade,  # Quantidade do produto vendido.
-                    f"R$ {preco_unitario:.2f}",  # Preço unitário formatado como moeda (exemplo: R$ 10,00).
-                    f"R$ {total:.2f}",  # Total do item formatado como moeda.
-                    pagamento  # Método de pagamento utilizado (exemplo: Dinheiro, Cartão).
-                )
-            )
+    def listar_todas_vendas(self):
 
-        # Atualiza o label do total
-        self.label_total.config(text=f"Total: R$ {total_geral:,.2f}")
+        # Exibe todo o resumo diário, sem filtros.
+        self.exibir_resumo({})
 
 
 
@@ -4124,12 +5159,12 @@ class JanelaNotaFiscal:
         frame.pack(fill=tk.BOTH, expand=True)
 
         # Botão que permite ao usuário exportar e imprimir a nota fiscal em formato PDF.
-        exportar_btn = ttk.Button(frame,
-                                  text="Exportar e Imprimir PDF",
-                                  command=lambda: self.exportar_pdf(venda))
+        self.exportar_btn = ttk.Button(frame,
+                                       text="Exportar e Imprimir PDF",
+                                       command=lambda: self.exportar_pdf(venda))
 
         # Posiciona o botão na janela e ajusta seu padding vertical.
-        exportar_btn.pack(pady=10)
+        self.exportar_btn.pack(pady=10)
 
         # Inicia a variável 'texto' com a linha de cabeçalho da nota fiscal,
         #       indicando o nome do supermercado.
@@ -4209,8 +5244,37 @@ class JanelaNotaFiscal:
         #       interface, expandindo conforme necessário.
         text_widget.pack(fill=tk.BOTH, expand=True)
 
+    # Gera o PDF da nota fiscal em segundo plano, sem travar a janela.
     def exportar_pdf(self, venda):
 
+        # Define o nome do arquivo PDF a ser salvo.
+        arquivo_pdf = "nota_fiscal.pdf"
+
+        self.exportar_btn.config(state="disabled")
+
+        def ao_concluir(_):
+
+            self.exportar_btn.config(state="normal")
+
+            # Exibe uma caixa de mensagem informando que a nota fiscal
+            #       foi exportada com sucesso.
+            messagebox.showinfo("Sucesso", f"Nota fiscal exportada como {arquivo_pdf}", parent=self.master)
+
+        def ao_falhar(erro):
+
+            self.exportar_btn.config(state="normal")
+
+            messagebox.showerror("Erro", f"Erro ao exportar a nota fiscal: {erro}", parent=self.master)
+
+        executar_em_segundo_plano(self.master,
+                                  lambda progresso: self.gerar_pdf(venda, arquivo_pdf),
+                                  ao_concluir,
+                                  ao_falhar)
+
+    # Monta a nota fiscal com o FPDF e salva em 'arquivo_pdf'.
+    # Não usa widgets: é executada fora da thread do Tkinter.
+    def gerar_pdf(self, venda, arquivo_pdf):
+
         # Cria um objeto PDF, que será usado para construir o documento.
         pdf = FPDF()
 
@@ -4341,16 +5405,9 @@ class JanelaNotaFiscal:
                  ln=True,
                  align='C')
 
-        # Define o nome do arquivo PDF a ser salvo.
-        arquivo_pdf = "nota_fiscal.pdf"
-
         # Salva o arquivo PDF no diretório local.
         pdf.output(arquivo_pdf)
 
-        # Exibe uma caixa de mensagem informando que a nota fiscal
-        #       foi exportada com sucesso.
-        messagebox.showinfo("Sucesso", f"Nota fiscal exportada como {arquivo_pdf}", parent=self.master)
-
 
 
 ############################################
@@ -4751,6 +5808,15 @@ class JanelaCaixa:
     #       botão "Admin" é pressionado.
     def abrir_admin(self):
 
+        # Confere a sessão do usuário (em memória; vai ao banco só
+        #       depois de TTL_SESSAO_S segundos).
+        if not sessao_ativa(self.dados_usuario["usuario"]):
+
+            messagebox.showerror("Sessão Encerrada",
+                                 "Seu usuário não está mais ativo. Faça login novamente.",
+                                 parent=self.root)
+            return
+
         # Cria uma nova janela de nível superior, que é usada
         #       para abrir uma nova instância de JanelaAdmin.
         JanelaAdmin(tk.Toplevel(self.root))
@@ -4789,8 +5855,8 @@ class JanelaCaixa:
         if not cod:
             return
 
-        # Procura no banco de dados do produto pelo código fornecido.
-        produto = colecao_produtos.find_one({"codigo": cod})
+        # Procura o produto pelo código no catálogo em memória do caixa.
+        produto = produto_do_catalogo(cod)
 
         # Se não encontrar um produto com o código fornecido, exibe uma
         #       mensagem de erro e interrompe a função.
@@ -4933,8 +5999,8 @@ class JanelaCaixa:
             #       porcentagem de desconto calculada anteriormente.
             subtotal_com_desconto = subtotal * (1 - desconto_porcentagem)
 
-            # Busca o fornecedor no banco de dados, se necessário
-            produto = colecao_produtos.find_one({"codigo": cod})
+            # Busca o fornecedor no catálogo do caixa
+            produto = produto_do_catalogo(cod)
 
             # Verifica se o produto foi encontrado no banco de dados.
             if not produto:
@@ -4971,96 +6037,22 @@ class JanelaCaixa:
         # Registra a data e hora atuais da venda.
         data_venda = datetime.datetime.now()
 
-        # Se o cliente forneceu um CPF, tenta atualizar o
-        #       histórico de compras desse cliente.
-        if cpf_cliente:
-
-            # Busca o cliente pelo CPF/CNPJ fornecido no banco de dados.
-            cliente = colecao_clientes.find_one({"cpf_cnpj": cpf_cliente})
-
-            # Se encontrou um cliente com esse CPF/CNPJ:
-            if cliente:
-
-                # Obtém o histórico de compras do cliente ou cria uma
-                        # lista vazia se não existir.
-                historico = cliente.get("historico_compras", [])
-
-                # Cria um dicionário com os detalhes da compra atual.
-                nova_compra = {
-                    "data": data_venda.strftime("%d/%m/%Y %H:%M"),  # Formata a data e hora da compra.
-                    "itens": itens_venda,  # Lista de itens comprados.
-                    "total": total,  # Total pago, considerando descontos.
-                    "metodo_pagamento": metodo_pagamento,  # Método de pagamento utilizado.
-                    "desconto": desconto,  # Valor do desconto aplicado.
-                }
-
-                # Adiciona a nova compra ao histórico do cliente.
-                historico.append(nova_compra)
-
-                # Atualiza o documento do cliente no banco de dados,
-                #       definindo o novo histórico de compras.
-                colecao_clientes.update_one(
-                    {"cpf_cnpj": cpf_cliente},
-                    {"$set": {"historico_compras": historico}}
-                )
-
-        # Atualizar o estoque
-        # Itera sobre cada item vendido para atualizar a
-        #       quantidade de produtos em estoque.
-        for item in itens_venda:
-
-            # Busca o produto correspondente no banco de dados pela chave 'codigo'.
-            produto = colecao_produtos.find_one({"codigo": item["codigo"]})
-
-            # Se o produto for encontrado:
-            if produto:
-
-                # Calcula a nova quantidade do produto subtraindo a quantidade
-                #       vendida da quantidade atual em estoque.
-                nova_quantidade = produto["quantidade"] - item["quantidade"]
-
-                # Verifica se a nova quantidade é negativa, o que indicaria estoque insuficiente.
-                if nova_quantidade < 0:
-
-                    # Mostra uma mensagem de erro informando que há estoque
-                    #       insuficiente para o produto e cancela a venda.
-                    messagebox.showerror(
-                        "Erro",
-                        f"Estoque insuficiente para o produto {produto['nome']}. Venda cancelada.",
-                        parent=self.root
-                    )
+        # Registra a venda: baixa o estoque de todos os itens e grava as linhas.
+        # Se algum item não tiver estoque, nada é gravado e a venda é cancelada.
+        try:
+            registrar_venda(itens_venda, cpf_cliente, metodo_pagamento, desconto, data_venda)
 
-                    # Encerra a função para não proceder com a atualização do estoque.
-                    return
+        except ValueError as e:
+            messagebox.showerror("Erro", f"{e} Venda cancelada.", parent=self.root)
+            return
 
-                # Se a quantidade é suficiente, atualiza a quantidade do
-                #       produto no banco de dados.
-                colecao_produtos.update_one(
-                    {"codigo": item["codigo"]},
-                    {"$set": {"quantidade": nova_quantidade}}
-                )
+        except PyMongoError as e:
+            messagebox.showerror("Erro", f"Não foi possível registrar a venda: {e}",
+                                 parent=self.root)
+            return
 
-        # Salva cada item da venda como um registro individual no banco de dados.
-        for item in itens_venda:
-
-            # Cria um dicionário com todos os detalhes relevantes da
-            #       venda para ser armazenado.
-            venda = {
-                "data": data_venda,  # A data e hora da venda.
-                "cliente_codigo": cpf_cliente if cpf_cliente else None,  # O CPF do cliente, se fornecido.
-                "produto_codigo": item["codigo"],  # O código do produto vendido.
-                "produto_nome": item["nome"],  # O nome do produto vendido.
-                "quantidade": item["quantidade"],  # A quantidade do produto vendido.
-                "preco_unit": item["preco_unit"],  # O preço unitário do produto.
-                "subtotal_com_desconto": item["subtotal_com_desconto"],  # O subtotal após aplicar descontos.
-                "total_item": item["subtotal_com_desconto"],
-                "pagamento": metodo_pagamento,  # O método de pagamento usado.
-                "desconto_total": desconto,  # O valor total de desconto aplicado à venda.
-                "fornecedor": item["fornecedor"], # Salva o nome do fornecedor do produto, como especificado no banco de dados.
-            }
-
-            # Insere o registro da venda na coleção de vendas do banco de dados.
-            colecao_vendas.insert_one(venda)
+        # As linhas gravadas em 'vendas' (com o CPF em 'cliente_codigo') já
+        #       formam o histórico de compras do cliente.
 
         # Criação da nota fiscal
         JanelaNotaFiscal(tk.Toplevel(self.root), {
@@ -5505,6 +6497,9 @@ class JanelaLogin:
             # Exibe uma mensagem de sucesso com o nome do usuário logado.
             messagebox.showinfo("Sucesso", f"Bem-vindo, {usuario}!", parent=self.root)
 
+            # Carrega o catálogo de produtos usado pelo caixa.
+            iniciar_catalogo()
+
             # Fecha a janela de login.
             self.root.destroy()
 
@@ -5549,6 +6544,28 @@ class JanelaLogin:
 
 
 
+# Executa apenas o teste de concorrência do caixa, sem abrir a interface.
+if "--teste-concorrencia-caixa" in sys.argv:
+    sys.exit(0 if executar_teste_concorrencia_caixa() else 1)
+
+# Refaz o resumo diário de vendas a partir da coleção 'vendas', sem abrir a interface.
+if "--reconstruir-resumo-vendas" in sys.argv:
+    print(f"Resumo diário refeito com {reconstruir_vendas_diarias()} linhas.")
+    sys.exit(0)
+
+# Executa apenas o benchmark da exportação para Excel (padrão: 1.000.000
+#       de linhas de venda), sem abrir a interface.
+if "--benchmark-exportacao-excel" in sys.argv:
+    argumentos = sys.argv[sys.argv.index("--benchmark-exportacao-excel") + 1:]
+    linhas = int(argumentos[0]) if argumentos and argumentos[0].isdigit() else 1000000
+    sys.exit(0 if executar_benchmark_exportacao(linhas) else 1)
+
+# Executa apenas o benchmark do login (custos opcionais em iterações), sem abrir a interface.
+if "--benchmark-login" in sys.argv:
+    argumentos = sys.argv[sys.argv.index("--benchmark-login") + 1:]
+    custos = [int(a) for a in argumentos if a.isdigit()]
+    sys.exit(0 if executar_benchmark_login(custos or (100000, 200000, 400000, 600000)) else 1)
+
 # Cria a janela principal para o login.
 login_root = tk.Tk()
 
@@ -26,6 +26,14 @@ from fpdf import FPDF
 #       dependentes do sistema operacional.
 import os
 
+# Importa o módulo sys, usado para ajustar o caminho de importação
+import sys
+
+# aplicar_indices() cria os índices da clínica descritos em `indices_mongodb.py`,
+#       que fica na pasta acima do projeto.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indices_mongodb import aplicar_indices
+
 # Importa Image e ImageTk do módulo PIL, que são usadas para trabalhar com
 #       imagens em aplicações Tkinter.
 from PIL import Image, ImageTk
@@ -65,6 +73,9 @@ def conectar_mongodb():
         # Acessa o banco de dados chamado 'clinica_veterinaria' dentro do servidor MongoDB.
         db = client["clinica_veterinaria"]
 
+        # Cria os índices declarados no manifesto para este sistema.
+        aplicar_indices(db, "projeto05")
+
         # Retorna o objeto de banco de dados que permite fazer operações no banco.
         return db
 
@@ -22,6 +22,13 @@ from tkinter import simpledialog
 # O pymongo é uma biblioteca para trabalhar com MongoDB, um banco de dados NoSQL.
 import pymongo
 
+import os
+import sys
+
+# Manifesto de índices do salão (`indices_mongodb.py`), na raiz do repositório.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indices_mongodb import aplicar_indices
+
 # Importa o módulo pandas e o renomeia como 'pd'
 # O pandas é utilizado para análise e manipulação de dados, especialmente
 #       útil para trabalhar com tabelas (DataFrames).
@@ -86,6 +93,9 @@ try:
     # Cria ou acessa uma coleção chamada 'financeiro'
     colecao_financeiro = db["financeiro"]  # Exemplo, se quiser depois
 
+    # Cria os índices declarados no manifesto para este sistema.
+    aplicar_indices(db, "projeto06")
+
 # O bloco 'except' captura exceções que podem ser lançadas
 #       pelo código no bloco 'try'.
 except Exception as e:
@@ -4,13 +4,25 @@ import tkinter as tk
 
 # Importa submódulos específicos de 'tkinter'. 'ttk' é usado para
 #       widgets com um estilo mais moderno. 'messagebox' é
-#       utilizado para exibir mensagens ao usuário.
-from tkinter import ttk, messagebox
+#       utilizado para exibir mensagens ao usuário e 'filedialog'
+#       para escolher o arquivo da programação de sessões.
+from tkinter import ttk, messagebox, filedialog
+
+# Importa 'datetime' e 'timedelta' para calcular o início e o fim
+#       (início + duração do filme) de cada sessão.
+from datetime import datetime, timedelta
+
+# Importa 'bisect_left' para a busca binária na agenda de cada sala.
+from bisect import bisect_left
 
 # Importa o módulo 'MongoClient' de 'pymongo'. Este módulo é necessário
 #       para se conectar e operar com um banco de dados MongoDB.
 from pymongo import MongoClient
 
+# Importa 'BulkWriteError', a exceção levantada pelo 'insert_many' quando
+#       algum documento viola um índice único (assento já ocupado).
+from pymongo.errors import BulkWriteError
+
 # Importa 'ObjectId' de 'bson.objectid', que é usado para manipular IDs
 #       do MongoDB, que são utilizados para identificar documentos de forma única.
 from bson.objectid import ObjectId
@@ -40,14 +52,18 @@ from reportlab.pdfgen import canvas
 #       manipular arquivos e diretórios.
 import os
 
-# Cria uma instância de 'MongoClient' para conectar ao servidor
-#       MongoDB local na porta padrão 27017.
-client = MongoClient("mongodb://localhost:27017/")
+# Importa o módulo sys para incluir a raiz do repositório no caminho de importação
+import sys
 
-# Acessa o banco de dados chamado 'cinema_db' dentro do servidor MongoDB.
-# Se não existir, ele será criado automaticamente ao inserir
-#       dados pela primeira vez.
-db = client["cinema_db"]
+# Da raiz do repositório vêm aplicar_indices() e a colação COLACAO_BUSCA,
+#       usada nas buscas por prefixo da tela de reservas.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indices_mongodb import aplicar_indices, COLACAO_BUSCA
+
+# A conexão com o MongoDB e a criação dos índices ficam no bloco principal
+#       (if __name__ == "__main__"): os processos da fila de ingressos
+#       importam este arquivo de novo (no Windows) e não devem abrir
+#       conexões nem recriar índices.
 
 # Importa o PIL para trabalhar com imagens
 from PIL import Image, ImageTk  # Para lidar com imagens
@@ -701,6 +717,12 @@ def deletar_sessao(db, sessao_id):
     #       removidas, mantendo a consistência dos dados.
     db.reservas.delete_many({"sessao_id": ObjectId(sessao_id)})
 
+    # Libera os assentos ocupados da sessão removida.
+    db.ocupacao_assentos.delete_many({"sessao_id": ObjectId(sessao_id)})
+
+    # Descarta o índice de ocupação da sessão removida.
+    invalidar_indice_assentos(sessao_id)
+
 
 # Função para atualizar um filme existente no banco de dados.
 def atualizar_filme(db, filme_id, titulo, duracao, classificacao, genero, sinopse):
@@ -745,6 +767,10 @@ def atualizar_sala(db, sala_id, nome, fileiras, assentos_por_fileira, tipo_assen
 # Função para atualizar os detalhes de uma sessão existente na coleção 'sessoes' no banco de dados.
 def atualizar_sessao(db, sessao_id, filme_id, sala_id, data_str, hora_str, valor_ingresso):
 
+    # Recusa a alteração se o novo horário se sobrepuser a outra sessão
+    #       da sala (a própria sessão é ignorada na verificação).
+    validar_horario_sessao(db, filme_id, sala_id, data_str, hora_str, ignorar_id=sessao_id)
+
     # db.sessoes.update_one() é usada para atualizar um documento
     #       específico na coleção 'sessoes'.
     # O primeiro parâmetro, um dicionário, define o critério de busca do
@@ -957,6 +983,9 @@ def cadastrar_filme(db, titulo, duracao, classificacao, genero, sinopse):
 # Função para cadastrar uma nova sessão no banco de dados.
 def cadastrar_sessao(db, filme_id, sala_id, data_str, hora_str, valor_ingresso):
 
+    # Recusa a sessão se a sala estiver ocupada em algum momento do filme.
+    validar_horario_sessao(db, filme_id, sala_id, data_str, hora_str)
+
     # db.sessoes.insert_one() insere um novo documento na coleção 'sessoes'.
     # O documento é formado por detalhes da sessão como IDs do
     #       filme e da sala, data, hora e valor do ingresso.
@@ -969,6 +998,239 @@ def cadastrar_sessao(db, filme_id, sala_id, data_str, hora_str, valor_ingresso):
     })
 
 
+# ============================================================
+# AGENDA DAS SALAS (ÍNDICE DE INTERVALOS DAS SESSÕES)
+# ============================================================
+
+# Formatos de data e hora das sessões, os mesmos indicados nos rótulos
+#       da tela de sessões ("AAAA-MM-DD" e "HH:MM").
+FORMATO_DATA_SESSAO = "%Y-%m-%d"
+FORMATO_HORA_SESSAO = "%H:%M"
+
+
+# Função para converter a data e a hora (texto) de uma sessão no
+#       datetime do seu início.
+# Levanta ValueError com uma mensagem legível se o formato for inválido.
+def inicio_sessao(data_str, hora_str):
+
+    try:
+        return datetime.strptime(f"{data_str} {hora_str}",
+                                 f"{FORMATO_DATA_SESSAO} {FORMATO_HORA_SESSAO}")
+
+    except (ValueError, TypeError):
+        raise ValueError(f"Data/hora inválida: {data_str} {hora_str} "
+                         f"(use AAAA-MM-DD e HH:MM).")
+
+
+# Função para montar, com uma única consulta, a agenda (índice de
+#       intervalos) de cada sala informada entre duas datas.
+# Retorna um dicionário {sala_id (str): agenda}, em que cada agenda tem:
+#       "inicios": início de cada sessão, em ordem crescente;
+#       "fins": término correspondente (início + duração do filme);
+#       "fim_max": maior término até cada posição; mantém a busca correta
+#                  mesmo que já existam sessões sobrepostas gravadas
+#                  antes desta validação;
+#       "ids": ID de cada sessão, na mesma ordem.
+# A consulta começa um dia antes de 'data_ini' para incluir as sessões
+#       que começam na véspera e terminam depois da meia-noite.
+# ignorar_id: sessão deixada de fora (a própria sessão em edição).
+def montar_indice_sessoes(db, salas_ids, data_ini, data_fim, ignorar_id=None):
+
+    # Filtra pelas salas e pelo período; usa o índice (sala_id, data).
+    filtro = {
+        "sala_id": {"$in": [ObjectId(s) for s in salas_ids]},
+        "data": {"$gte": (data_ini - timedelta(days=1)).strftime(FORMATO_DATA_SESSAO),
+                 "$lte": data_fim.strftime(FORMATO_DATA_SESSAO)},
+    }
+
+    if ignorar_id:
+        filtro["_id"] = {"$ne": ObjectId(ignorar_id)}
+
+    # Traz a duração do filme de cada sessão na mesma consulta ($lookup).
+    sessoes = db.sessoes.aggregate([
+        {"$match": filtro},
+        {"$lookup": {"from": "filmes", "localField": "filme_id",
+                     "foreignField": "_id", "as": "filme"}},
+        {"$project": {"sala_id": 1, "data": 1, "hora": 1,
+                      "duracao": {"$ifNull": [{"$arrayElemAt": ["$filme.duracao", 0]}, 0]}}},
+    ])
+
+    # Agrupa os intervalos (início, fim, id) por sala.
+    intervalos = {str(s): [] for s in salas_ids}
+
+    for s in sessoes:
+
+        try:
+            inicio = inicio_sessao(s["data"], s["hora"])
+
+        except ValueError:
+
+            # Sessões antigas com data/hora fora do formato não entram na agenda.
+            continue
+
+        fim = inicio + timedelta(minutes=int(s["duracao"] or 0))
+        intervalos.setdefault(str(s["sala_id"]), []).append((inicio, fim, str(s["_id"])))
+
+    # Ordena cada sala pelo início e calcula o maior término acumulado.
+    indice = {}
+
+    for sala, lista in intervalos.items():
+
+        lista.sort()
+
+        fim_max = []
+        maior = None
+
+        for _, fim, _ in lista:
+            maior = fim if maior is None or fim > maior else maior
+            fim_max.append(maior)
+
+        indice[sala] = {"inicios": [i[0] for i in lista],
+                        "fins": [i[1] for i in lista],
+                        "fim_max": fim_max,
+                        "ids": [i[2] for i in lista]}
+
+    return indice
+
+
+# Função para procurar, em O(log n), uma sessão da agenda que se
+#       sobreponha ao intervalo [inicio, fim).
+# bisect_left localiza as sessões que começam antes de 'fim'; dentre elas,
+#       há conflito se o maior término (fim_max) passa de 'inicio'.
+# Retorna a posição da sessão conflitante na agenda, ou None.
+def procurar_conflito_sessao(agenda, inicio, fim):
+
+    pos = bisect_left(agenda["inicios"], fim)
+
+    if pos == 0 or agenda["fim_max"][pos - 1] <= inicio:
+        return None
+
+    # Recua até a sessão que causa o conflito (numa agenda sem
+    #       sobreposições prévias, é sempre a imediatamente anterior).
+    pos -= 1
+
+    while agenda["fins"][pos] <= inicio:
+        pos -= 1
+
+    return pos
+
+
+# Função para descrever uma sessão da agenda nas mensagens de conflito.
+def descrever_sessao_agenda(agenda, pos):
+
+    inicio = agenda["inicios"][pos]
+    fim = agenda["fins"][pos]
+
+    return f"sessão de {inicio:%Y-%m-%d} das {inicio:%H:%M} às {fim:%H:%M}"
+
+
+# Função para garantir que a sala esteja livre durante toda a sessão
+#       (do início até o fim do filme).
+# Levanta ValueError se a data/hora for inválida ou se houver sobreposição.
+# ignorar_id: ID da sessão em edição, que não conflita consigo mesma.
+def validar_horario_sessao(db, filme_id, sala_id, data_str, hora_str, ignorar_id=None):
+
+    inicio = inicio_sessao(data_str, hora_str)
+
+    # A duração (em minutos) do filme define o término da sessão.
+    filme = db.filmes.find_one({"_id": ObjectId(filme_id)}, {"duracao": 1}) or {}
+    fim = inicio + timedelta(minutes=int(filme.get("duracao") or 0))
+
+    agenda = montar_indice_sessoes(db, [sala_id], inicio, fim, ignorar_id)[str(sala_id)]
+    pos = procurar_conflito_sessao(agenda, inicio, fim)
+
+    if pos is not None:
+        raise ValueError(f"A sala já está ocupada neste horário "
+                         f"({descrever_sessao_agenda(agenda, pos)}).")
+
+
+# Função para importar de uma só vez uma programação (ex.: a semana) de sessões.
+# itens: lista de dicionários com "filme_id", "sala_id", "data", "hora",
+#       "valor_ingresso" e, opcionalmente, "linha" (número usado nos erros).
+# A validação é feita em uma única passada:
+#       - uma consulta traz a duração de todos os filmes envolvidos;
+#       - uma consulta (montar_indice_sessoes) traz a agenda de todas as
+#         salas no período da programação;
+#       - as novas sessões são ordenadas por sala e início e cada uma é
+#         comparada com a agenda (bisect) e com as novas anteriores da sala.
+# Se houver qualquer erro nada é gravado; caso contrário, todas as sessões
+#       são gravadas com um único insert_many.
+# Retorna (quantidade_inserida, erros), em que erros é uma lista de textos.
+def importar_programacao_sessoes(db, itens):
+
+    erros = []
+
+    # Duração de cada filme da programação, em uma única consulta.
+    filmes_ids = list({ObjectId(i["filme_id"]) for i in itens})
+    duracoes = {str(f["_id"]): int(f.get("duracao") or 0)
+                for f in db.filmes.find({"_id": {"$in": filmes_ids}}, {"duracao": 1})}
+
+    # Converte cada linha no intervalo que ocupará na sala.
+    novas = []
+
+    for pos, item in enumerate(itens, start=1):
+
+        linha = item.get("linha", pos)
+
+        if str(item["filme_id"]) not in duracoes:
+            erros.append((linha, f"Linha {linha}: filme não encontrado."))
+            continue
+
+        try:
+            inicio = inicio_sessao(item["data"], item["hora"])
+            valor = float(item["valor_ingresso"])
+
+        except (ValueError, TypeError) as e:
+            erros.append((linha, f"Linha {linha}: {e}"))
+            continue
+
+        fim = inicio + timedelta(minutes=duracoes[str(item["filme_id"])])
+        novas.append((str(item["sala_id"]), inicio, fim, linha, {
+            "filme_id": ObjectId(item["filme_id"]),
+            "sala_id": ObjectId(item["sala_id"]),
+            "data": inicio.strftime(FORMATO_DATA_SESSAO),
+            "hora": inicio.strftime(FORMATO_HORA_SESSAO),
+            "valor_ingresso": valor,
+        }))
+
+    if novas:
+
+        # Agenda de todas as salas da programação, em uma única consulta.
+        indice = montar_indice_sessoes(db,
+                                       {n[0] for n in novas},
+                                       min(n[1] for n in novas),
+                                       max(n[2] for n in novas))
+
+        # Ordena por sala e início; (sala, fim, linha) guarda a nova sessão
+        #       de maior término já vista na sala atual.
+        novas.sort(key=lambda n: (n[0], n[1], n[3]))
+        anterior = None
+
+        for sala, inicio, fim, linha, _ in novas:
+
+            pos = procurar_conflito_sessao(indice[sala], inicio, fim)
+
+            if pos is not None:
+                erros.append((linha, f"Linha {linha}: a sala já tem uma "
+                                     f"{descrever_sessao_agenda(indice[sala], pos)}."))
+
+            elif anterior and anterior[0] == sala and anterior[1] > inicio:
+                erros.append((linha, f"Linha {linha}: conflita com a "
+                                     f"linha {anterior[2]} da programação."))
+
+            if not anterior or anterior[0] != sala or fim > anterior[1]:
+                anterior = (sala, fim, linha)
+
+    # Devolve os erros na ordem das linhas da programação.
+    if erros:
+        return 0, [texto for _, texto in sorted(erros)]
+
+    if novas:
+        db.sessoes.insert_many([n[4] for n in novas])
+
+    return len(novas), []
+
+
 # Função para criar uma nova janela secundária a partir de
 #       uma janela principal.
 def criar_janela_secundaria(root, titulo):
@@ -2053,8 +2315,14 @@ def tela_gerenciar_sessoes(root, db):
         # data_str: A data da sessão fornecida pelo usuário
         # hora_str: A hora da sessão fornecida pelo usuário
         # valor: O valor do ingresso, que foi convertido para número
-        cadastrar_sessao(db,
-                         filmes_by_title[f], salas_by_name[sl], data_str, hora_str, valor)
+        # ValueError: data/hora inválida ou sala já ocupada no horário
+        try:
+            cadastrar_sessao(db,
+                             filmes_by_title[f], salas_by_name[sl], data_str, hora_str, valor)
+
+        except ValueError as e:
+            messagebox.showerror("Erro", str(e), parent=janela)
+            return
 
         # Exibe uma mensagem informando que a sessão foi cadastrada com sucesso
         # messagebox.showinfo(): Exibe uma janela de informação
@@ -2176,13 +2444,19 @@ def tela_gerenciar_sessoes(root, db):
         # Chama a função atualizar_sessao para atualizar a sessão com os novos dados
         # Passa os parâmetros necessários: banco de dados, ID da
         #       sessão, filme, sala, data, hora e valor do ingresso
-        atualizar_sessao(db,
-                         sessao_id_edicao[0],
-                         filmes_by_title[f],
-                         salas_by_name[sl],
-                         data_str,
-                         hora_str,
-                         valor)
+        # ValueError: data/hora inválida ou sala já ocupada no horário
+        try:
+            atualizar_sessao(db,
+                             sessao_id_edicao[0],
+                             filmes_by_title[f],
+                             salas_by_name[sl],
+                             data_str,
+                             hora_str,
+                             valor)
+
+        except ValueError as e:
+            messagebox.showerror("Erro", str(e), parent=janela)
+            return
 
         # Exibe uma mensagem informando que a sessão foi atualizada com sucesso
         # messagebox.showinfo() é usado para exibir uma janela
@@ -2259,6 +2533,75 @@ def tela_gerenciar_sessoes(root, db):
             carregar_sessoes()
 
 
+    # Função para importar a programação (ex.: da semana) de um arquivo JSON.
+    # O arquivo é uma lista de objetos no formato:
+    #       {"filme": "Título", "sala": "Nome", "data": "AAAA-MM-DD",
+    #        "hora": "HH:MM", "valor_ingresso": 25.0}
+    # Todas as linhas são validadas de uma vez (importar_programacao_sessoes);
+    #       se alguma tiver erro, nenhuma sessão é gravada.
+    def importar_programacao():
+
+        caminho = filedialog.askopenfilename(parent=janela,
+                                             title="Importar Programação",
+                                             filetypes=[("JSON", "*.json")])
+
+        if not caminho:
+            return
+
+        try:
+            with open(caminho, encoding="utf-8") as arquivo:
+                linhas = json.load(arquivo)
+
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erro", f"Não foi possível ler o arquivo: {e}", parent=janela)
+            return
+
+        if not isinstance(linhas, list):
+            messagebox.showerror("Erro", "O arquivo deve conter uma lista de sessões.",
+                                 parent=janela)
+            return
+
+        # Troca o título do filme e o nome da sala pelos seus IDs.
+        itens = []
+        erros = []
+
+        for n, linha in enumerate(linhas, start=1):
+
+            if not isinstance(linha, dict):
+                erros.append(f"Linha {n}: formato inválido.")
+                continue
+
+            filme_id = filmes_by_title.get(str(linha.get("filme", "")).strip())
+            sala_id = salas_by_name.get(str(linha.get("sala", "")).strip())
+
+            if not filme_id or not sala_id:
+                erros.append(f"Linha {n}: filme ou sala inválido.")
+                continue
+
+            itens.append({"filme_id": filme_id, "sala_id": sala_id,
+                          "data": str(linha.get("data", "")).strip(),
+                          "hora": str(linha.get("hora", "")).strip(),
+                          "valor_ingresso": linha.get("valor_ingresso"),
+                          "linha": n})
+
+        if not erros:
+            quantidade, erros = importar_programacao_sessoes(db, itens)
+
+        if erros:
+
+            # Mostra apenas os primeiros erros para a janela não ficar enorme.
+            texto = "\n".join(erros[:15])
+
+            if len(erros) > 15:
+                texto += f"\n... e mais {len(erros) - 15} erro(s)."
+
+            messagebox.showerror("Programação não importada", texto, parent=janela)
+            return
+
+        messagebox.showinfo("Sucesso", f"{quantidade} sessão(ões) importada(s)!", parent=janela)
+        carregar_sessoes()
+
+
     # Associa o evento de seleção na Treeview (quando um item é
     #       selecionado) com a função 'on_tree_select'.
     tree.bind("<<TreeviewSelect>>", on_tree_select)
@@ -2275,6 +2618,11 @@ def tela_gerenciar_sessoes(root, db):
                text="Cadastrar Novo",
                command=cadastrar_novo).grid(row=3, column=0, padx=5, pady=5)
 
+    # Botão para importar a programação de sessões a partir de um arquivo JSON
+    ttk.Button(frame_campos,
+               text="Importar Programação",
+               command=importar_programacao).grid(row=3, column=1, padx=5, pady=5)
+
     # ttk.Button: Widget do Tkinter usado para criar um botão
     # text="Salvar Alterações": Define o texto do botão como "Salvar Alterações"
     # command=salvar_alteracoes: Especifica que a função 'salvar_alteracoes'
@@ -2300,9 +2648,25 @@ def tela_gerenciar_sessoes(root, db):
     carregar_sessoes()
 
 
+# Cache dos identificadores de assentos por formato de sala.
+# Chave: (fileiras, assentos_por_fileira); valor: tupla de identificadores.
+# Salas com o mesmo formato compartilham a mesma tupla, que não é
+#       recriada a cada desenho do mapa.
+_identificadores_por_formato = {}
+
+
 # Função para gerar uma lista de identificadores para assentos de cinema.
+# O resultado é uma tupla em cache, na ordem fileira por fileira; a
+#       posição de cada identificador é a mesma usada no índice de
+#       ocupação (ver `posicao_assento`).
 def gerar_identificadores_assentos(fileiras, assentos_por_fileira):
 
+    # Reaproveita os identificadores já gerados para este formato de sala.
+    chave = (fileiras, assentos_por_fileira)
+
+    if chave in _identificadores_por_formato:
+        return _identificadores_por_formato[chave]
+
     # Inicializa uma lista vazia para armazenar os
     #       identificadores dos assentos.
     assentos = []
@@ -2327,40 +2691,213 @@ def gerar_identificadores_assentos(fileiras, assentos_por_fileira):
             # Por exemplo, 'A1', 'A2', ..., 'A{n}', onde 'n' é o número de assentos na fileira.
             assentos.append(linha_letra + str(j))
 
-    # Retorna a lista completa de identificadores de assentos após
-    #       preencher todas as fileiras e todos os assentos em cada fileira.
-    return assentos
+    # Guarda a tupla de identificadores no cache e a retorna.
+    _identificadores_por_formato[chave] = tuple(assentos)
+
+    return _identificadores_por_formato[chave]
+
+
+# ÍNDICE DE OCUPAÇÃO DOS ASSENTOS (MAPA DE BITS POR SESSÃO)
+
+# Cache dos índices de ocupação por sessão.
+# Chave: ID da sessão (string); valor: dicionário com o formato da sala
+#       ("fileiras", "assentos_por_fileira") e o "mapa", um bytearray com
+#       um byte por assento (1 = ocupado, 0 = livre).
+# É invalidado sempre que uma reserva da sessão é criada, alterada ou removida
+#       neste processo. Reservas feitas em outra bilheteria não passam por
+#       aqui, por isso o mapa da tela é remontado sempre que é exibido.
+_indices_assentos = {}
+
+
+# Função que converte um identificador de assento (ex.: "C7") na sua
+#       posição no mapa de bits: fileira * assentos_por_fileira + (número - 1).
+# Retorna None se o identificador não pertencer ao formato da sala.
+def posicao_assento(assento, fileiras, assentos_por_fileira):
+
+    try:
+        fileira = ord(assento[0]) - ord('A')
+        numero = int(assento[1:])
+    except (IndexError, TypeError, ValueError):
+        return None
+
+    if not (0 <= fileira < fileiras and 1 <= numero <= assentos_por_fileira):
+        return None
+
+    return fileira * assentos_por_fileira + (numero - 1)
+
+
+# Função que monta o mapa de bits de ocupação de uma sessão com uma
+#       única consulta, projetando apenas os assentos ocupados.
+# A consulta é feita na coleção 'ocupacao_assentos' e é atendida
+#       inteiramente pelo índice único (sessao_id, assento).
+def montar_indice_assentos(db, sessao_id, fileiras, assentos_por_fileira):
+
+    # Um byte por assento da sala, todos livres inicialmente.
+    mapa = bytearray(fileiras * assentos_por_fileira)
+
+    # Projeção: apenas o identificador de cada assento ocupado da sessão.
+    for ocupacao in db.ocupacao_assentos.find({"sessao_id": ObjectId(sessao_id)},
+                                              {"_id": 0, "assento": 1}):
+
+        pos = posicao_assento(ocupacao["assento"], fileiras, assentos_por_fileira)
+
+        if pos is not None:
+            mapa[pos] = 1
+
+    return {"fileiras": fileiras, "assentos_por_fileira": assentos_por_fileira, "mapa": mapa}
+
+
+# Função que retorna o índice de ocupação da sessão, usando o cache
+#       quando ele existir e corresponder ao formato atual da sala.
+# Com recarregar=True, o índice é sempre remontado a partir do banco.
+def obter_indice_assentos(db, sessao_id, fileiras, assentos_por_fileira, recarregar=False):
+
+    indice = _indices_assentos.get(str(sessao_id))
+
+    if (recarregar or indice is None or indice["fileiras"] != fileiras
+            or indice["assentos_por_fileira"] != assentos_por_fileira):
+
+        indice = montar_indice_assentos(db, sessao_id, fileiras, assentos_por_fileira)
+        _indices_assentos[str(sessao_id)] = indice
+
+    return indice
+
+
+# Função que descarta o índice de ocupação em cache de uma ou mais sessões.
+# Deve ser chamada sempre que as reservas dessas sessões mudarem.
+def invalidar_indice_assentos(*sessoes_ids):
+
+    for sid in sessoes_ids:
+        _indices_assentos.pop(str(sid), None)
+
+
+# OCUPAÇÃO DE ASSENTOS (UM DOCUMENTO POR ASSENTO VENDIDO)
+# A coleção 'ocupacao_assentos' guarda um documento por assento ocupado:
+#       {"sessao_id": ..., "assento": "C7", "reserva_id": ...}
+# O índice único (sessao_id, assento) garante no próprio MongoDB que um
+#       assento só pode pertencer a uma reserva, mesmo com várias
+#       bilheterias vendendo a mesma sessão ao mesmo tempo.
+
+
+# Função que ocupa os assentos de uma reserva com um único insert_many.
+# Retorna a lista de assentos que já pertencem a outra reserva (vazia em
+#       caso de sucesso). Havendo conflito, os assentos ocupados por esta
+#       chamada são liberados, e nada fica pela metade.
+# Assentos que já pertencem à própria reserva (edição) não são conflito.
+def ocupar_assentos(db, sessao_id, assentos, reserva_id):
+
+    sessao_id = ObjectId(sessao_id)
+    reserva_id = ObjectId(reserva_id)
+
+    # Remove assentos repetidos, mantendo a ordem informada.
+    assentos = list(dict.fromkeys(assentos))
+
+    if not assentos:
+        return []
+
+    documentos = [{"sessao_id": sessao_id, "assento": a, "reserva_id": reserva_id}
+                  for a in assentos]
+
+    try:
+
+        # ordered=False tenta inserir todos os assentos, mesmo que alguns
+        #       já estejam ocupados, e informa cada violação do índice único.
+        db.ocupacao_assentos.insert_many(documentos, ordered=False)
+
+        return []
+
+    except BulkWriteError as e:
+
+        erros = e.details.get("writeErrors", [])
+
+        # Assentos recusados pelo índice único (código 11000).
+        duplicados = [documentos[erro["index"]]["assento"] for erro in erros if erro["code"] == 11000]
+
+        # Os assentos que entraram nesta chamada.
+        recusados = {documentos[erro["index"]]["assento"] for erro in erros}
+        inseridos = [a for a in assentos if a not in recusados]
+
+        # Qualquer outro erro: desfaz o que foi inserido e repassa a exceção.
+        if len(duplicados) != len(erros):
+            liberar_assentos(db, reserva_id, sessao_id, assentos_mantidos=[], somente=inseridos)
+            raise
+
+    # Entre os duplicados, os que já são desta mesma reserva não conflitam.
+    proprios = {o["assento"] for o in db.ocupacao_assentos.find(
+        {"sessao_id": sessao_id, "assento": {"$in": duplicados}, "reserva_id": reserva_id},
+        {"_id": 0, "assento": 1})}
+
+    conflitos = [a for a in duplicados if a not in proprios]
+
+    # Havendo conflito, libera os assentos ocupados por esta chamada.
+    if conflitos and inseridos:
+        liberar_assentos(db, reserva_id, sessao_id, assentos_mantidos=[], somente=inseridos)
+
+    return conflitos
+
+
+# Função que libera os assentos ocupados por uma reserva.
+# - Sem outros argumentos, libera todos os assentos da reserva.
+# - `sessao_id` e `assentos_mantidos`: libera tudo o que não for um dos
+#       assentos mantidos nessa sessão (usado ao editar a reserva).
+# - `somente`: libera apenas esses assentos da sessão.
+def liberar_assentos(db, reserva_id, sessao_id=None, assentos_mantidos=None, somente=None):
+
+    filtro = {"reserva_id": ObjectId(reserva_id)}
+
+    if somente is not None:
+        filtro["sessao_id"] = ObjectId(sessao_id)
+        filtro["assento"] = {"$in": list(somente)}
+
+    elif sessao_id is not None:
+        filtro["$or"] = [{"sessao_id": {"$ne": ObjectId(sessao_id)}},
+                         {"assento": {"$nin": list(assentos_mantidos or [])}}]
+
+    db.ocupacao_assentos.delete_many(filtro)
+
+
+# Função que preenche a coleção 'ocupacao_assentos' a partir das
+#       reservas existentes, quando ela ainda estiver vazia (bancos
+#       criados antes da coleção existir).
+# Se duas reservas antigas disputarem o mesmo assento, a primeira
+#       inserida fica com ele; o índice único recusa a segunda.
+def migrar_ocupacao_assentos(db):
+
+    if db.ocupacao_assentos.estimated_document_count() > 0:
+        return
+
+    documentos = []
+
+    for reserva in db.reservas.find({}, {"sessao_id": 1, "assentos_reservados": 1}):
+        for a in reserva.get("assentos_reservados", []):
+            documentos.append({"sessao_id": reserva["sessao_id"],
+                               "assento": a,
+                               "reserva_id": reserva["_id"]})
+
+    if documentos:
+        try:
+            db.ocupacao_assentos.insert_many(documentos, ordered=False)
+        except BulkWriteError:
+            pass
 
 
 # Função para obter um conjunto de assentos já ocupados em
 #       uma sessão específica.
+# O conjunto é derivado do índice de ocupação (mapa de bits) da sessão.
 def obter_assentos_ocupados(db, sessao_id):
 
-    # Consulta ao banco de dados para encontrar todas as reservas
-    #       para a sessão específica.
-    # ObjectId(sessao_id) é usado para converter o ID da sessão de
-    #       string para ObjectId, conforme usado no MongoDB.
-    reservas = db.reservas.find({"sessao_id": ObjectId(sessao_id)})
-
-    # Inicializa um conjunto para armazenar os identificadores dos assentos ocupados.
-    # Conjuntos são usados porque eles automaticamente evitam duplicatas e
-    #       oferecem operações eficientes de verificação e inserção.
-    assentos_ocupados = set()
+    # Obtém a sessão e a sala para conhecer o formato do mapa de bits.
+    sessao = obter_sessao_por_id(db, sessao_id)
+    sala = obter_sala_por_id(db, sessao["sala_id"])
 
-    # Itera sobre cada objeto de reserva retornado pela consulta.
-    for reserva in reservas:
+    indice = obter_indice_assentos(db, sessao_id, sala["fileiras"], sala["assentos_por_fileira"])
 
-        # Itera sobre cada assento reservado listado no documento da reserva.
-        for a in reserva["assentos_reservados"]:
-
-            # Adiciona cada assento ao conjunto de assentos ocupados.
-            # Se o assento já estiver no conjunto, o Python automaticamente
-            #       cuida para não adicionar duplicatas.
-            assentos_ocupados.add(a)
+    # Identificadores na mesma ordem das posições do mapa de bits.
+    assentos = gerar_identificadores_assentos(sala["fileiras"], sala["assentos_por_fileira"])
 
     # Retorna o conjunto de assentos ocupados. Isso pode ser
     #       usado para verificar rapidamente se um assento está livre ou não.
-    return assentos_ocupados
+    return {assentos[i] for i, ocupado in enumerate(indice["mapa"]) if ocupado}
 
 
 # Função para atualizar os detalhes de uma reserva específica na coleção 'reservas'.
@@ -2372,7 +2909,16 @@ def atualizar_reserva(db, reserva_id, sessao_id, assentos, nome_cliente, telefon
     #       usando o '_id' da reserva convertido para ObjectId.
     # O segundo parâmetro, '$set', é um operador do MongoDB que especifica os
     #       campos do documento que devem ser atualizados com os novos valores fornecidos.
-    db.reservas.update_one({"_id": ObjectId(reserva_id)}, {"$set": {
+    # Ocupa primeiro os assentos da nova configuração; se algum pertencer a
+    #       outra reserva, a alteração é recusada sem modificar nada.
+    conflitos = ocupar_assentos(db, sessao_id, assentos, reserva_id)
+
+    if conflitos:
+        raise ValueError("Os seguintes assentos já estão reservados: " + ", ".join(conflitos))
+
+    # find_one_and_update() devolve o documento anterior, para que o
+    #       índice de ocupação da sessão antiga também seja invalidado.
+    anterior = db.reservas.find_one_and_update({"_id": ObjectId(reserva_id)}, {"$set": {
 
         # Atualiza o ID da sessão, convertendo o novo ID de string para ObjectId.
         "sessao_id": ObjectId(sessao_id),
@@ -2382,31 +2928,27 @@ def atualizar_reserva(db, reserva_id, sessao_id, assentos, nome_cliente, telefon
             "telefone": telefone_cliente  # Telefone do cliente.
 
         }
-    }})
-
+    }}, projection={"sessao_id": 1})
 
-# Função para reservar assentos para uma sessão de cinema específica.
-def reservar_assentos(db, sessao_id, assentos, nome_cliente, telefone_cliente):
+    # Libera os assentos que deixaram de fazer parte da reserva.
+    liberar_assentos(db, reserva_id, sessao_id, assentos_mantidos=assentos)
 
-    # Primeiramente, recuperamos todas as reservas já existentes para a sessão especificada.
-    # A função ObjectId é usada para converter o sessao_id de string para ObjectId,
-    #       que é o formato necessário para consultas no MongoDB.
-    reservas_existentes = list(db.reservas.find({"sessao_id": ObjectId(sessao_id)}))
+    # Os assentos ocupados das sessões envolvidas mudaram.
+    invalidar_indice_assentos(sessao_id, *([anterior["sessao_id"]] if anterior else []))
 
-    # Lista para armazenar os assentos já reservados.
-    assentos_ja_reservados = []
 
-    # Iteramos sobre cada reserva encontrada para verificar se algum dos
-    #       assentos que se deseja reservar já está ocupado.
-    for reserva in reservas_existentes:
+# Função para reservar assentos para uma sessão de cinema específica.
+def reservar_assentos(db, sessao_id, assentos, nome_cliente, telefone_cliente):
 
-        # Iteramos sobre os assentos reservados em cada reserva existente.
-        for a in reserva["assentos_reservados"]:
+    # Gera antecipadamente o ID da reserva, para que os assentos
+    #       ocupados já apontem para ela.
+    reserva_id = ObjectId()
 
-            # Se um assento já estiver reservado, ele é adicionado à
-            #       lista de assentos já reservados.
-            if a in assentos:
-                assentos_ja_reservados.append(a)
+    # Ocupa todos os assentos de uma vez (insert_many com ordered=False).
+    # O índice único (sessao_id, assento) recusa os assentos que outra
+    #       bilheteria já vendeu, sem a janela de corrida entre "ler as
+    #       reservas" e "inserir a nova reserva".
+    assentos_ja_reservados = ocupar_assentos(db, sessao_id, assentos, reserva_id)
 
     # Verifica se há assentos já reservados na lista.
     if assentos_ja_reservados:
@@ -2418,15 +2960,16 @@ def reservar_assentos(db, sessao_id, assentos, nome_cliente, telefone_cliente):
         #       uma string separada por vírgulas.
         raise ValueError("Os seguintes assentos já estão reservados: " + ", ".join(assentos_ja_reservados))
 
-    # Verifica se não há conflitos de assentos reservados.
-    if not assentos_ja_reservados:
+    try:
 
-        # Se não houver conflitos, o sistema procede com a inserção da
-        #       reserva no banco de dados.
+        # Com os assentos garantidos, insere a reserva no banco de dados.
         # db.reservas.insert_one() insere um novo documento na coleção 'reservas'.
         # O documento é um dicionário que contém os dados da reserva, incluindo:
         result = db.reservas.insert_one({
 
+            # O ID gerado antecipadamente para a reserva.
+            "_id": reserva_id,
+
             # O ID da sessão, convertido para ObjectId, que é o formato usado
             #       pelo MongoDB para identificadores únicos.
             "sessao_id": ObjectId(sessao_id),
@@ -2437,9 +2980,16 @@ def reservar_assentos(db, sessao_id, assentos, nome_cliente, telefone_cliente):
             }
         })
 
-        # O resultado da inserção (incluindo o ID do documento inserido) é
-        #       armazenado na variável 'result'.
-        # Este ID pode ser usado para referência futura ou confirmação da reserva.
+    except Exception:
+
+        # Se a reserva não puder ser gravada, devolve os assentos.
+        liberar_assentos(db, reserva_id)
+        raise
+
+    finally:
+
+        # Os assentos ocupados da sessão mudaram: o índice em cache é descartado.
+        invalidar_indice_assentos(sessao_id)
 
     # O método insert_one retorna um resultado que inclui o ID
     #       da nova reserva inserida.
@@ -2453,12 +3003,196 @@ from fpdf import FPDF
 # Importa a biblioteca threading para execução de processos em segundo plano
 import threading
 
+# Importa o executor de processos usado na fila de geração de ingressos.
+# A montagem do PDF é trabalho de CPU; em processos separados ela não
+#       disputa o GIL com a interface gráfica.
+from concurrent.futures import ProcessPoolExecutor
+
+
+# FILA DE GERAÇÃO DE INGRESSOS
+# Os PDFs são renderizados por um conjunto limitado de processos.
+# Um semáforo limita quantos ingressos podem estar na fila ao mesmo tempo
+#       (contrapressão): quando a fila está cheia, quem envia espera ou recebe
+#       uma recusa, em vez de criar uma thread nova para cada ingresso.
+
+# Quantidade de processos que renderizam ingressos em paralelo.
+PROCESSOS_INGRESSOS = max(1, min(4, os.cpu_count() or 1))
+
+# Quantidade máxima de PDFs aguardando ou em renderização.
+LIMITE_FILA_INGRESSOS = 32
+
+# Intervalo (em milissegundos) com que a interface confere se o PDF terminou.
+INTERVALO_INGRESSO_MS = 100
+
+# Executor criado sob demanda, na primeira geração de ingresso.
+_pool_ingressos = None
+
+# Protege a criação do executor.
+_trava_pool_ingressos = threading.Lock()
+
+# Vagas disponíveis na fila de ingressos.
+_vagas_fila_ingressos = threading.BoundedSemaphore(LIMITE_FILA_INGRESSOS)
+
+
+# Função que retorna o executor de processos dos ingressos, criando-o
+#       na primeira chamada.
+def obter_pool_ingressos():
+
+    global _pool_ingressos
+
+    with _trava_pool_ingressos:
+
+        if _pool_ingressos is None:
+            _pool_ingressos = ProcessPoolExecutor(max_workers=PROCESSOS_INGRESSOS)
+
+        return _pool_ingressos
+
+
+# Função que monta e salva o PDF dos ingressos de uma reserva.
+# Executada nos processos da fila: recebe apenas dados simples (textos e
+#       lista de assentos) e retorna o nome do arquivo gerado.
+# Modo em lote: todos os assentos da reserva vão para um único PDF,
+#       um ingresso por página.
+def renderizar_ingressos(nome_arquivo, nome_cliente, telefone_cliente, filme, sessao, assentos):
+
+    # Criação do objeto PDF
+    # -----------------------------------
+    # Aqui estamos criando um novo objeto da classe FPDF, que representa um documento PDF.
+    # Essa classe é fornecida pela biblioteca FPDF, utilizada para criar documentos PDF a partir do Python.
+    # O objeto "pdf" servirá como um manipulador do documento, permitindo
+    #       adicionar páginas, definir fontes e inserir texto.
+    pdf = FPDF()
+
+    # Cada assento da reserva ocupa uma página (um ingresso) do mesmo PDF.
+    for assento in assentos:
+
+        # Adiciona uma nova página ao documento PDF
+        # -----------------------------------
+        # O método "add_page()" adiciona uma nova página em branco ao documento.
+        # Como os PDFs podem ter múltiplas páginas, este método é necessário sempre
+        #       que formos criar um novo documento.
+        # Por padrão, as páginas são adicionadas no formato "A4" (210x297mm).
+        pdf.add_page()
+
+        # Define a fonte que será usada para escrever no PDF
+        # -----------------------------------
+        # O método "set_font()" permite escolher a fonte do texto dentro do PDF.
+        # Parâmetros:
+        # - "Arial": Nome da fonte a ser utilizada.
+        # - "size=12": Define o tamanho da fonte em pontos (pt). O tamanho 12 é padrão para textos legíveis.
+        # Algumas opções de fontes disponíveis na FPDF: "Arial", "Courier", "Times", "Symbol", "ZapfDingbats".
+        pdf.set_font("Arial", size=12)
+
+        # Adiciona um título ao ingresso no PDF
+        # -----------------------------------
+        # O método "cell()" cria uma célula no PDF, que pode conter texto.
+        # Parâmetros:
+        # - "200": Define a largura da célula. Como a largura do A4 tem cerca de 210mm,
+        #       usamos 200mm para cobrir quase toda a largura da página.
+        # - "10": Define a altura da célula, geralmente usada para espaçamento vertical do texto.
+        # - "txt='CINEMA - INGRESSO'": Define o texto que será inserido dentro da célula.
+        # - "ln=True": Move o cursor para a próxima linha automaticamente após inserir o texto.
+        # - "align='C'": Centraliza o texto horizontalmente dentro da célula (C = Center).
+        pdf.cell(200, 10, txt="CINEMA - INGRESSO", ln=True, align="C")
+
+        # Adiciona um espaçamento vertical antes das próximas informações
+        # -----------------------------------
+        # O método "ln(10)" adiciona uma nova linha com espaçamento de 10mm.
+        # Isso cria um espaço entre o título e as próximas informações do ingresso.
+        pdf.ln(10)
+
+        # Adiciona os detalhes do cliente no ingresso
+        # -----------------------------------
+        # O método "cell()" é utilizado para inserir cada informação de forma separada.
+        # Como o parâmetro "ln=True" está ativado, cada chamada do "cell()" cria uma nova linha automaticamente.
+        pdf.cell(0, 10, txt=f"Cliente: {nome_cliente}", ln=True)  # Nome do cliente
+        pdf.cell(0, 10, txt=f"Telefone: {telefone_cliente}", ln=True)  # Telefone do cliente
+
+        # Adiciona os detalhes do filme e sessão no ingresso
+        # -----------------------------------
+        # O parâmetro "0" na largura significa que a célula ocupará toda a largura disponível.
+        # O "ln=True" força o texto a ir para uma nova linha, organizando os dados verticalmente.
+        pdf.cell(0, 10, txt=f"Filme: {filme}", ln=True)  # Nome do filme
+        pdf.cell(0, 10, txt=f"Sessão: {sessao}", ln=True)  # Data, horário e sala do filme
+
+        # Adiciona o assento deste ingresso
+        # -----------------------------------
+        pdf.cell(0, 10, txt=f"Assento: {assento}", ln=True)
+
+        # Adiciona um espaçamento extra antes das informações finais
+        # -----------------------------------
+        # O "ln(10)" adiciona um espaço de 10mm antes de inserir a mensagem final.
+        pdf.ln(10)
+
+        # Adiciona uma linha divisória no PDF para separar as informações
+        # ---------------------------------------------------------------
+        # O método "cell()" cria uma célula que ocupa toda a largura disponível no documento PDF.
+        # Como não foi especificada uma largura fixa (0), a linha se estende até o final da página.
+        # O texto "----------------------------------------" é apenas uma forma visual de
+        #       criar um divisor dentro do PDF.
+        # O parâmetro "ln=True" indica que, após esta célula, o cursor deve ir para a próxima linha.
+        pdf.cell(0, 10, txt="----------------------------------------", ln=True)
+
+        # Adiciona uma mensagem de instrução ao cliente
+        # ---------------------------------------------------------------
+        # Aqui, estamos adicionando uma mensagem importante no ingresso, informando que o cliente
+        #       deve apresentar o ingresso na entrada do cinema.
+        # O método "cell()" novamente cria uma célula que ocupa toda a largura do documento (0).
+        # O texto "Apresente este ingresso na entrada do cinema." serve como uma instrução clara para o usuário.
+        # O parâmetro "ln=True" força uma nova linha após essa célula, garantindo que a
+        #       estrutura do documento fique organizada.
+        pdf.cell(0, 10, txt="Apresente este ingresso na entrada do cinema.", ln=True)
+
+    # Salvar o arquivo PDF gerado
+    # ---------------------------------------------------------------
+    # O método "output()" da classe FPDF é responsável por gerar e salvar o
+    #       arquivo PDF no diretório informado em "nome_arquivo".
+    pdf.output(nome_arquivo)
+
+    return nome_arquivo
+
+
+# Função que coloca na fila a geração do PDF de uma reserva.
+# - bloquear=True: se a fila estiver cheia, espera uma vaga.
+# - bloquear=False: se a fila estiver cheia, retorna None imediatamente.
+# - ao_concluir: função chamada com o `Future` quando o PDF terminar.
+# Retorna o `Future` da renderização, cujo resultado é o nome do arquivo.
+def enviar_ingressos(nome_arquivo, nome_cliente, telefone_cliente, filme, sessao, assentos,
+                     bloquear=True, ao_concluir=None):
+
+    # Reserva uma vaga na fila (contrapressão).
+    if not _vagas_fila_ingressos.acquire(blocking=bloquear):
+        return None
+
+    try:
+        futuro = obter_pool_ingressos().submit(renderizar_ingressos, nome_arquivo, nome_cliente,
+                                               telefone_cliente, filme, sessao, list(assentos))
+    except Exception:
+        _vagas_fila_ingressos.release()
+        raise
+
+    # Ao terminar (com sucesso ou erro), devolve a vaga e avisa quem enviou.
+    def concluido(f):
+
+        _vagas_fila_ingressos.release()
+
+        if ao_concluir:
+            ao_concluir(f)
+
+    futuro.add_done_callback(concluido)
+
+    return futuro
+
+
 # Definição da função principal que gera o ingresso
-def gerar_ingresso(nome_cliente, telefone_cliente, filme, sessao, assentos):
+def gerar_ingresso(root, reserva_id, nome_cliente, telefone_cliente, filme, sessao, assentos):
 
     """
-    Gera um arquivo PDF representando um ingresso de cinema com as informações fornecidas.
+    Gera um arquivo PDF com os ingressos de cinema de uma reserva, um por
+    página, usando a fila de processos de ingressos.
 
+    :param root: Janela principal, usada para acompanhar a geração na thread da interface.
+    :param reserva_id: ID da reserva, que torna o nome do arquivo único.
     :param nome_cliente: Nome do cliente que comprou o ingresso.
     :param telefone_cliente: Telefone de contato do cliente.
     :param filme: Nome do filme que será assistido.
@@ -2466,165 +3200,93 @@ def gerar_ingresso(nome_cliente, telefone_cliente, filme, sessao, assentos):
     :param assentos: Lista dos assentos reservados para o cliente.
     """
 
-    # Definição da função interna que será responsável por gerar o arquivo PDF
-    def gerar_pdf():
+    # Define o nome do arquivo PDF baseado no nome do cliente e no ID da reserva.
+    # Substitui espaços no nome por "_" para evitar problemas com nomes de arquivos.
+    # O ID impede que duas reservas do mesmo cliente, renderizadas em
+    #       paralelo pela fila, gravem o mesmo arquivo.
+    nome_arquivo = f"Ingresso_{nome_cliente.replace(' ', '_')}_{reserva_id}.pdf"
 
-        """
-        Gera e salva um arquivo PDF contendo as informações do ingresso.
-        Essa função é executada dentro de uma thread separada para não travar a interface do usuário.
-        """
+    # Chamada na thread da interface quando o PDF termina de ser gerado.
+    def ao_concluir(futuro):
 
         try:
 
-            # Define o nome do arquivo PDF baseado no nome do cliente.
-            # Substitui espaços no nome por "_" para evitar problemas com nomes de arquivos.
-            nome_arquivo = f"Ingresso_{nome_cliente.replace(' ', '_')}.pdf"
-
-            # Criação do objeto PDF
-            # -----------------------------------
-            # Aqui estamos criando um novo objeto da classe FPDF, que representa um documento PDF.
-            # Essa classe é fornecida pela biblioteca FPDF, utilizada para criar documentos PDF a partir do Python.
-            # O objeto "pdf" servirá como um manipulador do documento, permitindo
-            #       adicionar páginas, definir fontes e inserir texto.
-            pdf = FPDF()
-
-            # Adiciona uma nova página ao documento PDF
-            # -----------------------------------
-            # O método "add_page()" adiciona uma nova página em branco ao documento.
-            # Como os PDFs podem ter múltiplas páginas, este método é necessário sempre
-            #       que formos criar um novo documento.
-            # Por padrão, as páginas são adicionadas no formato "A4" (210x297mm).
-            pdf.add_page()
-
-            # Define a fonte que será usada para escrever no PDF
-            # -----------------------------------
-            # O método "set_font()" permite escolher a fonte do texto dentro do PDF.
-            # Parâmetros:
-            # - "Arial": Nome da fonte a ser utilizada.
-            # - "size=12": Define o tamanho da fonte em pontos (pt). O tamanho 12 é padrão para textos legíveis.
-            # Algumas opções de fontes disponíveis na FPDF: "Arial", "Courier", "Times", "Symbol", "ZapfDingbats".
-            pdf.set_font("Arial", size=12)
-
-            # Adiciona um título ao ingresso no PDF
-            # -----------------------------------
-            # O método "cell()" cria uma célula no PDF, que pode conter texto.
-            # Parâmetros:
-            # - "200": Define a largura da célula. Como a largura do A4 tem cerca de 210mm,
-            #       usamos 200mm para cobrir quase toda a largura da página.
-            # - "10": Define a altura da célula, geralmente usada para espaçamento vertical do texto.
-            # - "txt='CINEMA - INGRESSO'": Define o texto que será inserido dentro da célula.
-            # - "ln=True": Move o cursor para a próxima linha automaticamente após inserir o texto.
-            # - "align='C'": Centraliza o texto horizontalmente dentro da célula (C = Center).
-            pdf.cell(200, 10, txt="CINEMA - INGRESSO", ln=True, align="C")
-
-            # Adiciona um espaçamento vertical antes das próximas informações
-            # -----------------------------------
-            # O método "ln(10)" adiciona uma nova linha com espaçamento de 10mm.
-            # Isso cria um espaço entre o título e as próximas informações do ingresso.
-            pdf.ln(10)
-
-            # Adiciona os detalhes do cliente no ingresso
-            # -----------------------------------
-            # O método "cell()" é utilizado para inserir cada informação de forma separada.
-            # Como o parâmetro "ln=True" está ativado, cada chamada do "cell()" cria uma nova linha automaticamente.
-            pdf.cell(0, 10, txt=f"Cliente: {nome_cliente}", ln=True)  # Nome do cliente
-            pdf.cell(0, 10, txt=f"Telefone: {telefone_cliente}", ln=True)  # Telefone do cliente
-
-            # Adiciona os detalhes do filme e sessão no ingresso
-            # -----------------------------------
-            # O parâmetro "0" na largura significa que a célula ocupará toda a largura disponível.
-            # O "ln=True" força o texto a ir para uma nova linha, organizando os dados verticalmente.
-            pdf.cell(0, 10, txt=f"Filme: {filme}", ln=True)  # Nome do filme
-            pdf.cell(0, 10, txt=f"Sessão: {sessao}", ln=True)  # Data, horário e sala do filme
-
-            # Adiciona os assentos reservados
-            # -----------------------------------
-            # O método "join()" é usado para converter a lista de assentos em uma string separada por vírgulas.
-            # Exemplo: Se "assentos" for ["A1", "A2", "B5"], ele será transformado em "A1, A2, B5".
-            pdf.cell(0, 10, txt=f"Assentos: {', '.join(assentos)}", ln=True)
-
-            # Adiciona um espaçamento extra antes das informações finais
-            # -----------------------------------
-            # O "ln(10)" adiciona um espaço de 10mm antes de inserir a mensagem final.
-            pdf.ln(10)
-
-            # Adiciona uma linha divisória no PDF para separar as informações
-            # ---------------------------------------------------------------
-            # O método "cell()" cria uma célula que ocupa toda a largura disponível no documento PDF.
-            # Como não foi especificada uma largura fixa (0), a linha se estende até o final da página.
-            # O texto "----------------------------------------" é apenas uma forma visual de
-            #       criar um divisor dentro do PDF.
-            # O parâmetro "ln=True" indica que, após esta célula, o cursor deve ir para a próxima linha.
-            pdf.cell(0, 10, txt="----------------------------------------", ln=True)
-
-            # Adiciona uma mensagem de instrução ao cliente
-            # ---------------------------------------------------------------
-            # Aqui, estamos adicionando uma mensagem importante no ingresso, informando que o cliente
-            #       deve apresentar o ingresso na entrada do cinema.
-            # O método "cell()" novamente cria uma célula que ocupa toda a largura do documento (0).
-            # O texto "Apresente este ingresso na entrada do cinema." serve como uma instrução clara para o usuário.
-            # O parâmetro "ln=True" força uma nova linha após essa célula, garantindo que a
-            #       estrutura do documento fique organizada.
-            pdf.cell(0, 10, txt="Apresente este ingresso na entrada do cinema.", ln=True)
-
-            # Salvar o arquivo PDF gerado
-            # ---------------------------------------------------------------
-            # O método "output()" da classe FPDF é responsável por gerar e salvar o
-            #       arquivo PDF no diretório atual.
-            # O nome do arquivo é definido previamente na variável "nome_arquivo".
-            # Se "nome_arquivo" for "Ingresso_Joao_Silva.pdf", o PDF será salvo como esse nome.
-            pdf.output(nome_arquivo)
-
-            # Abrir automaticamente o PDF gerado sem travar a interface gráfica
-            # ---------------------------------------------------------------
-            # O método "os.startfile()" abre um arquivo usando o programa padrão do sistema operacional.
-            # No Windows, isso significa que o PDF será aberto automaticamente no
-            #       leitor de PDF padrão (como Adobe Reader ou Edge).
-            # Como essa operação pode ser bloqueante e causar travamento da interface
-            #       gráfica, ela é executada dentro de uma **thread separada**.
-            # A biblioteca "threading" permite executar processos em segundo plano, garantindo
-            #       que a aplicação continue responsiva.
-            # - "target=os.startfile" -> Define que a função "os.startfile()" será executada dentro da thread.
-            # - "args=(nome_arquivo,)" -> Passa o nome do arquivo como argumento para "os.startfile()".
-            # - "daemon=True" -> Define a thread como daemon, garantindo que ela será encerrada
-            #       automaticamente quando o programa principal terminar.
-            threading.Thread(target=os.startfile, args=(nome_arquivo,), daemon=True).start()
-
+            # futuro.result() devolve o nome do arquivo ou repassa o erro da renderização.
+            # O método "os.startfile()" abre o PDF no leitor padrão do sistema operacional.
+            os.startfile(futuro.result())
 
         # Captura e trata possíveis erros durante a geração do PDF
-        # ---------------------------------------------------------------
-        # A instrução "try" tenta executar o código dentro do bloco sem erros.
-        # Se ocorrer um erro (exceção), o bloco "except" é ativado para capturar o erro.
-        # O "Exception as e" captura qualquer tipo de erro e armazena a mensagem do erro na variável "e".
         except Exception as e:
 
             # Exibe uma mensagem de erro para o usuário caso ocorra uma falha na geração do PDF
-            # ---------------------------------------------------------------
-            # "messagebox.showerror()" é um método da biblioteca Tkinter utilizado para exibir
-            #       mensagens de erro em uma janela pop-up.
-            # Parâmetros:
-            # - "Erro": Define o título da caixa de diálogo.
-            # - f"Erro ao gerar PDF: {str(e)}" -> Exibe a mensagem de erro retornada
-            #       pela exceção, convertida em string.
-            # Isso permite que o usuário entenda o que deu errado e possa corrigir o problema.
             messagebox.showerror("Erro", f"Erro ao gerar PDF: {str(e)}")
 
+    # Envia a reserva para a fila sem bloquear a interface gráfica.
+    futuro = enviar_ingressos(nome_arquivo, nome_cliente, telefone_cliente, filme, sessao, assentos,
+                              bloquear=False)
+
+    # Se a fila estiver cheia (muitas vendas simultâneas), o usuário é avisado.
+    if futuro is None:
+
+        messagebox.showwarning("Aguarde",
+                               "Muitos ingressos estão sendo gerados no momento. "
+                               "Tente gerar este ingresso novamente em instantes.")
+        return
+
+    # O `Future` termina em uma thread do executor, e o Tkinter só pode ser
+    #       usado na thread da interface: ela mesma confere o futuro com
+    #       root.after() até o PDF ficar pronto.
+    def verificar():
+
+        if futuro.done():
+            ao_concluir(futuro)
+        else:
+            root.after(INTERVALO_INGRESSO_MS, verificar)
+
+    root.after(INTERVALO_INGRESSO_MS, verificar)
 
-    # Criamos uma thread separada para evitar que a interface gráfica trave
-    # ---------------------------------------------------------------
-    # Quando um código executa uma operação demorada, como salvar um arquivo PDF,
-    # ele pode bloquear a interface gráfica do usuário (GUI), impedindo interações.
-    # Para evitar esse problema, utilizamos a biblioteca "threading" para executar
-    #       essa operação em segundo plano.
-    #
-    # A função "threading.Thread()" cria uma nova thread (processo paralelo).
-    # Parâmetros:
-    # - "target=gerar_pdf" -> Define a função que será executada na thread (neste caso, a geração do PDF).
-    # - "daemon=True" -> Define a thread como daemon, garantindo que ela seja
-    #       encerrada automaticamente quando o programa principal for fechado.
-    #
-    # Em seguida, chamamos "start()" para iniciar a execução da thread.
-    threading.Thread(target=gerar_pdf, daemon=True).start()
+
+# Mede a vazão da geração de ingressos, em ingressos (páginas) por segundo,
+#       comparando a geração sequencial com a fila de processos.
+# Os PDFs são gravados em uma pasta temporária, apagada ao final.
+# Execução: python "Sistema+de+Reserva+de+Cinema.py" --benchmark-ingressos
+def executar_benchmark_ingressos(reservas=40, assentos_por_reserva=30):
+
+    import tempfile
+    import time
+
+    assentos = list(gerar_identificadores_assentos(3, 10))[:assentos_por_reserva]
+    total_ingressos = reservas * len(assentos)
+
+    with tempfile.TemporaryDirectory() as pasta:
+
+        # Geração sequencial, no processo atual.
+        inicio = time.perf_counter()
+
+        for i in range(reservas):
+            renderizar_ingressos(os.path.join(pasta, f"seq_{i}.pdf"), f"Cliente {i}",
+                                 "0000-0000", "Filme Teste", "01/01/2030 20:00 (Sala 1)", assentos)
+
+        sequencial = time.perf_counter() - inicio
+
+        # Geração pela fila de processos (com contrapressão).
+        obter_pool_ingressos()
+        inicio = time.perf_counter()
+
+        futuros = [enviar_ingressos(os.path.join(pasta, f"fila_{i}.pdf"), f"Cliente {i}",
+                                    "0000-0000", "Filme Teste", "01/01/2030 20:00 (Sala 1)", assentos)
+                   for i in range(reservas)]
+
+        for f in futuros:
+            f.result()
+
+        fila = time.perf_counter() - inicio
+
+    print(f"Reservas: {reservas} | Ingressos: {total_ingressos} | Processos: {PROCESSOS_INGRESSOS}")
+    print(f"Sequencial: {total_ingressos / sequencial:.1f} ingressos/s")
+    print(f"Fila de processos: {total_ingressos / fila:.1f} ingressos/s")
+
+    obter_pool_ingressos().shutdown()
 
 
 # ============================================================
@@ -2779,10 +3441,11 @@ def tela_reserva_assentos(root, db):
         if not filme_doc:
             return
 
-        # Obtém todas as sessões associadas ao filme selecionado.
-        # obter_sessoes_por_filme(db, filme_doc["_id"]): Retorna as
-        #       sessões para o filme cujo ID é fornecido.
-        sessoes_filme = list(obter_sessoes_por_filme(db, filme_doc["_id"]))
+        # Obtém todas as sessões associadas ao filme selecionado, já com o
+        #       nome da sala, em uma única consulta.
+        # obter_sessoes_detalhadas(db, {"filme_id": ...}): Retorna as
+        #       sessões do filme cujo ID é fornecido.
+        sessoes_filme = obter_sessoes_detalhadas(db, {"filme_id": filme_doc["_id"]})
 
         # Lista para armazenar as informações das sessões formatadas.
         valores = []
@@ -2790,13 +3453,8 @@ def tela_reserva_assentos(root, db):
         # Itera sobre cada sessão associada ao filme selecionado.
         for s in sessoes_filme:
 
-            # Obtém os detalhes da sala correspondente à sessão.
-            # obter_sala_por_id(db, s["sala_id"]): Retorna o documento da
-            #       sala com base no ID fornecido.
-            sala_doc = obter_sala_por_id(db, s["sala_id"])
-
             # Formata o texto da sessão com data, hora e nome da sala.
-            texto_sessao = f"{s['data']} {s['hora']} - {sala_doc['nome']}"
+            texto_sessao = f"{s['data']} {s['hora']} - {s['nome_sala']}"
 
             # Adiciona o ID da sessão e o texto formatado à lista de valores.
             valores.append((str(s["_id"]), texto_sessao))
@@ -2980,6 +3638,11 @@ def tela_reserva_assentos(root, db):
                     #       ser excluída usando o ID da reserva.
                     db.reservas.delete_one({"_id": reserva["_id"]})
 
+                    # Libera os assentos da reserva e descarta o
+                    #       índice de ocupação da sessão.
+                    liberar_assentos(db, reserva["_id"])
+                    invalidar_indice_assentos(sessao_id)
+
                     # Exibe uma mensagem informando que a reserva foi deletada com sucesso.
                     # messagebox.showinfo(): Exibe uma janela informativa com a mensagem de sucesso.
                     # parent=janela_reserva: Define a janela informativa como filha da janela atual.
@@ -3180,12 +3843,15 @@ def tela_reserva_assentos(root, db):
         #       assentos (ex.: A1, A2, B1, etc.).
         assentos_totais = gerar_identificadores_assentos(sala["fileiras"], sala["assentos_por_fileira"])
 
-        ###### PAREI AQUI FAZER A FUNCAO gerar_identificadores_assentos e depois as outras duas que faltam...
-
-        # Obtém os assentos que já estão ocupados para a sessão selecionada.
-        # obter_assentos_ocupados(db, sessao_id): Retorna um conjunto contendo os
-        #       identificadores de assentos ocupados.
-        assentos_ocupados = obter_assentos_ocupados(db, sessao_id)
+        # Obtém o índice de ocupação (mapa de bits) da sessão selecionada.
+        # obter_indice_assentos(): Monta o índice com uma única consulta
+        #       projetada; cada posição vale 1 se o assento está ocupado.
+        # recarregar=True: o mapa é remontado a cada exibição, para mostrar
+        #       também os assentos vendidos por outras bilheterias.
+        mapa_ocupacao = obter_indice_assentos(db, sessao_id,
+                                              sala["fileiras"],
+                                              sala["assentos_por_fileira"],
+                                              recarregar=True)["mapa"]
 
         # Armazena o número total de fileiras da sala.
         # sala["fileiras"]: Obtém o número de fileiras na sala a partir do banco de dados.
@@ -3224,12 +3890,11 @@ def tela_reserva_assentos(root, db):
 
         # Define uma função para alternar o estado de um assento quando clicado.
         # toggle_assento: Gerencia a seleção ou deseleção de um assento no mapa.
-        def toggle_assento(assento, btn):
+        def toggle_assento(assento, btn, pos):
 
             # Verifica se o assento já está reservado.
-            # assento in assentos_ocupados: Confirma se o assento
-            #       está na lista de ocupados.
-            if assento in assentos_ocupados:
+            # mapa_ocupacao[pos]: Consulta a posição do assento no mapa de bits.
+            if mapa_ocupacao[pos]:
 
                 # Se o assento estiver reservado, abre a caixa de detalhes da reserva.
                 # abrir_caixa_reserva: Função que exibe os detalhes da
@@ -3271,11 +3936,14 @@ def tela_reserva_assentos(root, db):
             # for j, assento in enumerate(linha): Itera sobre os assentos na fileira atual.
             for j, assento in enumerate(linha):
 
+                # Posição do assento no mapa de bits de ocupação.
+                pos = i * assentos_por_fileira + j
+
                 # Define a cor de fundo do botão com base na disponibilidade do assento.
                 # bg_color: A cor do botão é cinza (reservado) ou verde (disponível).
                 # "gray": Indica que o assento está ocupado (reservado).
                 # "green": Indica que o assento está disponível.
-                bg_color = "gray" if assento in assentos_ocupados else "green"
+                bg_color = "gray" if mapa_ocupacao[pos] else "green"
 
                 # Cria o botão para representar o assento.
                 # tk.Button: Cria um botão no mapa com o texto do identificador do assento.
@@ -3292,11 +3960,12 @@ def tela_reserva_assentos(root, db):
 
                 # Configura o comando a ser executado ao clicar no botão.
                 # btn.config: Define o comando do botão.
-                # lambda b=btn, a=assento: toggle_assento(a, b): Cria uma função que
-                #       alterna o estado do assento ao clicar.
+                # lambda b=btn, a=assento, p=pos: toggle_assento(a, b, p): Cria uma
+                #       função que alterna o estado do assento ao clicar.
                 # b=btn: Passa o botão atual como argumento.
                 # a=assento: Passa o identificador do assento como argumento.
-                btn.config(command=lambda b=btn, a=assento: toggle_assento(a, b))
+                # p=pos: Passa a posição do assento no mapa de bits.
+                btn.config(command=lambda b=btn, a=assento, p=pos: toggle_assento(a, b, p))
 
 
     # Associa um evento ao combo_filmes para atualizar as sessões ao selecionar um filme.
@@ -3500,7 +4169,8 @@ def tela_reserva_assentos(root, db):
             # `list(selected_assentos)`: Lista dos assentos selecionados pelo usuário.
             # `nome`: Nome do cliente.
             # `telefone`: Telefone do cliente.
-            reservar_assentos(db, sessao_id, list(selected_assentos), nome, telefone)
+            # Retorna o ID da reserva gravada, usado no nome do ingresso.
+            reserva_id = reservar_assentos(db, sessao_id, list(selected_assentos), nome, telefone)
 
             # Mostra uma mensagem de sucesso se os assentos forem reservados com sucesso.
             # messagebox.showinfo: Mostra uma caixa de diálogo de informação.
@@ -3512,12 +4182,16 @@ def tela_reserva_assentos(root, db):
 
             # Após reservar os assentos, gera o ingresso correspondente.
             # `gerar_ingresso`: Função que cria um arquivo PDF com os dados do ingresso.
+            # `root`: Janela principal, que acompanha a geração do PDF.
+            # `reserva_id`: ID da reserva, que identifica o arquivo do ingresso.
             # `nome_cliente`: Nome do cliente que reservou os assentos.
             # `telefone_cliente`: Telefone do cliente que reservou os assentos.
             # `filme`: Nome do filme da sessão reservada.
             # `sessao`: Texto representando a sessão reservada.
             # `assentos`: Lista dos assentos reservados.
-            gerar_ingresso(nome_cliente=nome,
+            gerar_ingresso(root,
+                           reserva_id,
+                           nome_cliente=nome,
                            telefone_cliente=telefone,
                            filme=filme_txt,
                            sessao=sessao_txt,
@@ -3570,13 +4244,43 @@ def tela_reserva_assentos(root, db):
 
 
 
+# Função para obter as sessões já acompanhadas do título do filme e do
+#       nome da sala, em uma única consulta de agregação.
+# Os dois `$lookup` buscam filme e sala pelo `_id` no próprio servidor,
+#       em vez de uma consulta por sessão para cada um (N+1).
+# filtro: condição opcional aplicada às sessões (ex.: {"filme_id": ...}).
+def obter_sessoes_detalhadas(db, filtro=None):
+
+    return list(db.sessoes.aggregate([
+
+        # Seleciona as sessões desejadas (todas, se não houver filtro).
+        {"$match": filtro or {}},
+
+        # Junta o filme e a sala de cada sessão pelos seus IDs.
+        {"$lookup": {"from": "filmes", "localField": "filme_id",
+                     "foreignField": "_id", "as": "filme"}},
+        {"$lookup": {"from": "salas", "localField": "sala_id",
+                     "foreignField": "_id", "as": "sala"}},
+
+        # Mantém os campos da sessão e apenas o título do filme e o nome
+        #       da sala, com um texto padrão caso algum tenha sido excluído.
+        {"$project": {
+            "filme_id": 1, "sala_id": 1, "data": 1, "hora": 1, "valor_ingresso": 1,
+            "titulo_filme": {"$ifNull": [{"$arrayElemAt": ["$filme.titulo", 0]},
+                                         "Filme desconhecido"]},
+            "nome_sala": {"$ifNull": [{"$arrayElemAt": ["$sala.nome", 0]},
+                                      "Sala desconhecida"]},
+        }},
+    ]))
+
+
 # Função para criar mapeamentos entre os detalhes textuais
 #       das sessões e seus IDs, e vice-versa.
 def obter_sessoes_map(db):
 
-    # Primeiro, obtemos todas as sessões chamando a função obter_sessoes(),
-    #       que retorna uma lista de todas as sessões armazenadas no banco de dados.
-    sessoes = obter_sessoes(db)
+    # Obtemos todas as sessões, já com o título do filme e o nome da
+    #       sala, em uma única consulta (obter_sessoes_detalhadas).
+    sessoes = obter_sessoes_detalhadas(db)
 
     # Inicializamos uma lista vazia para armazenar os detalhes
     #       formatados das sessões junto com seus IDs.
@@ -3585,17 +4289,9 @@ def obter_sessoes_map(db):
     # Iteramos sobre cada sessão na lista de sessões.
     for s in sessoes:
 
-        # Obtemos os detalhes do filme chamando obter_filme_por_id(),
-        #       passando o ID do filme da sessão.
-        filme = obter_filme_por_id(db, s["filme_id"])
-
-        # Obtemos os detalhes da sala chamando obter_sala_por_id(),
-        #       passando o ID da sala da sessão.
-        sala = obter_sala_por_id(db, s["sala_id"])
-
         # Formatamos uma string que contém o título do filme, a data e
         #       a hora da sessão, e o nome da sala.
-        texto = f"{filme['titulo']} - {s['data']} {s['hora']} ({sala['nome']})"
+        texto = f"{s['titulo_filme']} - {s['data']} {s['hora']} ({s['nome_sala']})"
 
         # Adicionamos uma tupla contendo o ID da sessão e o texto
         #       formatado à lista values.
@@ -3623,6 +4319,118 @@ def obter_reservas(db):
     return list(db.reservas.find())
 
 
+# Quantidade de reservas trazidas do banco a cada lote da tela de reservas.
+TAMANHO_LOTE_RESERVAS = 200
+
+# Tempo (ms) sem digitação antes de aplicar os filtros da tela de reservas.
+ATRASO_FILTRO_MS = 300
+
+# Campos da reserva exibidos na grade (projeção das consultas).
+CAMPOS_GRADE_RESERVAS = {"sessao_id": 1, "assentos_reservados": 1,
+                         "cliente.nome": 1, "cliente.telefone": 1}
+
+# Campos de texto filtrados por prefixo, com índices na colação COLACAO_BUSCA.
+CAMPOS_PREFIXO_RESERVAS = ("assentos_reservados", "cliente.nome", "cliente.telefone")
+
+
+# Função para montar a condição "começa com 'texto'" como um intervalo.
+# Com a colação COLACAO_BUSCA (sem distinção de maiúsculas e acentos),
+#       o intervalo usa o índice, ao contrário de um $regex sem âncora.
+# "\uffff" é o último caractere na ordem da colação.
+def intervalo_prefixo(texto):
+
+    return {"$gte": texto, "$lt": texto + "\uffff"}
+
+
+# Função para converter o começo de um _id (texto hexadecimal) no
+#       intervalo de ObjectIds que começam com ele.
+# Retorna None se o texto não puder ser o começo de um ObjectId.
+def intervalo_prefixo_id(texto):
+
+    texto = texto.lower()
+
+    if len(texto) > 24 or any(c not in "0123456789abcdef" for c in texto):
+        return None
+
+    intervalo = {"$gte": ObjectId(texto.ljust(24, "0"))}
+
+    # O próximo prefixo (ex.: "65a" -> "65b") é o limite superior; um
+    #       prefixo só com "f" não tem próximo.
+    if texto.strip("f"):
+        proximo = format(int(texto, 16) + 1, f"0{len(texto)}x")
+        intervalo["$lt"] = ObjectId(proximo.ljust(24, "0"))
+
+    return intervalo
+
+
+# Função para traduzir os textos dos filtros da tela de reservas em uma
+#       consulta indexada.
+# filtros: {coluna: texto digitado}; sessoes_map: {id da sessão: texto}.
+# Cada coluna filtra pelo começo do valor, sem distinção de maiúsculas e
+#       acentos; a coluna "sessao" é resolvida primeiro na lista de sessões
+#       (pequena) e vira uma busca pelos IDs das sessões que contêm o texto.
+# Retorna None quando nenhuma reserva pode atender aos filtros.
+def montar_filtro_reservas(filtros, sessoes_map):
+
+    consulta = {}
+
+    id_texto = filtros.get("_id", "").strip()
+
+    if id_texto:
+
+        intervalo = intervalo_prefixo_id(id_texto)
+
+        if intervalo is None:
+            return None
+
+        consulta["_id"] = intervalo
+
+    sessao_texto = filtros.get("sessao", "").strip().lower()
+
+    if sessao_texto:
+        consulta["sessao_id"] = {"$in": [ObjectId(sid) for sid, texto in sessoes_map.items()
+                                         if sessao_texto in texto.lower()]}
+
+    # O filtro de assentos usa o primeiro assento digitado; $elemMatch
+    #       garante que o mesmo assento atenda aos dois limites do intervalo.
+    assento_texto = filtros.get("assentos", "").split(",")[0].strip()
+
+    if assento_texto:
+        consulta["assentos_reservados"] = {"$elemMatch": intervalo_prefixo(assento_texto)}
+
+    for coluna, campo in (("cliente_nome", "cliente.nome"),
+                          ("cliente_telefone", "cliente.telefone")):
+
+        texto = filtros.get(coluna, "").strip()
+
+        if texto:
+            consulta[campo] = intervalo_prefixo(texto)
+
+    return consulta
+
+
+# Função para buscar um lote de reservas da grade, em ordem de _id.
+# apos_id: último _id do lote anterior (paginação por chave, que não
+#       relê as reservas já exibidas como faria um skip()).
+# A colação dos índices de busca só é aplicada quando há filtro por prefixo
+#       de texto (nome, telefone ou assento), para que esses índices sejam
+#       usados; sem ele, a consulta fica na colação padrão e o índice de
+#       _id atende ao filtro de paginação e à ordenação.
+def buscar_lote_reservas(db, consulta, apos_id=None, limite=TAMANHO_LOTE_RESERVAS):
+
+    usar_colacao = any(campo in consulta for campo in CAMPOS_PREFIXO_RESERVAS)
+
+    if apos_id is not None:
+        consulta = {"$and": [consulta, {"_id": {"$gt": apos_id}}]}
+
+    cursor = db.reservas.find(consulta, CAMPOS_GRADE_RESERVAS).sort("_id", 1).limit(limite)
+
+    if usar_colacao:
+        cursor = cursor.collation(COLACAO_BUSCA)
+
+    return list(cursor)
+
+
 # Função para deletar uma reserva específica da coleção 'reservas'.
 def deletar_reserva(db, reserva_id):
 
@@ -3630,7 +4438,14 @@ def deletar_reserva(db, reserva_id):
     # O documento a ser removido é identificado pelo '_id', que é
     #       convertido de uma string para ObjectId.
     # Isso garante que o documento correto seja identificado e removido.
-    db.reservas.delete_one({"_id": ObjectId(reserva_id)})
+    # find_one_and_delete() devolve a reserva removida, cuja sessão tem
+    #       o índice de ocupação invalidado.
+    removida = db.reservas.find_one_and_delete({"_id": ObjectId(reserva_id)},
+                                               projection={"sessao_id": 1})
+
+    if removida:
+        liberar_assentos(db, removida["_id"])
+        invalidar_indice_assentos(removida["sessao_id"])
 
 
 # ============================================================
@@ -3737,10 +4552,8 @@ def tela_gerenciar_reservas(root, db):
     #       preencher o espaço disponível entre o topo e o fundo do container
     scrollbar.grid(row=2, column=5, sticky="ns")
 
-    # configure: Configura a Treeview para interagir com a scrollbar
-    # yscrollcommand=scrollbar.set: Define o comando que será chamado
-    #       pela Treeview quando a scrollbar for movida
-    tree.configure(yscrollcommand=scrollbar.set)
+    # A Treeview é ligada à scrollbar mais abaixo, por `ao_rolar_tabela`,
+    #       que também carrega o próximo lote de reservas.
 
     # frame_filtros: Cria um frame para conter os campos de filtro
     # ttk.Frame: Utiliza o widget Frame do ttk para a criação de
@@ -3806,83 +4619,119 @@ def tela_gerenciar_reservas(root, db):
         entradas_filtro[col] = ttk.Entry(frame_filtros, textvariable=filtros[col])
         entradas_filtro[col].grid(row=1, column=i, padx=5, sticky="ew")
 
-    # Variável global reservas_cache para armazenar temporariamente as reservas
-    # reservas_cache: Lista vazia inicializada para armazenar os dados das
-    #       reservas carregadas ou manipuladas durante a sessão
-    reservas_cache = []
+    # Estado da grade de reservas:
+    # "sessoes_map": textos das sessões, por ID (exibição e filtro de sessão);
+    # "consulta": consulta do filtro atual (None: nenhuma reserva atende);
+    # "ultimo_id": _id da última reserva carregada;
+    # "fim": todas as reservas do filtro já foram carregadas;
+    # "carregando": um lote está sendo carregado;
+    # "agendamento": filtro aguardando o fim da digitação (janela.after);
+    # "lote_agendado": já há um carregar_lote na fila do Tkinter.
+    estado_grade = {"sessoes_map": obter_sessoes_map(db)[1], "consulta": None,
+                    "ultimo_id": None, "fim": True, "carregando": False,
+                    "agendamento": None, "lote_agendado": False}
+
+    # Rótulo com a quantidade de reservas carregadas na grade.
+    lbl_status = ttk.Label(frame_principal, text="")
+    lbl_status.grid(row=4, column=1, columnspan=4, sticky="w")
+
+
+    # Carrega o próximo lote do filtro atual e o acrescenta ao TreeView.
+    def carregar_lote():
+
+        estado_grade["lote_agendado"] = False
+
+        # Nada a carregar: resultado completo ou um lote já em carregamento.
+        if estado_grade["fim"] or estado_grade["carregando"]:
+            return
+
+        estado_grade["carregando"] = True
+
+        try:
+
+            lote = buscar_lote_reservas(db, estado_grade["consulta"], estado_grade["ultimo_id"])
+
+            for r in lote:
+
+                cliente = r.get("cliente", {})
+
+                tree.insert("", "end", values=(
+                    str(r["_id"]),  # ID da reserva
+                    estado_grade["sessoes_map"].get(str(r["sessao_id"]), "Sessão desconhecida"),
+                    ",".join(r.get("assentos_reservados", [])),  # Assentos separados por vírgulas
+                    cliente.get("nome", ""),  # Nome do cliente
+                    cliente.get("telefone", ""),  # Telefone do cliente
+                ))
+
+            if lote:
+                estado_grade["ultimo_id"] = lote[-1]["_id"]
+
+            estado_grade["fim"] = len(lote) < TAMANHO_LOTE_RESERVAS
+
+        finally:
+            estado_grade["carregando"] = False
+
+        lbl_status.config(text=f"{len(tree.get_children())} reserva(s) carregada(s)"
+                               + ("" if estado_grade["fim"] else " - role para ver mais"))
 
 
     def carregar_reservas():
 
         # Descrição da função para carregar as reservas
-        """Carrega as reservas do banco e as insere no TreeView."""
+        """Recarrega o TreeView com o filtro atual, a partir do primeiro lote."""
 
-        # A palavra-chave nonlocal é usada para trabalhar com a variável
-        #       reservas_cache que é definida fora desta função.
-        nonlocal reservas_cache
+        # Cancela um filtro ainda aguardando o fim da digitação.
+        if estado_grade["agendamento"]:
+            janela.after_cancel(estado_grade["agendamento"])
+            estado_grade["agendamento"] = None
 
-        # Limpa a lista reservas_cache para garantir que apenas as
-        #       reservas atualizadas estejam na cache.
-        reservas_cache.clear()
+        # Remove todos os itens existentes no TreeView de uma vez.
+        tree.delete(*tree.get_children())
 
-        # Loop para remover todos os itens existentes no TreeView,
-        #       garantindo que não haja duplicação de dados ao recarregar.
-        for i in tree.get_children():
-            tree.delete(i)
+        # Traduz os filtros digitados em uma consulta indexada.
+        consulta = montar_filtro_reservas({col: filtros[col].get() for col in colunas},
+                                          estado_grade["sessoes_map"])
 
-        # Obtém um mapeamento dos IDs das sessões para seus textos
-        #       descritivos para exibição amigável no TreeView.
-        sessoes_map = obter_sessoes_map(db)[1]
+        estado_grade.update(consulta=consulta, ultimo_id=None, fim=consulta is None)
 
-        # Busca todas as reservas no banco de dados e itera sobre cada uma.
-        for r in obter_reservas(db):
+        if consulta is None:
+            lbl_status.config(text="0 reserva(s) carregada(s)")
+            return
 
-            # Busca o texto descritivo da sessão usando o ID da sessão da
-            #       reserva, se não encontrado, usa "Sessão desconhecida".
-            sessao_texto = sessoes_map.get(str(r["sessao_id"]), "Sessão desconhecida")
+        carregar_lote()
 
-            # Compila os valores da reserva em uma tupla para inserção no TreeView.
-            valores = (
-                str(r["_id"]),  # ID da reserva
-                sessao_texto,  # Texto descritivo da sessão
-                ",".join(r["assentos_reservados"]),  # Assentos reservados, listados e separados por vírgulas
-                r["cliente"]["nome"],  # Nome do cliente
-                r["cliente"]["telefone"],  # Telefone do cliente
-            )
 
-            # Adiciona a tupla de valores ao cache de reservas.
-            reservas_cache.append(valores)
+    # Recebe as mudanças de posição da tabela (`yscrollcommand`).
+    # Atualiza a scrollbar e, quando a parte visível chega perto do fim
+    #       das linhas carregadas, agenda o próximo lote.
+    # Cada lote inserido dispara esta função de novo; "lote_agendado" deixa
+    #       no máximo um lote na fila, para não empilhar lotes não pedidos.
+    def ao_rolar_tabela(primeiro, ultimo):
 
-            # Insere a reserva no TreeView.
-            tree.insert("", "end", values=valores)
+        scrollbar.set(primeiro, ultimo)
 
+        if float(ultimo) >= 0.9 and not estado_grade["fim"] and not estado_grade["lote_agendado"]:
+            estado_grade["lote_agendado"] = True
+            janela.after_idle(carregar_lote)
 
+    tree.configure(yscrollcommand=ao_rolar_tabela)
 
+
+    # Aplica os filtros só depois de ATRASO_FILTRO_MS sem digitação, para
+    #       não consultar o banco a cada tecla.
     def aplicar_filtros(event=None):
 
-        # Descrição da função para aplicar filtros
-        """Aplica os filtros dinamicamente no TreeView."""
+        if estado_grade["agendamento"]:
+            janela.after_cancel(estado_grade["agendamento"])
 
-        # Loop para remover todos os itens existentes no TreeView
-        #       antes de aplicar os filtros.
-        for i in tree.get_children():
-            tree.delete(i)
+        estado_grade["agendamento"] = janela.after(ATRASO_FILTRO_MS, carregar_reservas)
 
-        # Itera sobre cada reserva armazenada no cache
-        for reserva in reservas_cache:
 
-            # Aplica os filtros dinamicamente:
-            # Utiliza uma compreensão de lista para verificar se todos os filtros
-            #       especificados estão presentes nos valores da reserva.
-            # `filtros[col].get().lower()` obtém o valor do filtro para a coluna,
-            #       convertido para minúsculas, para comparação insensível a maiúsculas.
-            # `reserva[idx].lower()` obtém o valor correspondente da reserva, também em minúsculas.
-            # `enumerate(colunas)` é usado para obter o índice e o nome da coluna ao
-            #       mesmo tempo, permitindo acessar o valor correto na reserva.
-            if all(filtros[col].get().lower() in reserva[idx].lower() for idx, col in enumerate(colunas)):
+    # Recarrega também os textos das sessões (botão "Recarregar").
+    def recarregar():
 
-                # Se todos os filtros correspondem, insere a reserva no TreeView.
-                tree.insert("", "end", values=reserva)
+        estado_grade["sessoes_map"] = obter_sessoes_map(db)[1]
+        carregar_reservas()
 
     # Associar o evento de filtro ao KeyRelease
     for col in colunas:
@@ -3890,8 +4739,8 @@ def tela_gerenciar_reservas(root, db):
         # Associa o evento de liberação de tecla ao campo de entrada
         #       para cada coluna de filtro
         # <KeyRelease> é um evento que ocorre quando uma tecla é solta
-        # aplicar_filtros é chamado sempre que uma tecla é liberada, atualizando os
-        #       itens visíveis baseados no filtro de entrada
+        # aplicar_filtros agenda a consulta, que só é feita quando a
+        #       digitação para por ATRASO_FILTRO_MS
         entradas_filtro[col].bind("<KeyRelease>", aplicar_filtros)
 
 
@@ -4022,30 +4871,11 @@ def tela_gerenciar_reservas(root, db):
 
         """Carrega as sessões no combobox de edição."""
 
-        # Chama a função obter_sessoes para buscar todas as sessões
-        #       armazenadas no banco de dados.
-        sessoes = obter_sessoes(db)
-
-        # Inicializa uma lista vazia para armazenar os mapeamentos
-        #       entre ID da sessão e sua descrição formatada.
-        sessoes_map = []
-
-        # Itera sobre cada sessão obtida da base de dados.
-        for sessao in sessoes:
-
-            # Busca o filme correspondente ao ID do filme da sessão atual.
-            filme = obter_filme_por_id(db, sessao["filme_id"])
-
-            # Busca a sala correspondente ao ID da sala da sessão atual.
-            sala = obter_sala_por_id(db, sessao["sala_id"])
-
-            # Formata a descrição da sessão para incluir título do
-            #       filme, data, hora e nome da sala.
-            texto_sessao = f"{filme['titulo']} - {sessao['data']} {sessao['hora']} ({sala['nome']})"
-
-            # Adiciona uma tupla contendo o ID da sessão e sua
-            #       descrição formatada à lista sessoes_map.
-            sessoes_map.append((str(sessao["_id"]), texto_sessao))
+        # obter_sessoes_map(db)[1]: Mapeia o ID de cada sessão para sua
+        #       descrição (título do filme, data, hora e nome da sala),
+        #       montada com uma única consulta ao banco de dados.
+        # A lista contém tuplas (ID da sessão, descrição formatada).
+        sessoes_map = list(obter_sessoes_map(db)[1].items())
 
         # Armazena o mapeamento entre ID da sessão e descrição no
         #       atributo values_map do combobox.
@@ -4302,14 +5132,14 @@ def tela_gerenciar_reservas(root, db):
     # ttk.Button: Cria um botão para recarregar as reservas exibidas no Treeview.
     # frame_principal: Define o botão como filho do frame principal.
     # text="Recarregar": Define o texto exibido no botão como "Recarregar".
-    # command=carregar_reservas: Associa o botão à função `carregar_reservas`, que
-    #       será executada ao clicar no botão. Essa função recarrega os
-    #       dados das reservas no Treeview.
+    # command=recarregar: Associa o botão à função `recarregar`, que
+    #       será executada ao clicar no botão. Essa função recarrega as
+    #       sessões e os dados das reservas no Treeview.
     # grid: Posiciona o botão no layout da grade (row=4, column=0).
     # pady=10: Adiciona um espaçamento vertical de 10 pixels ao redor do botão.
     ttk.Button(frame_principal,
                text="Recarregar",
-               command=carregar_reservas).grid(row=4, column=0, pady=10)
+               command=recarregar).grid(row=4, column=0, pady=10)
 
 
 # ============================================================
@@ -4761,6 +5591,106 @@ def tela_relatorio_lucro(root, db):
 
 
 
+# ============================================================
+# TESTE DE CONCORRÊNCIA DAS RESERVAS DE ASSENTOS
+# ============================================================
+
+# Simula várias bilheterias vendendo a mesma sessão ao mesmo tempo.
+# Cada thread tenta reservar repetidamente grupos aleatórios de
+#       assentos; ao final, verifica que nenhum assento foi vendido
+#       duas vezes e exibe a vazão de reservas.
+# A sessão de teste é montada em 'nome_banco', apagado quando o teste termina.
+# Execução: python "Sistema+de+Reserva+de+Cinema.py" --teste-concorrencia
+def executar_teste_concorrencia_assentos(uri="mongodb://localhost:27017/",
+                                         nome_banco="cinema_db_teste_concorrencia",
+                                         bilheterias=16,
+                                         tentativas_por_bilheteria=50,
+                                         fileiras=10,
+                                         assentos_por_fileira=12):
+
+    import random
+    import time
+
+    cliente_teste = MongoClient(uri)
+    cliente_teste.drop_database(nome_banco)
+    db_teste = cliente_teste[nome_banco]
+
+    try:
+
+        # Mesmos índices do banco real, incluindo o índice único dos assentos.
+        aplicar_indices(db_teste, "projeto07")
+
+        sala_id = cadastrar_sala(db_teste, "Sala Teste", fileiras, assentos_por_fileira, "Normal").inserted_id
+        filme_id = cadastrar_filme(db_teste, "Filme Teste", 120, "Livre", "Teste", "").inserted_id
+        sessao_id = db_teste.sessoes.insert_one({"filme_id": filme_id, "sala_id": sala_id,
+                                                 "data": "01/01/2030", "hora": "20:00",
+                                                 "valor_ingresso": 20.0}).inserted_id
+
+        todos_assentos = gerar_identificadores_assentos(fileiras, assentos_por_fileira)
+
+        # Contadores compartilhados entre as threads.
+        resultado = {"vendidas": 0, "recusadas": 0, "erros": 0}
+        trava = threading.Lock()
+
+        # Rotina de uma bilheteria: tenta vender grupos de 1 a 4 assentos.
+        def bilheteria(numero):
+
+            for _ in range(tentativas_por_bilheteria):
+
+                grupo = random.sample(todos_assentos, random.randint(1, 4))
+
+                try:
+                    reservar_assentos(db_teste, sessao_id, grupo, f"Cliente {numero}", "0000-0000")
+                    chave = "vendidas"
+                except ValueError:
+                    chave = "recusadas"
+                except Exception:
+                    chave = "erros"
+
+                with trava:
+                    resultado[chave] += 1
+
+        threads = [threading.Thread(target=bilheteria, args=(n,)) for n in range(bilheterias)]
+
+        inicio = time.perf_counter()
+
+        for t in threads:
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        duracao = time.perf_counter() - inicio
+
+        # Verificação: cada assento aparece em no máximo uma reserva.
+        contagem = {}
+
+        for reserva in db_teste.reservas.find({"sessao_id": sessao_id}, {"assentos_reservados": 1}):
+            for a in reserva["assentos_reservados"]:
+                contagem[a] = contagem.get(a, 0) + 1
+
+        vendidos_duas_vezes = sorted(a for a, n in contagem.items() if n > 1)
+
+        # A coleção de ocupação deve coincidir com as reservas gravadas.
+        ocupados = db_teste.ocupacao_assentos.count_documents({"sessao_id": sessao_id})
+
+        total = resultado["vendidas"] + resultado["recusadas"] + resultado["erros"]
+
+        print(f"Bilheterias: {bilheterias} | Tentativas: {total} | Tempo: {duracao:.2f} s")
+        print(f"Reservas concluídas: {resultado['vendidas']} | Recusadas por conflito: "
+              f"{resultado['recusadas']} | Erros: {resultado['erros']}")
+        print(f"Vazão: {total / duracao:.1f} tentativas/s")
+        print(f"Assentos vendidos: {len(contagem)} | Assentos na coleção de ocupação: {ocupados}")
+
+        if vendidos_duas_vezes or ocupados != len(contagem):
+            print("FALHA: assentos vendidos mais de uma vez: " + ", ".join(vendidos_duas_vezes))
+            return False
+
+        print("OK: nenhum assento foi vendido mais de uma vez.")
+        return True
+
+    finally:
+        cliente_teste.drop_database(nome_banco)
 
 
 # ============================================================
@@ -4774,9 +5704,6 @@ if __name__ == "__main__":
     Abaixo está a configuração para conexão com o MongoDB.
     """
 
-    # Importa o cliente do MongoDB.
-    from pymongo import MongoClient
-
     # Configurar conexão com o MongoDB.
     try:
 
@@ -4794,6 +5721,22 @@ if __name__ == "__main__":
         print(f"Erro ao conectar ao MongoDB: {e}")
         exit(1)
 
+    # Executa apenas o teste de concorrência das reservas, sem abrir a interface.
+    if "--teste-concorrencia" in sys.argv:
+        sys.exit(0 if executar_teste_concorrencia_assentos() else 1)
+
+    # Executa apenas o benchmark da geração de ingressos, sem abrir a interface.
+    if "--benchmark-ingressos" in sys.argv:
+        executar_benchmark_ingressos()
+        sys.exit(0)
+
+    # Cria os índices declarados no manifesto para este sistema.
+    aplicar_indices(db, "projeto07")
+
+    # Preenche a coleção de ocupação de assentos a partir das reservas
+    #       existentes, caso o banco seja anterior a ela.
+    migrar_ocupacao_assentos(db)
+
     # Criação da janela principal
     root = tk.Tk()
 
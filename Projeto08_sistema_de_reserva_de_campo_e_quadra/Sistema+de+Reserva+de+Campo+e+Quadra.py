@@ -17,12 +17,33 @@ from tkcalendar import Calendar, DateEntry
 from datetime import datetime, timedelta
 
 # Importa a biblioteca pymongo para trabalhar com bancos de dados MongoDB
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+
+# Importa a exceção das operações em lote, usada para saber quais datas não
+#       puderam ser reservadas na agenda dos lugares
+from pymongo.errors import BulkWriteError
+
+# Importa os módulos threading e random, usados pelo teste de concorrência das reservas
+import random
+import threading
+
+import os
+import sys
+
+# Da raiz do repositório vêm o manifesto de índices e a baixa de estoque dos
+#       itens consumidos, cujo limite de pendência vale também para a agenda.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indices_mongodb import aplicar_indices
+from estoque_mongodb import (esquema_estoque, baixar_estoque, devolver_baixa, confirmar_baixa,
+                             recuperar_baixas_pendentes, limite_pendencia)
 
 # Importa a classe ObjectId, que é usada no MongoDB para
 #       identificar documentos de forma única
 from bson import ObjectId
 
+# Importa o tipo Int64, que garante inteiros de 64 bits nos mapas de minutos da agenda
+from bson.int64 import Int64
+
 # Importa a biblioteca pandas para trabalhar com dados tabulares, como planilhas
 import pandas as pd
 from xlsxwriter.utility import quote_sheetname
@@ -31,6 +52,31 @@ from xlsxwriter.utility import quote_sheetname
 #                             LÓGICA DE NEGÓCIO                               #
 ###############################################################################
 
+# Agenda dos lugares: um documento por lugar e dia na coleção
+#       'agenda_lugares' (índice único em lugar_id + data), com um inteiro de
+#       64 bits por hora do dia ("h00" a "h23") em que o bit N indica que o
+#       minuto N daquela hora está reservado.
+# Reservar um horário é um único update condicional: os bits só são ligados
+#       se todos ainda estiverem livres ('$bitsAllClear'), então dois
+#       atendentes nunca conseguem reservar o mesmo minuto.
+# O mesmo update registra a reivindicação em 'reivindicacoes' (ID da reserva
+#       e horário) até a reserva ser gravada; reivindicações antigas sem
+#       reserva gravada são liberadas ao iniciar o sistema.
+CAMPOS_AGENDA = [f"h{hora:02d}" for hora in range(24)]
+
+# Máscara com os 60 minutos de uma hora.
+MINUTOS_DA_HORA = (1 << 60) - 1
+
+# Código de erro do MongoDB para chave duplicada.
+CODIGO_CHAVE_DUPLICADA = 11000
+
+# Limite de ocorrências de uma reserva recorrente.
+MAX_OCORRENCIAS_RECORRENCIA = 366
+
+# Campos do estoque dos produtos para o módulo `estoque_mongodb`: cada baixa
+#       pendente guarda o ID da reserva que consumiu o item.
+ESQUEMA_ESTOQUE = esquema_estoque(quantidade="estoque", id_marca="reserva_id")
+
 """
     Classe principal que gerencia a lógica e operações do sistema.
     Esta classe centraliza a conexão com o banco de dados 
@@ -45,7 +91,7 @@ class ReservaQuadra:
         Este método é usado para configurar a conexão com o banco de dados MongoDB e
         definir a coleção principal que será usada no sistema.
      """
-    def __init__(self):
+    def __init__(self, nome_banco="sistema_completo_db"):
 
         # Estabelece a conexão com o servidor MongoDB local.
         # "MongoClient" é uma classe fornecida pelo pymongo que gerencia a
@@ -59,7 +105,7 @@ class ReservaQuadra:
         # Neste caso, "sistema_completo_db" é o nome do banco de dados
         #       onde todos os dados do sistema serão armazenados.
         # Se o banco não existir, ele será criado automaticamente ao inserir dados.
-        self.banco = self.conexao["sistema_completo_db"]
+        self.banco = self.conexao[nome_banco]
 
         # Define as coleções que serão usadas no banco de dados.
         # No MongoDB, coleções são como "tabelas" em bancos de
@@ -95,6 +141,21 @@ class ReservaQuadra:
         #                                      disponibilidade, entre outros.
         self.colecao_lugares = self.banco["lugares"]
 
+        # Coleção com a agenda de minutos reservados de cada lugar por dia.
+        self.colecao_agenda = self.banco["agenda_lugares"]
+
+        # Cria os índices declarados no manifesto para este sistema.
+        aplicar_indices(self.banco, "projeto08")
+
+        # Conclui ou desfaz baixas de estoque e reivindicações da agenda interrompidas.
+        self.recuperar_baixas_pendentes()
+        self.recuperar_reivindicacoes_agenda()
+
+        # Na primeira execução com reservas já gravadas, monta a agenda.
+        if self.colecao_agenda.estimated_document_count() == 0 and \
+                self.colecao_reservas.estimated_document_count() > 0:
+            self.reconstruir_agenda()
+
 
     """
             Retorna todas as reservas que correspondem ao filtro especificado.
@@ -200,164 +261,340 @@ class ReservaQuadra:
             return list(self.colecao_reservas.find(filtro))
 
 
+    # Converte um intervalo "HH:MM"-"HH:MM" nas máscaras de minutos da
+    #       agenda: {"h10": bits, "h11": bits, ...}. O minuto final não é incluído.
+    def mascaras_horario(self, hora_inicial, hora_final):
+
+        try:
+
+            hi_h, hi_m = map(int, hora_inicial.split(":"))
+            hf_h, hf_m = map(int, hora_final.split(":"))
+
+        except ValueError:
+
+            raise ValueError("Formato de hora inválido. Use HH:MM.")
+
+        if not (0 <= hi_m < 60 and 0 <= hf_m < 60):
+            raise ValueError("Formato de hora inválido. Use HH:MM.")
+
+        inicio = hi_h * 60 + hi_m
+        fim = hf_h * 60 + hf_m
+
+        if inicio >= fim:
+            raise ValueError("Hora final deve ser maior que a hora inicial.")
+
+        if inicio < 0 or fim > 24 * 60:
+            raise ValueError("O horário deve estar entre 00:00 e 24:00.")
+
+        mascaras = {}
+
+        for minuto in range(inicio, fim):
+
+            campo = CAMPOS_AGENDA[minuto // 60]
+            mascaras[campo] = mascaras.get(campo, 0) | (1 << (minuto % 60))
+
+        return mascaras
+
+
+    # Monta o filtro e a atualização que reservam os minutos de um
+    #       intervalo na agenda do lugar/dia (usados com upsert=True).
+    # O filtro só casa se todos os minutos estiverem livres ('$bitsAllClear').
+    #       Se a agenda do dia ainda não existir, ela é criada já com os
+    #       minutos reservados; se existir com algum minuto ocupado, a criação
+    #       esbarra no índice único (lugar_id, data) e gera chave duplicada.
+    # 'reivindicacao' ({"reserva_id", "hora_inicial", "hora_final"}) fica
+    #       registrada na agenda junto com os minutos até a reserva ser gravada.
+    def atualizacao_reservar_horario(self, lugar_id, data_reserva, mascaras, reivindicacao):
+
+        filtro = {"lugar_id": ObjectId(lugar_id), "data": data_reserva}
+
+        for campo, mascara in mascaras.items():
+            filtro[campo] = {"$bitsAllClear": [bit for bit in range(60) if mascara >> bit & 1]}
+
+        atualizacao = {"$bit": {campo: {"or": Int64(mascara)} for campo, mascara in mascaras.items()},
+                       "$push": {"reivindicacoes": reivindicacao}}
+
+        # Demais horas do dia, livres, para a agenda criada agora.
+        livres = {campo: Int64(0) for campo in CAMPOS_AGENDA if campo not in mascaras}
+
+        if livres:
+            atualizacao["$setOnInsert"] = livres
+
+        return filtro, atualizacao
+
+
+    # Reserva o mesmo intervalo na agenda do lugar em várias datas, com um
+    #       único bulk_write. Retorna a lista das datas recusadas por já
+    #       terem algum minuto reservado (as demais ficam reservadas).
+    # 'reservas_ids' traz o ID da reserva de cada data ({data: ObjectId}),
+    #       registrado como reivindicação até confirmar_reivindicacoes().
+    def reservar_horarios(self, lugar_id, datas, hora_inicial, hora_final, reservas_ids):
+
+        mascaras = self.mascaras_horario(hora_inicial, hora_final)
+
+        pendentes = list(datas)
+        reservadas = []
+
+        # A segunda rodada repete só as datas que colidiram na criação
+        #       simultânea da agenda do dia por outro atendimento; se
+        #       colidirem de novo, o horário está mesmo ocupado.
+        for _ in range(2):
+
+            if not pendentes:
+                break
+
+            try:
+
+                self.colecao_agenda.bulk_write([
+                    UpdateOne(*self.atualizacao_reservar_horario(
+                        lugar_id, data, mascaras,
+                        {"reserva_id": reservas_ids[data], "hora_inicial": hora_inicial,
+                         "hora_final": hora_final}
+                    ), upsert=True)
+                    for data in pendentes
+                ], ordered=False)
+
+                reservadas += pendentes
+                pendentes = []
+
+            except BulkWriteError as e:
+
+                erros = e.details["writeErrors"]
+                falhas = {erro["index"] for erro in erros}
+
+                reservadas += [data for i, data in enumerate(pendentes) if i not in falhas]
+
+                # Falha que não é conflito de horário: desfaz o que foi reservado.
+                if any(erro["code"] != CODIGO_CHAVE_DUPLICADA for erro in erros):
+
+                    for data in reservadas:
+                        self.liberar_horario(lugar_id, data, hora_inicial, hora_final,
+                                             reservas_ids[data])
+
+                    raise
+
+                pendentes = [pendentes[i] for i in sorted(falhas)]
+
+        return pendentes
+
+
+    # Reserva os minutos de um intervalo na agenda do lugar/dia.
+    # Retorna True se todos estavam livres (e agora estão reservados), ou
+    #       False se algum já estava reservado (nada é alterado).
+    def reservar_horario(self, lugar_id, data_reserva, hora_inicial, hora_final, reserva_id):
+
+        return not self.reservar_horarios(lugar_id, [data_reserva], hora_inicial, hora_final,
+                                          {data_reserva: reserva_id})
+
+
+    # Libera os minutos de um intervalo na agenda do lugar/dia.
+    # Com 'reserva_id', retira também a reivindicação da reserva não gravada.
+    def liberar_horario(self, lugar_id, data_reserva, hora_inicial, hora_final, reserva_id=None):
+
+        mascaras = self.mascaras_horario(hora_inicial, hora_final)
+
+        atualizacao = {"$bit": {campo: {"and": Int64(MINUTOS_DA_HORA & ~mascara)}
+                                for campo, mascara in mascaras.items()}}
+
+        if reserva_id is not None:
+            atualizacao["$pull"] = {"reivindicacoes": {"reserva_id": reserva_id}}
+
+        self.colecao_agenda.update_one(
+            {"lugar_id": ObjectId(lugar_id), "data": data_reserva},
+            atualizacao
+        )
+
+
+    # Reservas gravadas: retira da agenda do lugar as suas reivindicações.
+    def confirmar_reivindicacoes(self, lugar_id, reservas_ids):
+
+        self.colecao_agenda.update_many(
+            {"lugar_id": ObjectId(lugar_id), "reivindicacoes.reserva_id": {"$in": reservas_ids}},
+            {"$pull": {"reivindicacoes": {"reserva_id": {"$in": reservas_ids}}}}
+        )
+
+
+    # Recupera reivindicações da agenda interrompidas (ex.: queda do sistema
+    #       entre reservar os minutos e gravar a reserva). Reivindicações
+    #       anteriores a limite_pendencia() (pela data do ID da reserva),
+    #       o mesmo prazo das baixas de estoque, são apenas retiradas se a reserva foi gravada, ou têm
+    #       os minutos liberados se não foi.
+    def recuperar_reivindicacoes_agenda(self):
+
+        limite = limite_pendencia()
+
+        operacoes = []
+
+        for agenda in self.colecao_agenda.find({"reivindicacoes.reserva_id": {"$lt": limite}},
+                                               {"reivindicacoes": 1}):
+
+            antigas = [r for r in agenda["reivindicacoes"] if r["reserva_id"] < limite]
+
+            gravadas = {r["_id"] for r in self.colecao_reservas.find(
+                {"_id": {"$in": [r["reserva_id"] for r in antigas]}}, {"_id": 1})}
+
+            for reivindicacao in antigas:
+
+                atualizacao = {"$pull": {"reivindicacoes": {"reserva_id": reivindicacao["reserva_id"]}}}
+
+                if reivindicacao["reserva_id"] not in gravadas:
+
+                    mascaras = self.mascaras_horario(reivindicacao["hora_inicial"],
+                                                     reivindicacao["hora_final"])
+
+                    atualizacao["$bit"] = {campo: {"and": Int64(MINUTOS_DA_HORA & ~mascara)}
+                                           for campo, mascara in mascaras.items()}
+
+                operacoes.append(UpdateOne({"_id": agenda["_id"],
+                                            "reivindicacoes.reserva_id": reivindicacao["reserva_id"]},
+                                           atualizacao))
+
+        if operacoes:
+            self.colecao_agenda.bulk_write(operacoes, ordered=False)
+
+
+    # Refaz toda a agenda a partir das reservas gravadas.
+    # Reservas com horário inválido são ignoradas.
+    def reconstruir_agenda(self):
+
+        agendas = {}
+
+        for reserva in self.colecao_reservas.find({}, {"lugar_id": 1, "data": 1,
+                                                       "hora_inicial": 1, "hora_final": 1}):
+
+            try:
+                mascaras = self.mascaras_horario(reserva["hora_inicial"], reserva["hora_final"])
+            except (KeyError, AttributeError, ValueError):
+                continue
+
+            agenda = agendas.setdefault((reserva.get("lugar_id"), reserva.get("data")),
+                                        {campo: 0 for campo in CAMPOS_AGENDA})
+
+            for campo, mascara in mascaras.items():
+                agenda[campo] |= mascara
+
+        self.colecao_agenda.delete_many({})
+
+        if agendas:
+
+            self.colecao_agenda.insert_many([
+                {"lugar_id": lugar_id, "data": data,
+                 **{campo: Int64(bits) for campo, bits in agenda.items()}}
+                for (lugar_id, data), agenda in agendas.items()
+            ])
+
+
     """
             Verifica se há conflito de horário de reserva para um determinado lugar e data.
             Retorna True se houver conflito, ou False caso contrário.
+            Consulta apenas a agenda do lugar/dia (um documento, pelo índice
+            único), sem percorrer as reservas do dia.
         """
 
     def verificar_conflito(self, lugar_id, data_reserva, hora_inicial, hora_final):
 
-        # Busca no banco de dados todas as reservas existentes
-        #       para o lugar e a data fornecidos.
-        # `lugar_id` é convertido para ObjectId porque, no MongoDB, IDs
-        #       são armazenados como ObjectId.
-        # `data_reserva` filtra apenas as reservas feitas para
-        #       aquela data específica.
-        reservas_dia = self.colecao_reservas.find({
+        mascaras = self.mascaras_horario(hora_inicial, hora_final)
 
-            # ID do lugar (quadra ou espaço) que será verificado.
-            "lugar_id": ObjectId(lugar_id),
+        agenda = self.colecao_agenda.find_one({"lugar_id": ObjectId(lugar_id), "data": data_reserva},
+                                              {campo: 1 for campo in mascaras})
 
-            # Data específica da reserva que estamos verificando.
-            "data": data_reserva
+        # Sem agenda para o dia: nenhum minuto reservado.
+        if not agenda:
+            return False
 
-        })
+        # Há conflito se algum minuto do intervalo já estiver reservado.
+        return any(agenda.get(campo, 0) & mascara for campo, mascara in mascaras.items())
 
-        # Itera sobre todas as reservas encontradas para o
-        #       lugar e a data fornecidos.
-        for reserva_existente in reservas_dia:
 
-            # Recupera o horário inicial (hi) e o horário final (hf) da reserva já existente.
-            hi = reserva_existente["hora_inicial"]  # Hora inicial da reserva já cadastrada.
-            hf = reserva_existente["hora_final"]  # Hora final da reserva já cadastrada.
+    # Soma as quantidades consumidas por produto: {ObjectId do produto: quantidade}.
+    # Itens sem produto ou sem quantidade são ignorados.
+    def quantidades_por_produto(self, itens_consumidos):
 
-            # Verifica se há sobreposição de horários entre a reserva
-            #       existente e a nova reserva.
-            # Condição de conflito:
-            # - Se a hora inicial da nova reserva (hora_inicial) for menor que a
-            #       hora final da reserva existente (hf),
-            #   E a hora final da nova reserva (hora_final) for maior que a hora
-            #       inicial da reserva existente (hi).
-            if hora_inicial < hf and hora_final > hi:
+        quantidades = {}
 
-                # Conflito encontrado, retorna True imediatamente.
-                return True
+        for item in itens_consumidos:
 
-        # Se nenhuma sobreposição de horário for encontrada, retorna False.
-        return False
+            prod_id = item.get("produto_id")
+            qtd_consumida = item.get("qtd", 0)
 
+            if prod_id and qtd_consumida > 0:
+                quantidades[ObjectId(prod_id)] = quantidades.get(ObjectId(prod_id), 0) + qtd_consumida
 
-    def abater_estoque_itens(self, itens_consumidos):
+        return quantidades
 
-        # Itera sobre a lista de itens consumidos para processar cada produto.
-        for item in itens_consumidos:
 
-            # Obtém o ID do produto a partir do item consumido.
-            prod_id = item.get("produto_id")
+    # Abate o estoque dos itens consumidos em uma reserva (tudo ou nada).
+    # Cada baixa fica marcada no produto com o ID da reserva até a reserva
+    #       ser gravada (ver `estoque_mongodb`). Se algum produto não tiver
+    #       estoque, nada é alterado e levanta ValueError.
+    # Retorna as quantidades abatidas por produto.
+    def abater_estoque_itens(self, itens_consumidos, reserva_id):
 
-            # Obtém a quantidade consumida do item. Se não
-            #       especificado, usa o valor padrão 0.
-            qtd_consumida = item.get("qtd", 0)
+        quantidades = self.quantidades_por_produto(itens_consumidos)
 
-            # Se o ID do produto não estiver presente no item,
-            #       pula para o próximo item da lista.
-            if not prod_id:
-                continue
+        # Algum produto não tinha estoque (ou não existe): as baixas desta
+        #       reserva já foram desfeitas; informa quais itens faltaram.
+        if not baixar_estoque(self.colecao_produtos, quantidades, reserva_id, ESQUEMA_ESTOQUE):
 
-            # Busca o produto no banco de dados com base no ID do produto.
-            produto_bd = self.colecao_produtos.find_one({"_id": ObjectId(prod_id)})
-
-            # Verifica se o produto correspondente ao ID fornecido foi
-            #       encontrado no banco de dados.
-            # Isso garante que o sistema está tentando processar
-            #       apenas produtos válidos.
-            if not produto_bd:
-
-                # Caso o produto não seja encontrado, o sistema lança uma
-                #       exceção informando o ID do produto ausente.
-                # Isso é importante para alertar o operador ou desenvolvedor
-                #       sobre inconsistências no banco de dados.
-                raise ValueError(f"Produto ID {prod_id} não encontrado.")
-
-            # Verifica se o estoque atual do produto é menor do que a
-            #       quantidade consumida especificada.
-            # Essa validação é crucial para evitar que o sistema permita a
-            #       reserva de itens além da capacidade disponível.
-            if produto_bd["estoque"] < qtd_consumida:
-
-                # Se o estoque for insuficiente, o sistema lança uma exceção do tipo ValueError.
-                # A mensagem da exceção inclui o nome do produto e os valores relevantes:
-                # - estoque atual (produto_bd["estoque"])
-                # - quantidade que se tentou consumir (qtd_consumida)
-                # Isso fornece informações detalhadas e claras para
-                #       identificar rapidamente o problema.
-                raise ValueError(
-                    f"Estoque insuficiente para '{produto_bd['nome']}' "
-                    f"(estoque={produto_bd['estoque']}, qtd={qtd_consumida})."
-                )
+            produtos = {p["_id"]: p for p in self.colecao_produtos.find({"_id": {"$in": list(quantidades)}},
+                                                                        {"nome": 1, "estoque": 1})}
 
-        # Se todos os itens passarem nas validações anteriores (existência
-        #       no banco e estoque suficiente),
-        #       realiza o abate do estoque para cada produto consumido.
-        for item in itens_consumidos:
+            faltando = []
 
-            # Obtém o ID do produto consumido. O campo "produto_id" deve
-            #       estar presente no item consumido.
-            prod_id = item["produto_id"]
+            for prod_id, qtd in quantidades.items():
 
-            # Obtém a quantidade consumida do item, indicada no dicionário do item.
-            qtd_consumida = item["qtd"]
+                produto_bd = produtos.get(prod_id)
 
-            # Atualiza o estoque do produto no banco de dados, utilizando a
-            #       operação "$inc" do MongoDB.
-            # A operação "$inc" decrementa o estoque do produto pelo valor
-            #       especificado em "-qtd_consumida".
-            # O filtro {"_id": ObjectId(prod_id)} garante que apenas o
-            #       produto com o ID correspondente seja atualizado.
-            self.colecao_produtos.update_one(
+                if not produto_bd:
+                    faltando.append(f"Produto ID {prod_id} não encontrado.")
 
-                # Filtra o produto pelo ID único no banco.
-                {"_id": ObjectId(prod_id)},
+                elif produto_bd.get("estoque", 0) < qtd:
+                    faltando.append(f"Estoque insuficiente para '{produto_bd['nome']}' "
+                                    f"(estoque={produto_bd.get('estoque', 0)}, qtd={qtd}).")
 
-                # Reduz o estoque pelo valor consumido.
-                {"$inc": {"estoque": -qtd_consumida}}
+            raise ValueError("\n".join(faltando) or "Estoque insuficiente.")
 
-            )
+        return quantidades
 
 
+    # Devolve ao estoque as baixas marcadas com o ID da reserva (reserva
+    #       que não chegou a ser gravada).
+    def devolver_baixa_estoque(self, quantidades, reserva_id):
 
-    def inserir_reserva(self, lugar_id, data, hora_inicial, hora_final,
-                        cliente_id, valor_reserva, itens_consumidos=None):
+        devolver_baixa(self.colecao_produtos, quantidades, reserva_id, ESQUEMA_ESTOQUE)
 
-        """
-        Método para inserir uma nova reserva no banco de dados.
 
-        Parâmetros:
-        - lugar_id: Identificador único do lugar onde será feita a reserva.
-        - data: Data da reserva no formato 'YYYY-MM-DD'.
-        - hora_inicial: Horário de início da reserva (formato 'HH:MM').
-        - hora_final: Horário de término da reserva (formato 'HH:MM').
-        - cliente_id: Identificador único do cliente que realizou a reserva.
-        - valor_reserva: Valor total da reserva calculado.
-        - itens_consumidos: Lista de itens consumidos durante a reserva (opcional).
-        """
+    # Reserva gravada: retira dos produtos as marcas de baixa pendente.
+    def confirmar_baixa_estoque(self, reserva_id):
 
-        # Verifica se a lista de itens consumidos foi fornecida.
-        # Caso não tenha sido passada, inicializa como uma lista vazia.
-        if itens_consumidos is None:
+        confirmar_baixa(self.colecao_produtos, reserva_id, ESQUEMA_ESTOQUE)
 
-            # Garante que mesmo sem itens consumidos, o código continue funcional.
-            itens_consumidos = []
 
-        # Busca no banco de dados o lugar correspondente ao ID fornecido.
-        # O método `find_one` retorna o documento correspondente
-        #       ao ID ou `None` se não encontrar.
-        lugar = self.colecao_lugares.find_one({"_id": ObjectId(lugar_id)})
+    # Recupera baixas de estoque interrompidas (ex.: queda do sistema entre a
+    #       baixa e a gravação da reserva), conferindo em `colecao_reservas`
+    #       quais reservas chegaram a ser gravadas.
+    def recuperar_baixas_pendentes(self):
 
-        # Verifica se o lugar foi encontrado no banco de dados.
-        # Caso não encontre, levanta um erro para informar que o lugar não existe.
-        if not lugar:
-            raise ValueError("Lugar não encontrado no banco de dados.")
+        recuperar_baixas_pendentes(self.colecao_produtos, self.colecao_reservas, ESQUEMA_ESTOQUE)
+
+
+    # Devolve ao estoque as quantidades dos itens consumidos de uma reserva
+    #       cancelada, com um único bulk_write.
+    def devolver_estoque_itens(self, itens_consumidos):
+
+        quantidades = self.quantidades_por_produto(itens_consumidos)
+
+        if quantidades:
+
+            self.colecao_produtos.bulk_write([
+                UpdateOne({"_id": prod_id}, {"$inc": {"estoque": qtd}})
+                for prod_id, qtd in quantidades.items()
+            ], ordered=False)
+
+
+    # Monta o documento de uma reserva (usado na reserva avulsa e na recorrente).
+    def montar_documento_reserva(self, lugar, lugar_id, data, hora_inicial, hora_final,
+                                 cliente_id, valor_reserva, itens_consumidos):
 
         # Calcula a soma total dos itens consumidos durante a reserva.
         # Para cada item na lista `itens_consumidos`, multiplica a
@@ -423,10 +660,191 @@ class ReservaQuadra:
 
         }
 
+        return doc
+
+
+    def inserir_reserva(self, lugar_id, data, hora_inicial, hora_final,
+                        cliente_id, valor_reserva, itens_consumidos=None):
+
+        """
+        Método para inserir uma nova reserva no banco de dados.
+
+        Parâmetros:
+        - lugar_id: Identificador único do lugar onde será feita a reserva.
+        - data: Data da reserva no formato 'YYYY-MM-DD'.
+        - hora_inicial: Horário de início da reserva (formato 'HH:MM').
+        - hora_final: Horário de término da reserva (formato 'HH:MM').
+        - cliente_id: Identificador único do cliente que realizou a reserva.
+        - valor_reserva: Valor total da reserva calculado.
+        - itens_consumidos: Lista de itens consumidos durante a reserva (opcional).
+        """
+
+        # Verifica se a lista de itens consumidos foi fornecida.
+        # Caso não tenha sido passada, inicializa como uma lista vazia.
+        if itens_consumidos is None:
+
+            # Garante que mesmo sem itens consumidos, o código continue funcional.
+            itens_consumidos = []
+
+        # Busca no banco de dados o lugar correspondente ao ID fornecido.
+        # O método `find_one` retorna o documento correspondente
+        #       ao ID ou `None` se não encontrar.
+        lugar = self.colecao_lugares.find_one({"_id": ObjectId(lugar_id)})
+
+        # Verifica se o lugar foi encontrado no banco de dados.
+        # Caso não encontre, levanta um erro para informar que o lugar não existe.
+        if not lugar:
+            raise ValueError("Lugar não encontrado no banco de dados.")
+
+        # ID da reserva, usado para marcar a reivindicação da agenda e as
+        #       baixas de estoque até a gravação.
+        reserva_id = ObjectId()
+
+        # Reserva os minutos na agenda do lugar/dia. Se algum já estiver
+        #       reservado (inclusive por outro atendente agora mesmo), recusa.
+        if not self.reservar_horario(lugar_id, data, hora_inicial, hora_final, reserva_id):
+            raise ValueError("Já existe reserva neste horário/lugar.")
+
+        # Abate o estoque dos itens consumidos (tudo ou nada). Sem estoque,
+        #       libera o horário e repassa o erro.
+        try:
+
+            quantidades = self.abater_estoque_itens(itens_consumidos, reserva_id)
+
+        except Exception:
+
+            self.liberar_horario(lugar_id, data, hora_inicial, hora_final, reserva_id)
+            raise
+
+        # Monta o documento da reserva.
+        doc = self.montar_documento_reserva(lugar, lugar_id, data, hora_inicial, hora_final,
+                                            cliente_id, valor_reserva, itens_consumidos)
+
+        doc["_id"] = reserva_id
+
         # Insere o dicionário `doc` como um novo documento na
         #       coleção `reservas` do MongoDB.
         # `insert_one` é usado para adicionar um único documento à coleção.
-        self.colecao_reservas.insert_one(doc)
+        # Se a gravação falhar, devolve o estoque e libera o horário.
+        try:
+
+            self.colecao_reservas.insert_one(doc)
+
+        except Exception:
+
+            self.devolver_baixa_estoque(quantidades, reserva_id)
+            self.liberar_horario(lugar_id, data, hora_inicial, hora_final, reserva_id)
+            raise
+
+        # Reserva gravada: a reivindicação da agenda e as baixas de estoque
+        #       passam a valer.
+        self.confirmar_reivindicacoes(lugar_id, [reserva_id])
+
+        if quantidades:
+            self.confirmar_baixa_estoque(reserva_id)
+
+
+    # Expande uma regra de recorrência em datas "dd/mm/aaaa": a partir de
+    #       'data_inicial', a cada 'intervalo_dias' dias (7 = semanal), até
+    #       'data_final' e/ou até completar 'ocorrencias' datas.
+    def expandir_recorrencia(self, data_inicial, data_final=None, ocorrencias=None, intervalo_dias=7):
+
+        try:
+
+            atual = datetime.strptime(data_inicial, "%d/%m/%Y")
+            fim = datetime.strptime(data_final, "%d/%m/%Y") if data_final else None
+
+        except ValueError:
+
+            raise ValueError("Data inválida. Use dd/mm/aaaa.")
+
+        if fim is None and not ocorrencias:
+            raise ValueError("Informe a data final ou o número de ocorrências.")
+
+        if intervalo_dias < 1:
+            raise ValueError("O intervalo entre as ocorrências deve ser de pelo menos 1 dia.")
+
+        datas = []
+
+        while (fim is None or atual <= fim) and (not ocorrencias or len(datas) < ocorrencias):
+
+            if len(datas) == MAX_OCORRENCIAS_RECORRENCIA:
+                raise ValueError(f"A recorrência passa de {MAX_OCORRENCIAS_RECORRENCIA} ocorrências.")
+
+            datas.append(atual.strftime("%d/%m/%Y"))
+            atual += timedelta(days=intervalo_dias)
+
+        return datas
+
+
+    # Reserva o mesmo lugar e horário em todas as datas de uma regra de
+    #       recorrência (ex.: toda terça, das 19:00 às 21:00, por uma temporada).
+    # Todas as datas são conferidas com uma única consulta à agenda, as livres
+    #       são reservadas na agenda com um único bulk_write e as reservas são
+    #       gravadas com um único insert_many.
+    # Retorna o relatório por data, na ordem da recorrência:
+    #       [{"data": "dd/mm/aaaa", "reservada": True/False, "motivo": None/texto}, ...]
+    def inserir_reservas_recorrentes(self, lugar_id, hora_inicial, hora_final, cliente_id, valor_reserva,
+                                     data_inicial, data_final=None, ocorrencias=None, intervalo_dias=7):
+
+        datas = self.expandir_recorrencia(data_inicial, data_final, ocorrencias, intervalo_dias)
+
+        mascaras = self.mascaras_horario(hora_inicial, hora_final)
+
+        lugar = self.colecao_lugares.find_one({"_id": ObjectId(lugar_id)})
+
+        if not lugar:
+            raise ValueError("Lugar não encontrado no banco de dados.")
+
+        # Motivo da recusa de cada data (None = livre).
+        motivos = {data: None for data in datas}
+
+        # Confere todas as datas com as reservas existentes em uma única consulta.
+        for agenda in self.colecao_agenda.find({"lugar_id": ObjectId(lugar_id), "data": {"$in": datas}},
+                                               {"data": 1, **{campo: 1 for campo in mascaras}}):
+
+            if any(agenda.get(campo, 0) & mascara for campo, mascara in mascaras.items()):
+                motivos[agenda["data"]] = "Já existe reserva neste horário/lugar."
+
+        livres = [data for data in datas if motivos[data] is None]
+
+        # ID de cada reserva, registrado na agenda até a gravação.
+        reservas_ids = {data: ObjectId() for data in livres}
+
+        # Reserva as datas livres na agenda; alguma pode ter sido reservada
+        #       por outro atendimento depois da consulta.
+        for data in self.reservar_horarios(lugar_id, livres, hora_inicial, hora_final, reservas_ids):
+            motivos[data] = "Reservado por outro atendimento durante a gravação."
+
+        reservadas = [data for data in livres if motivos[data] is None]
+
+        if reservadas:
+
+            try:
+
+                self.colecao_reservas.insert_many([
+                    {**self.montar_documento_reserva(lugar, lugar_id, data, hora_inicial, hora_final,
+                                                     cliente_id, valor_reserva, []),
+                     "_id": reservas_ids[data]}
+                    for data in reservadas
+                ])
+
+            except BulkWriteError as e:
+
+                # O insert_many é ordenado: as reservas a partir da que falhou
+                #       não foram gravadas, então seus horários são liberados.
+                for data in reservadas[e.details["nInserted"]:]:
+                    self.liberar_horario(lugar_id, data, hora_inicial, hora_final, reservas_ids[data])
+
+                self.confirmar_reivindicacoes(lugar_id, [reservas_ids[data] for data in
+                                                         reservadas[:e.details["nInserted"]]])
+
+                raise
+
+            self.confirmar_reivindicacoes(lugar_id, [reservas_ids[data] for data in reservadas])
+
+        return [{"data": data, "reservada": motivos[data] is None, "motivo": motivos[data]}
+                for data in datas]
 
 
     """
@@ -434,11 +852,14 @@ class ReservaQuadra:
                 data, hora inicial e hora final.
     """
 
+    # A reserva é excluída com 'find_one_and_delete', de forma atômica: se dois
+    #       atendentes cancelarem a mesma reserva, só um recebe o documento e
+    #       devolve o estoque, com um único bulk_write.
     def cancelar_reserva(self, lugar_id, data_reserva, hora_inicial, hora_final):
 
-        # Busca no banco de dados MongoDB a reserva que corresponde
-        #       exatamente aos parâmetros fornecidos.
-        reserva = self.colecao_reservas.find_one({
+        # Exclui a reserva correspondente ao lugar, data e horários informados,
+        #       recebendo o documento excluído.
+        reserva = self.colecao_reservas.find_one_and_delete({
 
             # Converte o ID do lugar para ObjectId, formato usado no MongoDB.
             "lugar_id": ObjectId(lugar_id),
@@ -455,52 +876,13 @@ class ReservaQuadra:
             #       indicando falha no cancelamento.
             return False
 
-        # Obtém a lista de itens consumidos da reserva. Caso não existam
-        #       itens consumidos, retorna uma lista vazia.
-        itens_consumidos = reserva.get("itens_consumidos", [])
+        # Devolve ao estoque os itens consumidos na reserva.
+        self.devolver_estoque_itens(reserva.get("itens_consumidos", []))
 
-        # Itera sobre cada item da lista de itens consumidos.
-        for item in itens_consumidos:
-
-            # Obtém o ID do produto consumido. Se a chave "produto_id"
-            #       não estiver presente, retorna None.
-            prod_id = item.get("produto_id")
+        # Libera os minutos da reserva excluída na agenda do lugar/dia.
+        self.liberar_horario(lugar_id, data_reserva, hora_inicial, hora_final)
 
-            # Obtém a quantidade consumida do produto. Se a chave "qtd"
-            #       não existir, assume o valor padrão 0.
-            qtd_consumida = item.get("qtd", 0)
-
-            # Verifica se o ID do produto é válido e se a quantidade
-            #       consumida é maior que 0 para continuar.
-            if prod_id and qtd_consumida > 0:
-
-                # Atualiza o registro do produto no banco de dados.
-                # Localiza o produto pelo ID (convertido para ObjectId) e incrementa o estoque
-                # adicionando a quantidade consumida de volta ao estoque.
-                self.colecao_produtos.update_one(
-                    {"_id": ObjectId(prod_id)},  # Critério de busca: produto com o ID especificado.
-                    {"$inc": {"estoque": qtd_consumida}}  # Incremento do estoque com a quantidade devolvida.
-                )
-
-        # Exclui a reserva correspondente ao lugar, data e horários informados.
-        resultado = self.colecao_reservas.delete_one({
-
-            # Localiza a reserva pelo ID do lugar (convertido para ObjectId).
-            "lugar_id": ObjectId(lugar_id),
-
-            # Filtra pela data específica da reserva.
-            "data": data_reserva,
-
-            # Filtra pelo horário inicial da reserva.
-            "hora_inicial": hora_inicial,
-
-            # Filtra pelo horário final da reserva.
-            "hora_final": hora_final
-
-        })
-
-        # Retorna True se pelo menos um documento foi excluído (deleted_count > 0).
-        return resultado.deleted_count > 0
+        return True
 
 
 ###############################################################################
@@ -5244,6 +5626,29 @@ class JanelaCadastroReserva:
                           padx=5,  # Adiciona 5 pixels de espaçamento horizontal ao redor do botão.
                           pady=5)  # Adiciona 5 pixels de espaçamento vertical ao redor do botão.
 
+        # Reserva semanal: repete o mesmo lugar e horário, toda semana a
+        #       partir da data escolhida, pelo número de ocorrências informado.
+        linha += 1
+
+        self.var_repetir = tk.BooleanVar(value=False)
+
+        ttk.Checkbutton(quadro_esquerda,
+                        text="Repetir semanalmente",
+                        variable=self.var_repetir).grid(row=linha, column=0, padx=5, pady=5, sticky='e')
+
+        quadro_ocorrencias = ttk.Frame(quadro_esquerda)
+        quadro_ocorrencias.grid(row=linha, column=1, padx=5, pady=5, sticky='w')
+
+        ttk.Label(quadro_ocorrencias, text="Ocorrências:").pack(side='left')
+
+        self.var_ocorrencias = tk.StringVar(value="4")
+
+        ttk.Spinbox(quadro_ocorrencias,
+                    from_=2,
+                    to=MAX_OCORRENCIAS_RECORRENCIA,
+                    textvariable=self.var_ocorrencias,
+                    width=5).pack(side='left', padx=5)
+
         # Cria um quadro para organizar a exibição dos itens consumidos.
         # `quadro_direita` é o contêiner principal onde este quadro será inserido.
         # Define o contêiner pai onde o quadro será colocado.
@@ -5585,10 +5990,25 @@ class JanelaCadastroReserva:
             messagebox.showwarning("Aviso", "Preencha todos os campos obrigatórios.")
             return
 
+        # Reserva semanal: grava todas as ocorrências de uma vez.
+        if self.var_repetir.get():
+            self.finalizar_reserva_recorrente(lugar_id, data_res, hi, hf, cliente_id, valor_hora)
+            return
+
         # Verifica se já existe uma reserva no mesmo lugar, data e horário fornecidos.
         # Chama o método `verificar_conflito` da classe de reserva, passando o `lugar_id`,
         # a data da reserva (`data_res`), a hora inicial (`hi`) e a hora final (`hf`).
-        if self.reserva.verificar_conflito(lugar_id, data_res, hi, hf):
+        try:
+
+            conflito = self.reserva.verificar_conflito(lugar_id, data_res, hi, hf)
+
+        except ValueError as e:
+
+            # Horário em formato inválido.
+            messagebox.showerror("Erro", str(e))
+            return
+
+        if conflito:
 
             # Se o método retornar `True`, significa que já existe uma
             #       reserva que entra em conflito.
@@ -5640,24 +6060,6 @@ class JanelaCadastroReserva:
                 "produto_id": produto_id
             })
 
-        # Tenta abater o estoque para os itens consumidos na reserva.
-        try:
-
-            # Chama o método `abater_estoque_itens` da classe `reserva`,
-            # passando a lista `itens_consumidos` que contém os produtos e suas quantidades.
-            self.reserva.abater_estoque_itens(itens_consumidos)
-
-        except ValueError as e:
-
-            # Caso ocorra um erro de estoque insuficiente (levantado como `ValueError`),
-            # exibe uma mensagem de erro em uma caixa de diálogo.
-            # A mensagem detalha o motivo do erro, incluindo o nome do
-            #       produto afetado e o estoque disponível.
-            messagebox.showerror("Estoque insuficiente", str(e))
-
-            # Encerra a execução do método para que o processo de reserva não continue.
-            return
-
         # Insere a reserva no banco de dados.
         # O método `inserir_reserva` da classe `reserva` é chamado com
         #       os parâmetros necessários:
@@ -5667,7 +6069,16 @@ class JanelaCadastroReserva:
         # - `cliente_id`: O ID do cliente selecionado.
         # - `valor_hora`: O valor calculado para a reserva.
         # - `itens_consumidos`: Lista contendo os itens consumidos na reserva.
-        self.reserva.inserir_reserva(lugar_id, data_res, hi, hf, cliente_id, valor_hora, itens_consumidos)
+        # O estoque dos itens é abatido junto com a gravação: se faltar estoque
+        #       ou o horário tiver sido reservado por outro atendente, nada é gravado.
+        try:
+
+            self.reserva.inserir_reserva(lugar_id, data_res, hi, hf, cliente_id, valor_hora, itens_consumidos)
+
+        except ValueError as e:
+
+            messagebox.showerror("Reserva não gravada", str(e))
+            return
 
         # Exibe uma mensagem de sucesso em uma caixa de diálogo, informando
         #       que a reserva foi cadastrada com sucesso.
@@ -5684,6 +6095,51 @@ class JanelaCadastroReserva:
         # Fecha a janela de cadastro de reserva após concluir a operação.
         self.janela.destroy()
 
+
+    # Grava a reserva semanal e mostra o relatório de cada data.
+    def finalizar_reserva_recorrente(self, lugar_id, data_res, hi, hf, cliente_id, valor_hora):
+
+        # Os itens consumidos são lançados por reserva, e não na série inteira.
+        if self.tree_itens.get_children():
+
+            messagebox.showwarning("Aviso",
+                                   "Itens consumidos só podem ser lançados em reservas avulsas.",
+                                   parent=self.janela)
+            return
+
+        try:
+
+            ocorrencias = int(self.var_ocorrencias.get())
+
+        except ValueError:
+
+            messagebox.showwarning("Aviso", "Número de ocorrências inválido.", parent=self.janela)
+            return
+
+        try:
+
+            relatorio = self.reserva.inserir_reservas_recorrentes(lugar_id, hi, hf, cliente_id, valor_hora,
+                                                                  data_res, ocorrencias=ocorrencias)
+
+        except ValueError as e:
+
+            messagebox.showerror("Erro", str(e), parent=self.janela)
+            return
+
+        reservadas = sum(1 for item in relatorio if item["reservada"])
+
+        linhas = [f"{item['data']}: " + ("reservada" if item["reservada"] else item["motivo"])
+                  for item in relatorio]
+
+        messagebox.showinfo("Reserva Semanal",
+                            f"{reservadas} de {len(relatorio)} datas reservadas.\n\n" + "\n".join(linhas),
+                            parent=self.janela)
+
+        self.janela_reservas.atualizar_mapa()
+
+        if reservadas:
+            self.janela.destroy()
+
     # ---------------------------------------
 
 
@@ -7297,11 +7753,160 @@ class JanelaPrincipal(tk.Tk):
         JanelaRelatorio(self, self.reserva)
 
 
+###############################################################################
+#                   TESTE DE CONCORRÊNCIA DAS RESERVAS                        #
+###############################################################################
+
+# Teste de concorrência das reservas: vários atendentes tentam reservar, ao
+#       mesmo tempo, horários sobrepostos do mesmo lugar e dia, cada reserva
+#       consumindo um produto de estoque limitado. Ao final, confere que
+#       nenhuma reserva gravada se sobrepõe a outra, que a agenda do dia
+#       corresponde exatamente às reservas gravadas e que o estoque final é
+#       o inicial menos o consumido nelas, sem baixas pendentes. Em seguida
+#       simula quedas entre reservar os minutos e gravar a reserva e confere
+#       que recuperar_reivindicacoes_agenda() libera só os minutos órfãos.
+# Tudo roda em uma instância ligada a 'nome_banco', descartado ao terminar.
+# Execução: python "Sistema+de+Reserva+de+Campo+e+Quadra.py" --teste-concorrencia-reservas
+def executar_teste_concorrencia_reservas(nome_banco="sistema_completo_db_teste_concorrencia",
+                                         atendentes=8,
+                                         tentativas_por_atendente=50):
+
+    teste = ReservaQuadra(nome_banco)
+    teste.conexao.drop_database(nome_banco)
+
+    try:
+
+        aplicar_indices(teste.banco, "projeto08")
+
+        lugar_id = teste.colecao_lugares.insert_one({"nome": "Quadra Teste", "tipo": "Quadra",
+                                                     "valor_hora": 100.0}).inserted_id
+        cliente_id = teste.colecao_clientes.insert_one({"nome": "Cliente Teste", "cpf": "000"}).inserted_id
+        data_teste = "01/01/2030"
+
+        # Estoque menor que o número de horários livres, para que parte das
+        #       reservas seja recusada por falta de estoque.
+        estoque_inicial = 20
+        produto_id = teste.colecao_produtos.insert_one({"nome": "Bola Teste",
+                                                        "estoque": estoque_inicial}).inserted_id
+        itens = [{"nome": "Bola Teste", "qtd": 1, "preco_unit": 0.0, "custo_unit": 0.0,
+                  "produto_id": str(produto_id)}]
+
+        resultado = {"gravadas": 0, "recusadas": 0, "erros": 0}
+        trava = threading.Lock()
+
+        # Rotina de um atendente: tenta reservar intervalos sorteados entre 08:00 e 23:30.
+        def atendente(semente):
+
+            sorteio = random.Random(semente)
+
+            for _ in range(tentativas_por_atendente):
+
+                inicio = sorteio.randrange(8 * 60, 22 * 60, 15)
+                fim = inicio + sorteio.choice((30, 60, 90))
+
+                try:
+                    teste.inserir_reserva(lugar_id, data_teste,
+                                          f"{inicio // 60:02d}:{inicio % 60:02d}",
+                                          f"{fim // 60:02d}:{fim % 60:02d}",
+                                          cliente_id, 0.0, itens)
+                    chave = "gravadas"
+                except ValueError:
+                    chave = "recusadas"
+                except Exception:
+                    chave = "erros"
+
+                with trava:
+                    resultado[chave] += 1
+
+        threads = [threading.Thread(target=atendente, args=(n,)) for n in range(atendentes)]
+
+        for t in threads:
+            t.start()
+
+        for t in threads:
+            t.join()
+
+        # Conferência: reservas gravadas sem sobreposição e agenda igual a elas.
+        gravadas = list(teste.colecao_reservas.find({"lugar_id": lugar_id, "data": data_teste},
+                                                    {"hora_inicial": 1, "hora_final": 1}))
+
+        produto_final = teste.colecao_produtos.find_one({"_id": produto_id})
+        estoque_confere = produto_final["estoque"] == estoque_inicial - len(gravadas) and \
+            not produto_final.get("baixas_pendentes")
+
+        esperada = {campo: 0 for campo in CAMPOS_AGENDA}
+        sobrepostas = 0
+
+        for reserva_gravada in gravadas:
+
+            for campo, mascara in teste.mascaras_horario(reserva_gravada["hora_inicial"],
+                                                         reserva_gravada["hora_final"]).items():
+
+                if esperada[campo] & mascara:
+                    sobrepostas += 1
+
+                esperada[campo] |= mascara
+
+        agenda = teste.colecao_agenda.find_one({"lugar_id": lugar_id, "data": data_teste}) or {}
+        agenda_confere = all(agenda.get(campo, 0) == bits for campo, bits in esperada.items()) and \
+            not agenda.get("reivindicacoes")
+
+        # Recuperação: em outro dia, duas reivindicações antigas (uma sem
+        #       reserva gravada, cujos minutos devem ser liberados, e outra já
+        #       gravada) e uma recente, ainda em andamento, que não é tocada.
+        data_queda = "02/01/2030"
+        antiga = limite_pendencia().generation_time - timedelta(minutes=1)
+        orfa_id = ObjectId.from_datetime(antiga)
+        gravada_id = ObjectId.from_datetime(antiga - timedelta(seconds=1))
+        recente_id = ObjectId()
+
+        for reivindicacao_id, hi, hf in ((orfa_id, "08:00", "09:00"), (gravada_id, "10:00", "11:00"),
+                                         (recente_id, "12:00", "13:00")):
+            teste.reservar_horario(lugar_id, data_queda, hi, hf, reivindicacao_id)
+
+        teste.colecao_reservas.insert_one({"_id": gravada_id, "lugar_id": lugar_id, "data": data_queda,
+                                           "hora_inicial": "10:00", "hora_final": "11:00"})
+
+        teste.recuperar_reivindicacoes_agenda()
+
+        agenda_queda = teste.colecao_agenda.find_one({"lugar_id": lugar_id, "data": data_queda})
+        recuperacao_confere = agenda_queda["h08"] == 0 and agenda_queda["h10"] == MINUTOS_DA_HORA and \
+            agenda_queda["h12"] == MINUTOS_DA_HORA and \
+            [r["reserva_id"] for r in agenda_queda.get("reivindicacoes", [])] == [recente_id]
+
+        print(f"Atendentes: {atendentes} | Tentativas: {sum(resultado.values())} "
+              f"| Gravadas: {resultado['gravadas']} | Recusadas por conflito: "
+              f"{resultado['recusadas']} | Erros: {resultado['erros']}")
+
+        print(f"Estoque: inicial {estoque_inicial} | final {produto_final['estoque']} "
+              f"| consumido pelas reservas gravadas {len(gravadas)}")
+
+        if sobrepostas or not agenda_confere or not estoque_confere or not recuperacao_confere or \
+                resultado["erros"] or len(gravadas) != resultado["gravadas"]:
+
+            print(f"FALHA: sobreposições: {sobrepostas} | agenda confere: {agenda_confere} "
+                  f"| estoque confere: {estoque_confere} | recuperação confere: {recuperacao_confere}")
+            return False
+
+        print("OK: nenhuma reserva sobreposta; agenda e estoque conferem com as reservas gravadas; "
+              "reivindicações interrompidas recuperadas.")
+        return True
+
+    finally:
+
+        teste.conexao.drop_database(nome_banco)
+        teste.conexao.close()
+
+
 ###############################################################################
 #                            RODAR O SISTEMA                                  #
 ###############################################################################
 
 
+# Executa apenas o teste de concorrência das reservas, sem abrir a interface.
+if "--teste-concorrencia-reservas" in sys.argv:
+    sys.exit(0 if executar_teste_concorrencia_reservas() else 1)
+
 # Cria uma instância da classe ReservaQuadra, que é responsável
 #      por gerenciar as reservas.
 reserva = ReservaQuadra()
@@ -21,6 +21,13 @@ from Tools.scripts.make_ctype import values
 #       com o banco de dados MongoDB
 from pymongo import MongoClient
 
+import os
+import sys
+
+# Os índices da escola são criados a partir de `indices_mongodb.py` (raiz do repositório).
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indices_mongodb import aplicar_indices
+
 # Importa a classe ObjectId, usada para manipular identificadores únicos no MongoDB
 from bson.objectid import ObjectId
 
@@ -56,6 +63,9 @@ col_notas = db['notas']
 # Acessa a coleção 'faltas', que contém os registros de frequência dos alunos
 col_faltas = db['faltas']
 
+# Cria os índices declarados no manifesto para este sistema.
+aplicar_indices(db, "projeto09")
+
 
 
 # Define a função para obter uma lista com todas as disciplinas
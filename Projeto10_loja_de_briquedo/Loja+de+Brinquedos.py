@@ -20,6 +20,26 @@ from bson.objectid import ObjectId
 # Importa o módulo datetime para trabalhar com datas e horários
 import datetime
 
+# Importa o módulo sys para ler os argumentos de linha de comando
+import sys
+
+# Importa os módulos random e time, usados no benchmark dos relatórios
+import random
+import time
+
+# Importa o OrderedDict, usado como cache LRU dos nomes de produtos e clientes
+from collections import OrderedDict
+
+# Importa o módulo os para montar o caminho da raiz do repositório
+import os
+
+# Raiz do repositório: índices da loja (`indices_mongodb.py`) e baixa de estoque
+#       sem transação (`estoque_mongodb.py`).
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indices_mongodb import aplicar_indices
+from estoque_mongodb import (esquema_estoque, operacoes_baixa, baixar_estoque, devolver_baixa,
+                             confirmar_baixa, recuperar_baixas_pendentes)
+
 # Importa o módulo hashlib, que permite gerar hash de senhas
 #       para armazenamento seguro
 import hashlib
@@ -161,10 +181,92 @@ def analisar_data_br(data_str):
 
 
 
+###############################################################################
+# RESOLVEDOR DE DOCUMENTOS EM LOTE (COM CACHE LRU)
+###############################################################################
+
+class ResolvedorDocumentos:
+
+    """
+    Resolve identificadores (ObjectId) em documentos de uma coleção,
+    buscando todos os que faltam em uma única consulta `$in`.
+
+    Os documentos encontrados ficam em um cache LRU indexado pelo `_id`,
+    de modo que as janelas de histórico não precisem fazer um `find_one`
+    por item de venda.
+
+    Parâmetros:
+    ----------
+    - colecao: Coleção do MongoDB de onde os documentos serão lidos.
+    - capacidade (int): Quantidade máxima de documentos mantidos no cache.
+    """
+
+    def __init__(self, colecao, capacidade=5000):
+
+        # Coleção consultada quando um identificador não está no cache.
+        self.colecao = colecao
+
+        # Limite de documentos guardados; os menos usados são descartados.
+        self.capacidade = capacidade
+
+        # Cache LRU: a ordem das chaves indica o uso mais recente no final.
+        self._cache = OrderedDict()
+
+    # Retorna um dicionário `{_id: documento}` para os identificadores informados.
+    # Identificadores inexistentes no banco simplesmente não aparecem no resultado.
+    def resolver(self, ids):
+
+        # Remove valores nulos e repetidos, preservando apenas ids válidos.
+        ids = {i for i in ids if i is not None}
+
+        resultado = {}
+        faltantes = []
+
+        # Primeiro procura cada id no cache, marcando-o como usado recentemente.
+        for id_doc in ids:
+            if id_doc in self._cache:
+                self._cache.move_to_end(id_doc)
+                resultado[id_doc] = self._cache[id_doc]
+            else:
+                faltantes.append(id_doc)
+
+        # Busca todos os documentos ausentes do cache em uma só consulta.
+        if faltantes:
+            for doc in self.colecao.find({"_id": {"$in": faltantes}}):
+                resultado[doc["_id"]] = doc
+                self._guardar(doc)
+
+        return resultado
+
+    # Retorna um único documento pelo id (ou None), usando o cache.
+    def obter(self, id_doc):
+        return self.resolver([id_doc]).get(id_doc)
+
+    # Coloca um documento no cache, descartando o menos usado se necessário.
+    def _guardar(self, doc):
+        self._cache[doc["_id"]] = doc
+        self._cache.move_to_end(doc["_id"])
+        while len(self._cache) > self.capacidade:
+            self._cache.popitem(last=False)
+
+    # Remove um documento do cache (após alteração ou exclusão).
+    def invalidar(self, id_doc):
+        self._cache.pop(ObjectId(id_doc), None)
+
+    # Esvazia o cache por completo.
+    def limpar(self):
+        self._cache.clear()
+
+
 ###############################################################################
 # CLASSE DE GERENCIAMENTO DO BANCO DE DADOS (MongoDB)
 ###############################################################################
 
+# Campos do estoque da loja para o módulo `estoque_mongodb`: a baixa ainda
+#       não confirmada fica em `vendas_pendentes`, com o `_id` da venda.
+ESQUEMA_ESTOQUE = esquema_estoque(quantidade="quantidade_estoque",
+                                  marcas="vendas_pendentes", id_marca="venda_id")
+
 # Importa a biblioteca pymongo para conectar e interagir com o MongoDB
 class GerenciadorBanco:
 
@@ -220,6 +322,20 @@ class GerenciadorBanco:
         # Coleção para armazenar as vendas realizadas pela loja.
         self.col_vendas = self.banco["vendas"]
 
+        # Resolvedores em lote (com cache LRU) usados pelas janelas de
+        #       histórico para traduzir ids de produtos e clientes em nomes.
+        self.resolvedor_produtos = ResolvedorDocumentos(self.col_produtos)
+        self.resolvedor_clientes = ResolvedorDocumentos(self.col_clientes)
+
+        # Indica se o servidor suporta transações (descoberto na primeira venda).
+        self._suporta_transacoes = None
+
+        # Cria os índices declarados no manifesto para este sistema.
+        aplicar_indices(self.banco, "projeto10")
+
+        # Resolve baixas de estoque deixadas por uma queda anterior.
+        self.recuperar_vendas_pendentes()
+
     # Converte a senha para um formato seguro usando SHA-256.
     # O algoritmo SHA-256 gera um hash de 256 bits, tornando a
     #       senha ilegível para terceiros.
@@ -502,6 +618,9 @@ class GerenciadorBanco:
             }}
         )
 
+        # Descarta a versão antiga do produto guardada no cache.
+        self.resolvedor_produtos.invalidar(id_prod)
+
     # Define um método para excluir um produto do banco de dados.
     # Requer o ID do produto que será removido.
     def excluir_produto(self, id_prod):
@@ -510,6 +629,9 @@ class GerenciadorBanco:
         # `id_prod` é o identificador único do produto a ser removido.
         self.col_produtos.delete_one({"_id": ObjectId(id_prod)})
 
+        # Remove o produto excluído do cache.
+        self.resolvedor_produtos.invalidar(id_prod)
+
 
     # -------------------------------------------------------------------------
     # CRUD Clientes
@@ -553,6 +675,9 @@ class GerenciadorBanco:
             }}
         )
 
+        # Descarta a versão antiga do cliente guardada no cache.
+        self.resolvedor_clientes.invalidar(id_cl)
+
     # Exclui um cliente do banco de dados com base no ID fornecido.
     # Recebe o ID do cliente como parâmetro e remove o registro correspondente.
     def excluir_cliente(self, id_cl):
@@ -560,6 +685,9 @@ class GerenciadorBanco:
         # Executa a exclusão do cliente no banco de dados pelo seu ID único.
         self.col_clientes.delete_one({"_id": ObjectId(id_cl)})
 
+        # Remove o cliente excluído do cache.
+        self.resolvedor_clientes.invalidar(id_cl)
+
 
 
     # -------------------------------------------------------------------------
@@ -567,32 +695,41 @@ class GerenciadorBanco:
     # -------------------------------------------------------------------------
 
 
+    # Verifica (uma única vez) se o servidor MongoDB suporta transações
+    #       multi-documento, o que exige um replica set ou um cluster shardado.
+    def suporta_transacoes(self):
+
+        if self._suporta_transacoes is None:
+            try:
+                info = self.cliente.admin.command("hello")
+                self._suporta_transacoes = "setName" in info or info.get("msg") == "isdbgrid"
+            except pymongo.errors.PyMongoError:
+                self._suporta_transacoes = False
+
+        return self._suporta_transacoes
+
     # Registra uma nova venda no banco de dados.
     # `itens` é uma lista contendo os produtos vendidos e suas quantidades.
     # `total` representa o valor total da venda.
     # `forma_pagamento` indica como o cliente pagou (ex.: dinheiro, cartão).
     # `id_vendedor` é o identificador do vendedor responsável pela venda.
     # `id_cliente` é o identificador do cliente que realizou a compra.
+    # Retorna `(True, id_venda)` se a venda for registrada, ou
+    #       `(False, mensagem)` se faltar estoque para algum produto.
+    # O estoque só é baixado se houver quantidade suficiente de TODOS os
+    #       itens, e a baixa e o registro da venda acontecem juntos.
     def registrar_venda(self, itens, total, forma_pagamento, id_vendedor, id_cliente):
 
         # Obtém a data e hora atuais no formato ISO 8601.
         # Isso permite registrar quando a venda foi feita com precisão.
         data_e_hora = datetime.datetime.now().isoformat()
 
-        # Percorre a lista de itens vendidos para atualizar o estoque.
-        # Cada item contém um 'produto_id' e a quantidade vendida.
+        # Soma as quantidades por produto, caso o mesmo produto
+        #       apareça mais de uma vez no carrinho.
+        quantidades = {}
         for item in itens:
-
-            # Atualiza o banco de dados reduzindo a quantidade do
-            #       produto vendido no estoque.
-            # `"_id": ObjectId(item["produto_id"])` encontra o produto
-            #       pelo seu identificador.
-            # `"$inc": {"quantidade_estoque": -item["quantidade"]}`
-            #       subtrai a quantidade vendida do estoque.
-            self.col_produtos.update_one(
-                {"_id": ObjectId(item["produto_id"])},
-                {"$inc": {"quantidade_estoque": -item["quantidade"]}}
-            )
+            id_prod = ObjectId(item["produto_id"])
+            quantidades[id_prod] = quantidades.get(id_prod, 0) + item["quantidade"]
 
         # Cria um dicionário contendo os detalhes da venda.
         # "data_hora" armazena a data e hora da venda no formato ISO 8601.
@@ -602,7 +739,9 @@ class GerenciadorBanco:
         # "vendedor_id" guarda o identificador do vendedor responsável pela venda.
         # "cliente_id" armazena o identificador do cliente, caso exista.
         # Se não houver cliente cadastrado, armazena `None`.
+        # O `_id` é gerado antecipadamente para identificar a baixa de estoque.
         doc_venda = {
+            "_id": ObjectId(),
             "data_hora": data_e_hora,
             "itens": itens,
             "total": total,
@@ -611,13 +750,89 @@ class GerenciadorBanco:
             "cliente_id": ObjectId(id_cliente) if id_cliente else None
         }
 
-        # Insere a venda no banco de dados na coleção "vendas".
-        # `insert_one(doc_venda)` adiciona os detalhes da venda ao banco.
-        # O método retorna um objeto contendo o ID do documento inserido.
-        resultado = self.col_vendas.insert_one(doc_venda)
+        # Escolhe o caminho transacional quando o servidor permite.
+        if self.suporta_transacoes():
+            ok = self._baixar_estoque_com_transacao(quantidades, doc_venda)
+        else:
+            ok = self._baixar_estoque_com_compensacao(quantidades, doc_venda)
+
+        # Se algum produto não tinha estoque suficiente, nada foi gravado.
+        if not ok:
+            return False, self._mensagem_estoque_insuficiente(quantidades)
 
         # Retorna o ID da venda recém-registrada para possíveis usos futuros.
-        return resultado.inserted_id
+        return True, doc_venda["_id"]
+
+    # Baixa o estoque e insere a venda dentro de uma transação multi-documento.
+    # Retorna False (e nada é gravado) se faltar estoque para algum produto.
+    def _baixar_estoque_com_transacao(self, quantidades, doc_venda):
+
+        # Cada `UpdateOne` só altera o produto se `quantidade_estoque >= quantidade`,
+        #       evitando estoque negativo mesmo com vários caixas simultâneos.
+        operacoes = operacoes_baixa(quantidades, ESQUEMA_ESTOQUE)
+
+        # Função executada dentro da transação; `with_transaction`
+        #       repete automaticamente em caso de erros transitórios.
+        def executar(sessao):
+
+            # Uma única escrita em lote para todos os produtos.
+            resultado = self.col_produtos.bulk_write(operacoes, ordered=True, session=sessao)
+
+            # Se algum filtro não casou, falta estoque: aborta a transação.
+            if resultado.matched_count != len(operacoes):
+                sessao.abort_transaction()
+                return False
+
+            self.col_vendas.insert_one(doc_venda, session=sessao)
+            return True
+
+        with self.cliente.start_session() as sessao:
+            return sessao.with_transaction(executar)
+
+    # Baixa o estoque e insere a venda sem transação (servidor standalone),
+    #       com a venda marcada nos produtos até ser gravada.
+    # Retorna False se faltar estoque para algum produto.
+    def _baixar_estoque_com_compensacao(self, quantidades, doc_venda):
+
+        id_venda = doc_venda["_id"]
+
+        if not baixar_estoque(self.col_produtos, quantidades, id_venda, ESQUEMA_ESTOQUE):
+            return False
+
+        try:
+            self.col_vendas.insert_one(doc_venda)
+
+        except pymongo.errors.PyMongoError:
+
+            # A venda não foi gravada: devolve o estoque baixado.
+            devolver_baixa(self.col_produtos, quantidades, id_venda, ESQUEMA_ESTOQUE)
+            raise
+
+        # Venda gravada: remove a marca de pendência dos produtos.
+        confirmar_baixa(self.col_produtos, id_venda, ESQUEMA_ESTOQUE)
+
+        return True
+
+    # Recuperação ao iniciar: resolve as marcas de `vendas_pendentes` deixadas
+    #       por uma queda entre a baixa e a gravação; a venda conta como
+    #       gravada se o seu `_id` existir em `col_vendas`.
+    def recuperar_vendas_pendentes(self):
+
+        return recuperar_baixas_pendentes(self.col_produtos, self.col_vendas, ESQUEMA_ESTOQUE)
+
+    # Monta a mensagem de erro listando os produtos sem estoque suficiente.
+    def _mensagem_estoque_insuficiente(self, quantidades):
+
+        faltando = [
+            f"{p.get('nome', 'Desconhecido')} (estoque: {p.get('quantidade_estoque', 0)})"
+            for p in self.col_produtos.find({"_id": {"$in": list(quantidades)}})
+            if p.get("quantidade_estoque", 0) < quantidades[p["_id"]]
+        ]
+
+        if not faltando:
+            return "Estoque insuficiente para concluir a venda."
+
+        return "Estoque insuficiente para: " + ", ".join(faltando)
 
 
     # Define um método para buscar uma venda específica no banco de dados.
@@ -632,6 +847,143 @@ class GerenciadorBanco:
         return self.col_vendas.find_one({"_id": ObjectId(id_venda)})
 
 
+    # -------------------------------------------------------------------------
+    # RELATÓRIOS (AGREGAÇÕES EXECUTADAS NO SERVIDOR)
+    # -------------------------------------------------------------------------
+
+    # Monta o pipeline de agregação que resume as vendas por uma
+    #       entidade relacionada (cliente, produto ou vendedor).
+    # `campo_id` é o caminho do identificador dentro do item/venda
+    #       (ex.: "$cliente_id" ou "$itens.produto_id").
+    # `colecao` é a coleção onde o nome da entidade será buscado.
+    # O pipeline inteiro roda no MongoDB: o cliente Python recebe apenas
+    #       uma linha por nome, em uma única ida e volta ao servidor.
+    def _pipeline_resumo_vendas(self, campo_id, colecao):
+
+        return [
+
+            # Desmembra a lista de itens para que cada item vire um documento.
+            # Quando o agrupamento é pela venda (cliente/vendedor),
+            #       `preserveNullAndEmptyArrays` mantém vendas sem itens (total 0).
+            {"$unwind": {"path": "$itens",
+                         "preserveNullAndEmptyArrays": not campo_id.startswith("$itens.")}},
+
+            # Soma (quantidade * preço unitário) agrupando pelo identificador.
+            {"$group": {
+                "_id": campo_id,
+                "total": {"$sum": {"$multiply": ["$itens.quantidade",
+                                                 "$itens.preco_unitario"]}}
+            }},
+
+            # Junta o documento da entidade (substitui os `find_one` por venda).
+            {"$lookup": {
+                "from": colecao.name,
+                "localField": "_id",
+                "foreignField": "_id",
+                "as": "entidade"
+            }},
+
+            # Reagrupa pelo nome, pois o relatório é exibido por nome.
+            # Entidades ausentes ou sem nome aparecem como "Desconhecido".
+            {"$group": {
+                "_id": {"$ifNull": [{"$arrayElemAt": ["$entidade.nome", 0]},
+                                    "Desconhecido"]},
+                "total": {"$sum": "$total"}
+            }},
+
+            # Ordena do maior para o menor valor.
+            {"$sort": {"total": -1, "_id": 1}}
+        ]
+
+    # Executa um pipeline de resumo e devolve uma lista de
+    #       tuplas `(nome, total)`.
+    def _executar_resumo_vendas(self, campo_id, colecao):
+
+        pipeline = self._pipeline_resumo_vendas(campo_id, colecao)
+
+        # `allowDiskUse=True` permite ao servidor usar disco caso o
+        #       agrupamento ultrapasse o limite de memória.
+        return [(doc["_id"], doc["total"])
+                for doc in self.col_vendas.aggregate(pipeline, allowDiskUse=True)]
+
+    # Retorna o total de compras agrupado pelo nome do cliente.
+    def resumo_vendas_por_cliente(self):
+        return self._executar_resumo_vendas("$cliente_id", self.col_clientes)
+
+    # Retorna o total vendido agrupado pelo nome do produto.
+    def resumo_vendas_por_produto(self):
+        return self._executar_resumo_vendas("$itens.produto_id", self.col_produtos)
+
+    # Retorna o total de vendas agrupado pelo nome do vendedor.
+    def resumo_vendas_por_vendedor(self):
+        return self._executar_resumo_vendas("$vendedor_id", self.col_usuarios)
+
+
+###############################################################################
+# BENCHMARK DOS RELATÓRIOS RESUMIDOS
+###############################################################################
+
+# Mede como a latência dos relatórios resumidos cresce com o número de vendas.
+# Usa um banco separado (`nome_banco`), que é apagado ao final.
+# Execute com: python "Loja+de+Brinquedos.py" --benchmark-relatorios
+def executar_benchmark_relatorios(uri="mongodb://localhost:27017",
+                                  nome_banco="loja_brinquedos_benchmark",
+                                  tamanhos=(1000, 10000, 50000, 100000),
+                                  repeticoes=3):
+
+    db = GerenciadorBanco(uri, nome_banco)
+
+    try:
+
+        # Cadastra uma base fixa de clientes, produtos e vendedores.
+        db.cliente.drop_database(nome_banco)
+        ids_clientes = db.col_clientes.insert_many(
+            [{"nome": f"Cliente {i}"} for i in range(200)]).inserted_ids
+        ids_produtos = db.col_produtos.insert_many(
+            [{"nome": f"Produto {i}", "preco_venda": 10.0 + i} for i in range(500)]).inserted_ids
+        ids_vendedores = db.col_usuarios.insert_many(
+            [{"nome": f"Vendedor {i}"} for i in range(10)]).inserted_ids
+
+        print(f"{'vendas':>10} | {'cliente (s)':>12} | {'produto (s)':>12} | {'vendedor (s)':>12}")
+
+        vendas_inseridas = 0
+
+        for tamanho in tamanhos:
+
+            # Completa a coleção de vendas até atingir o tamanho desejado.
+            lote = []
+            for _ in range(tamanho - vendas_inseridas):
+                itens = [{"produto_id": random.choice(ids_produtos),
+                          "quantidade": random.randint(1, 5),
+                          "preco_unitario": round(random.uniform(5, 200), 2)}
+                         for _ in range(random.randint(1, 4))]
+                lote.append({"data_hora": datetime.datetime.now().isoformat(),
+                             "itens": itens,
+                             "vendedor_id": random.choice(ids_vendedores),
+                             "cliente_id": random.choice(ids_clientes)})
+            if lote:
+                db.col_vendas.insert_many(lote)
+            vendas_inseridas = tamanho
+
+            # Mede a melhor de `repeticoes` execuções de cada relatório.
+            tempos = []
+            for metodo in (db.resumo_vendas_por_cliente,
+                           db.resumo_vendas_por_produto,
+                           db.resumo_vendas_por_vendedor):
+                melhor = None
+                for _ in range(repeticoes):
+                    inicio = time.perf_counter()
+                    metodo()
+                    duracao = time.perf_counter() - inicio
+                    melhor = duracao if melhor is None else min(melhor, duracao)
+                tempos.append(melhor)
+
+            print(f"{tamanho:>10} | {tempos[0]:>12.4f} | {tempos[1]:>12.4f} | {tempos[2]:>12.4f}")
+
+    finally:
+        db.cliente.drop_database(nome_banco)
+
+
 ###############################################################################
 # FUNÇÃO PARA CENTRALIZAR JANELAS
 ###############################################################################
@@ -1944,10 +2296,19 @@ class QuadroVendas(tk.Frame):
         # - forma: a forma de pagamento escolhida.
         # - self.usuario["_id"]: o ID do usuário (vendedor) que está realizando a venda.
         # - cliente_id: o ID do cliente, se informado.
-        id_venda = self.db.registrar_venda(itens,
-                                           total_final,
-                                           forma,
-                                           self.usuario["_id"], cliente_id)
+        ok, resultado = self.db.registrar_venda(itens,
+                                                total_final,
+                                                forma,
+                                                self.usuario["_id"], cliente_id)
+
+        # Se faltou estoque (por exemplo, outro caixa vendeu antes),
+        #       nada foi gravado: informa o usuário e mantém o carrinho.
+        if not ok:
+            messagebox.showerror("Erro", resultado)
+            return
+
+        # Em caso de sucesso, `resultado` contém o ID da venda registrada.
+        id_venda = resultado
 
         # Mostra uma mensagem indicando que a venda foi registrada com sucesso.
         messagebox.showinfo("Sucesso",
@@ -3028,7 +3389,12 @@ class JanelaProdutosPorCliente(tk.Toplevel):
         # `self.db.col_vendas.find({"cliente_id": ObjectId(self.id_cl)})`
         #       retorna um cursor com todas as vendas cujo `cliente_id`
         #       corresponde ao ID do cliente selecionado.
-        docs_vendas = self.db.col_vendas.find({"cliente_id": ObjectId(self.id_cl)})
+        docs_vendas = list(self.db.col_vendas.find({"cliente_id": ObjectId(self.id_cl)}))
+
+        # Resolve todos os produtos referenciados pelas vendas de uma
+        #       só vez (uma consulta `$in` para os que não estão em cache).
+        produtos = self.db.resolvedor_produtos.resolver(
+            it["produto_id"] for vd in docs_vendas for it in vd["itens"])
 
         # Itera sobre cada venda encontrada no banco de dados.
         for vd in docs_vendas:
@@ -3047,9 +3413,8 @@ class JanelaProdutosPorCliente(tk.Toplevel):
             # Percorre cada item da venda para obter os detalhes do produto vendido.
             for it in vd["itens"]:
 
-                # Busca no banco de dados o documento do produto com base
-                #       no ID armazenado na venda.
-                prod_doc = self.db.col_produtos.find_one({"_id": it["produto_id"]})
+                # Obtém o documento do produto já resolvido em lote.
+                prod_doc = produtos.get(it["produto_id"])
 
                 # Se o produto for encontrado, obtém o nome dele, caso
                 #       contrário, define como "Desconhecido".
@@ -4033,9 +4398,18 @@ class JanelaVendasFornecedor(tk.Toplevel):
         #       dados formatados de vendas.
         lista = []
 
-        # Recupera todas as vendas armazenadas no banco de dados.
-        # `todas_vendas` conterá um cursor para iterar sobre as vendas.
-        todas_vendas = self.db.col_vendas.find()
+        # Busca os produtos deste fornecedor em uma única consulta.
+        # `produtos_forn` mapeia o `_id` de cada produto para o seu documento.
+        produtos_forn = {p["_id"]: p for p in
+                         self.db.col_produtos.find({"fornecedor_id": ObjectId(self.id_forn)})}
+
+        # Recupera apenas as vendas que contêm algum produto do fornecedor.
+        todas_vendas = list(self.db.col_vendas.find(
+            {"itens.produto_id": {"$in": list(produtos_forn)}}))
+
+        # Resolve os nomes de todos os clientes dessas vendas de uma só vez.
+        clientes = self.db.resolvedor_clientes.resolver(
+            vd.get("cliente_id") for vd in todas_vendas)
 
         # Itera sobre cada venda para formatar os dados necessários.
         for vd in todas_vendas:
@@ -4055,9 +4429,9 @@ class JanelaVendasFornecedor(tk.Toplevel):
             # Verifica se a venda tem um campo `cliente_id`.
             if vd.get("cliente_id"):
 
-                # Busca os dados do cliente no banco de dados usando o `cliente_id`.
+                # Obtém os dados do cliente já resolvidos em lote.
                 # `doc_c` conterá as informações do cliente, caso ele exista.
-                doc_c = self.db.col_clientes.find_one({"_id": vd["cliente_id"]})
+                doc_c = clientes.get(vd["cliente_id"])
                 if doc_c:
 
                     # Se o cliente for encontrado, armazena seu nome.
@@ -4070,13 +4444,12 @@ class JanelaVendasFornecedor(tk.Toplevel):
             # Cada item representa um produto comprado nesta venda.
             for it in itens:
 
-                # Busca no banco de dados as informações do produto relacionado ao item.
-                # `doc_p` conterá o documento do produto, caso ele exista.
-                doc_p = self.db.col_produtos.find_one({"_id": it["produto_id"]})
+                # Obtém o produto do item, caso ele pertença ao fornecedor.
+                # `doc_p` será None para produtos de outros fornecedores.
+                doc_p = produtos_forn.get(it["produto_id"])
 
-                # Verifica se o produto existe e se pertence ao fornecedor especificado.
-                # Isso é feito comparando o campo `fornecedor_id` do produto com o `id_forn` passado.
-                if doc_p and str(doc_p["fornecedor_id"]) == self.id_forn:
+                # Considera apenas os itens de produtos do fornecedor especificado.
+                if doc_p:
 
                     # Calcula o subtotal para este item da venda.
                     # O subtotal é obtido multiplicando a quantidade
@@ -4718,10 +5091,14 @@ class JanelaClientesProduto(tk.Toplevel):
         # Inicializa uma lista vazia para armazenar os registros formatados.
         lista = []
 
-        # Obtém todas as vendas da coleção `col_vendas` no banco de dados.
-        # `self.db.col_vendas.find()` retorna um cursor
-        #       contendo todos os documentos da coleção.
-        todas_vendas = self.db.col_vendas.find()
+        # Obtém apenas as vendas que contêm o produto selecionado.
+        # O filtro `itens.produto_id` é avaliado no próprio MongoDB.
+        todas_vendas = list(self.db.col_vendas.find(
+            {"itens.produto_id": ObjectId(self.id_prod)}))
+
+        # Resolve os clientes de todas essas vendas em uma única consulta.
+        clientes = self.db.resolvedor_clientes.resolver(
+            vd.get("cliente_id") for vd in todas_vendas)
 
         # Itera sobre todas as vendas recuperadas do banco de dados.
         for vd in todas_vendas:
@@ -4747,9 +5124,8 @@ class JanelaClientesProduto(tk.Toplevel):
             # Verifica se a venda possui um cliente associado (`cliente_id` não é nulo).
             if vd.get("cliente_id"):
 
-                # Busca o documento do cliente na coleção `col_clientes`
-                #       com base no `_id` armazenado na venda.
-                cli_doc = self.db.col_clientes.find_one({"_id": vd["cliente_id"]})
+                # Obtém o documento do cliente já resolvido em lote.
+                cli_doc = clientes.get(vd["cliente_id"])
 
                 # Se um cliente for encontrado, extrai o nome do cliente e
                 #       armazena na variável `nome_cli`.
@@ -6203,9 +6579,9 @@ class JanelaRelatorioResumido(tk.Toplevel):
         """
         Método responsável por carregar um resumo das vendas agrupadas por cliente.
 
-        O método consulta o banco de dados para obter todas as vendas registradas,
-        soma o total de compras de cada cliente e retorna uma lista formatada com os nomes
-        dos clientes e o total gasto por cada um.
+        O agrupamento e a busca do nome dos clientes são feitos no próprio
+        MongoDB por `GerenciadorBanco.resumo_vendas_por_cliente()`, em uma
+        única consulta de agregação.
 
         Retorna:
         - Uma lista de dicionários contendo:
@@ -6213,40 +6589,9 @@ class JanelaRelatorioResumido(tk.Toplevel):
           * "Total de Compras": Valor total gasto pelo cliente, formatado como moeda.
         """
 
-        # Dicionário que armazenará os clientes e o total de compras de cada um
-        resumo = {}
-
-        # Obtém todas as vendas registradas no banco de dados
-        vendas = self.db.col_vendas.find()
-
-        # Percorre cada venda obtida do banco de dados
-        for v in vendas:
-
-            # Obtém o ID do cliente associado à venda
-            cliente_id = v.get("cliente_id")
-
-            # Define um valor padrão caso o cliente não seja encontrado
-            nome_cliente = "Desconhecido"
-
-            # Se houver um ID de cliente válido, busca o nome do cliente no banco de dados
-            if cliente_id:
-                cliente = self.db.col_clientes.find_one({"_id": cliente_id})
-
-                # Se encontrar o cliente, obtém seu nome, senão mantém "Desconhecido"
-                if cliente:
-                    nome_cliente = cliente.get("nome", "Desconhecido")
-
-            # Calcula o total de compras desta venda somando (quantidade * preço unitário) de cada item
-            total_venda = sum(item["quantidade"] * item["preco_unitario"] for item in v["itens"])
-
-            # Adiciona o total da venda ao cliente correspondente no dicionário `resumo`
-            # - Se o cliente já existir no dicionário, soma o valor ao total existente.
-            # - Se for a primeira vez que aparece, cria a entrada com o valor inicial.
-            resumo[nome_cliente] = resumo.get(nome_cliente, 0) + total_venda
-
-        # Retorna os dados formatados como uma lista de dicionários
-        # - Cada entrada contém o nome do cliente e o total de compras formatado como moeda
-        return [{"Cliente": k, "Total de Compras": f"R$ {v:.2f}"} for k, v in resumo.items()]
+        # Cada entrada contém o nome do cliente e o total de compras formatado como moeda
+        return [{"Cliente": nome, "Total de Compras": f"R$ {total:.2f}"}
+                for nome, total in self.db.resumo_vendas_por_cliente()]
 
 
     def _carregar_resumo_vendas_por_produto(self):
@@ -6254,9 +6599,9 @@ class JanelaRelatorioResumido(tk.Toplevel):
         """
         Método responsável por carregar um resumo das vendas agrupadas por produto.
 
-        O método consulta o banco de dados para obter todas as vendas registradas,
-        soma o total vendido de cada produto e retorna uma lista formatada com os nomes
-        dos produtos e o total arrecadado por cada um.
+        O agrupamento dos itens vendidos e a busca do nome dos produtos são
+        feitos no próprio MongoDB por `GerenciadorBanco.resumo_vendas_por_produto()`,
+        em uma única consulta de agregação.
 
         Retorna:
         - Uma lista de dicionários contendo:
@@ -6264,42 +6609,9 @@ class JanelaRelatorioResumido(tk.Toplevel):
           * "Total Vendido": Valor total arrecadado com as vendas do produto, formatado como moeda.
         """
 
-        # Dicionário que armazenará os produtos e o total vendido de cada um
-        resumo = {}
-
-        # Obtém todas as vendas registradas no banco de dados
-        vendas = self.db.col_vendas.find()
-
-        # Percorre cada venda recuperada do banco de dados
-        for v in vendas:
-
-            # Percorre todos os itens vendidos dentro da venda atual
-            for item in v["itens"]:
-
-                # Obtém o ID do produto vendido
-                produto_id = item["produto_id"]
-
-                # Define um valor padrão para o nome do produto caso ele não seja encontrado
-                nome_produto = "Desconhecido"
-
-                # Tenta buscar o nome do produto no banco de dados usando o ID do produto
-                produto = self.db.col_produtos.find_one({"_id": produto_id})
-
-                # Se encontrar o produto, obtém o nome, senão mantém "Desconhecido"
-                if produto:
-                    nome_produto = produto.get("nome", "Desconhecido")
-
-                # Calcula o valor total vendido desse produto multiplicando a quantidade pelo preço unitário
-                total_vendido = item["quantidade"] * item["preco_unitario"]
-
-                # Adiciona o total vendido ao produto correspondente no dicionário `resumo`
-                # - Se o produto já existir no dicionário, soma o valor ao total existente.
-                # - Se for a primeira vez que aparece, cria a entrada com o valor inicial.
-                resumo[nome_produto] = resumo.get(nome_produto, 0) + total_vendido
-
-        # Retorna os dados formatados como uma lista de dicionários
-        # - Cada entrada contém o nome do produto e o total vendido formatado como moeda
-        return [{"Produto": k, "Total Vendido": f"R$ {v:.2f}"} for k, v in resumo.items()]
+        # Cada entrada contém o nome do produto e o total vendido formatado como moeda
+        return [{"Produto": nome, "Total Vendido": f"R$ {total:.2f}"}
+                for nome, total in self.db.resumo_vendas_por_produto()]
 
 
     def _carregar_resumo_vendas_por_vendedor(self):
@@ -6307,9 +6619,9 @@ class JanelaRelatorioResumido(tk.Toplevel):
         """
         Método responsável por carregar um resumo das vendas agrupadas por vendedor.
 
-        O método consulta o banco de dados para obter todas as vendas registradas,
-        soma o total de vendas realizadas por cada vendedor e retorna uma lista formatada
-        com os nomes dos vendedores e o total vendido por cada um.
+        O agrupamento e a busca do nome dos vendedores são feitos no próprio
+        MongoDB por `GerenciadorBanco.resumo_vendas_por_vendedor()`, em uma
+        única consulta de agregação.
 
         Retorna:
         - Uma lista de dicionários contendo:
@@ -6317,41 +6629,9 @@ class JanelaRelatorioResumido(tk.Toplevel):
           * "Total de Vendas": Valor total das vendas realizadas pelo vendedor, formatado como moeda.
         """
 
-        # Dicionário que armazenará os vendedores e o total de vendas de cada um
-        resumo = {}
-
-        # Obtém todas as vendas registradas no banco de dados
-        vendas = self.db.col_vendas.find()
-
-        # Percorre cada venda obtida do banco de dados
-        for v in vendas:
-
-            # Obtém o ID do vendedor responsável pela venda
-            vendedor_id = v.get("vendedor_id")
-
-            # Define um valor padrão caso o vendedor não seja encontrado
-            nome_vendedor = "Desconhecido"
-
-            # Se houver um ID de vendedor válido, busca o nome do vendedor no banco de dados
-            if vendedor_id:
-                vendedor = self.db.col_usuarios.find_one({"_id": vendedor_id})
-
-                # Se encontrar o vendedor, obtém seu nome, senão mantém "Desconhecido"
-                if vendedor:
-                    nome_vendedor = vendedor.get("nome", "Desconhecido")
-
-            # Calcula o total de vendas dessa venda específica
-            # Somando (quantidade * preço unitário) de cada item vendido
-            total_venda = sum(item["quantidade"] * item["preco_unitario"] for item in v["itens"])
-
-            # Adiciona o total de vendas ao vendedor correspondente no dicionário `resumo`
-            # - Se o vendedor já existir no dicionário, soma o valor ao total existente.
-            # - Se for a primeira vez que aparece, cria a entrada com o valor inicial.
-            resumo[nome_vendedor] = resumo.get(nome_vendedor, 0) + total_venda
-
-        # Retorna os dados formatados como uma lista de dicionários
-        # - Cada entrada contém o nome do vendedor e o total de vendas formatado como moeda
-        return [{"Vendedor": k, "Total de Vendas": f"R$ {v:.2f}"} for k, v in resumo.items()]
+        # Cada entrada contém o nome do vendedor e o total de vendas formatado como moeda
+        return [{"Vendedor": nome, "Total de Vendas": f"R$ {total:.2f}"}
+                for nome, total in self.db.resumo_vendas_por_vendedor()]
 
 
     def _exibir(self, tree, dados):
@@ -6708,7 +6988,13 @@ class JanelaRelatorioCompleto(tk.Toplevel):
 
         # Obtém todas as vendas armazenadas no banco de dados.
         # `self.db.col_vendas.find()` retorna todos os registros da coleção de vendas.
-        vendas = self.db.col_vendas.find()
+        vendas = list(self.db.col_vendas.find())
+
+        # Resolve em lote todos os clientes e produtos referenciados,
+        #       evitando um `find_one` por venda e por item.
+        clientes = self.db.resolvedor_clientes.resolver(v.get("cliente_id") for v in vendas)
+        produtos = self.db.resolvedor_produtos.resolver(
+            item["produto_id"] for v in vendas for item in v["itens"])
 
         # Percorre cada venda retornada na consulta.
         for v in vendas:
@@ -6737,11 +7023,9 @@ class JanelaRelatorioCompleto(tk.Toplevel):
             #       existe no dicionário `v`.
             if v.get("cliente_id"):
 
-                # Se houver um cliente associado, busca as informações do
-                #       cliente no banco de dados.
-                # `self.db.col_clientes.find_one({"_id": v["cliente_id"]})` retorna o
-                #       documento do cliente correspondente.
-                doc_c = self.db.col_clientes.find_one({"_id": v["cliente_id"]})
+                # Se houver um cliente associado, obtém o documento do
+                #       cliente já resolvido em lote.
+                doc_c = clientes.get(v["cliente_id"])
 
                 # Se o cliente for encontrado, armazena o nome do
                 #       cliente na variável `nome_cliente`.
@@ -6751,11 +7035,9 @@ class JanelaRelatorioCompleto(tk.Toplevel):
             # Percorre todos os itens vendidos dentro da venda `v`.
             for item in v["itens"]:
 
-                # Busca o produto no banco de dados utilizando o
-                #       ID armazenado em `item["produto_id"]`.
-                # `find_one({"_id": item["produto_id"]})` retorna o
-                #       documento do produto correspondente.
-                doc_p = self.db.col_produtos.find_one({"_id": item["produto_id"]})
+                # Obtém o produto já resolvido em lote a partir
+                #       do ID armazenado em `item["produto_id"]`.
+                doc_p = produtos.get(item["produto_id"])
 
                 # Se o produto for encontrado, obtém o nome do produto.
                 # Caso contrário, define "Desconhecido" como nome do produto.
@@ -6933,13 +7215,20 @@ class JanelaRelatorioCompleto(tk.Toplevel):
 # EXECUÇÃO
 ###############################################################################
 
-# Cria uma instância da classe `Aplicacao`, que representa a
-#       interface gráfica do programa.
-# Essa instância inicializa todos os elementos e
-#       funcionalidades da aplicação.
-app = Aplicacao()
+# Com o argumento `--benchmark-relatorios`, executa apenas a
+#       medição de latência dos relatórios resumidos, sem abrir a interface.
+if "--benchmark-relatorios" in sys.argv:
+    executar_benchmark_relatorios()
+
+else:
+
+    # Cria uma instância da classe `Aplicacao`, que representa a
+    #       interface gráfica do programa.
+    # Essa instância inicializa todos os elementos e
+    #       funcionalidades da aplicação.
+    app = Aplicacao()
 
-# Inicia o loop principal da interface gráfica (`mainloop()`).
-# Esse método mantém a aplicação em execução, processando eventos do
-#       usuário até que a janela seja fechada.
-app.mainloop()
\ No newline at end of file
+    # Inicia o loop principal da interface gráfica (`mainloop()`).
+    # Esse método mantém a aplicação em execução, processando eventos do
+    #       usuário até que a janela seja fechada.
+    app.mainloop()
\ No newline at end of file
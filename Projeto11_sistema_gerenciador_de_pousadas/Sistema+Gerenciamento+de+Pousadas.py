@@ -65,6 +65,10 @@ from bson.objectid import ObjectId
 #       MongoDB e executar operações no banco de dados.
 from pymongo import MongoClient
 
+# aplicar_indices() vem do manifesto compartilhado, na pasta pai das pousadas.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indices_mongodb import aplicar_indices
+
 # ==================================
 # Manipulação de Dados com Pandas
 # ==================================
@@ -115,6 +119,9 @@ hospedes_collection = db["hospedes"]
 # Exemplo: frigobar, café da manhã extra, passeios, itens de higiene pessoal.
 produtos_collection = db["produtos"]
 
+# Cria os índices declarados no manifesto para este sistema.
+aplicar_indices(db, "projeto11")
+
 
 # =================================================================================== #
 
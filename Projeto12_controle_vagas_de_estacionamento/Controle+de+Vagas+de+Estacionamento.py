@@ -18,8 +18,6 @@ from tkinter import (
 
 from PIL.ImageOps import expand
 from openpyxl.styles.builtins import styles, title
-from pandas.core.indexes.base import str_t
-from pandas.core.reshape.reshape import unstack
 from reportlab.graphics.samples.excelcolors import backgroundGrey
 from reportlab.lib.pdfencrypt import padding
 
@@ -42,17 +40,35 @@ from tkcalendar import Calendar, DateEntry
 from PIL import Image, ImageTk
 
 # Importa `datetime` para manipulação e formatação de datas e horas
-from datetime import datetime
+# `timedelta` é usado para montar intervalos de datas nas consultas.
+from datetime import datetime, timedelta
+
+# Importa `bisect_right` para localizar faixas horárias na tabela de tarifas
+from bisect import bisect_right
 
 # Importa o cliente `MongoClient` para conectar-se a um
 #       banco de dados MongoDB
 from pymongo import MongoClient, version_tuple
 
+# Importa as operações de escrita em lote usadas no provisionamento de vagas
+from pymongo import InsertOne, DeleteMany, UpdateOne
+
+import os
+import sys
+
+# O manifesto `indices_mongodb.py` (pasta pai) define os índices das vagas e reservas.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indices_mongodb import aplicar_indices
+
 # Importa `ObjectId` para manipular identificadores únicos no MongoDB
 from bson import ObjectId
 
-# Importa `pandas` para manipulação e análise de dados em DataFrames
-import pandas as pd
+# Importa o `xlsxwriter`, usado no modo `constant_memory` para
+#       exportar o relatório de reservas em streaming.
+import xlsxwriter
+
+# Importa `threading` para gerar a exportação do relatório sem travar a janela.
+import threading
 
 # -------------------------------------------------------------------------
 # Conexão MongoDB
@@ -97,6 +113,290 @@ colecao_vagas = db["vagas"]
 #       registros de reservas de vagas feitas pelos clientes.
 colecao_reservas = db["reservas"]
 
+# Cria ou acessa a coleção "tarifas", onde ficam as regras de cobrança
+#       (valor por hora, faixas horárias e teto diário) de cada bloco.
+colecao_tarifas = db["tarifas"]
+
+# Cria os índices declarados no manifesto para este sistema.
+aplicar_indices(db, "projeto12")
+
+
+# ---------------------------------------------------------------------
+# Datas nativas das reservas
+# ---------------------------------------------------------------------
+# As reservas guardam `data_entrada`/`data_saida` como texto "dd/mm/aaaa",
+#       usado para exibição. Ao lado deles ficam os campos `dt_entrada` e
+#       `dt_saida`, do tipo `datetime`, sobre os quais o MongoDB aplica os
+#       filtros de intervalo usando índice (em vez de converter cada
+#       documento com `strptime` no Python).
+
+# Converte a data "dd/mm/aaaa" e a hora "HH:MM" de uma reserva em `datetime`.
+# Se a hora estiver vazia ou inválida, considera o início do dia.
+# Retorna `None` quando a data não puder ser interpretada.
+def converter_data_reserva(data_str, hora_str=""):
+
+    try:
+        dt = datetime.strptime(data_str, "%d/%m/%Y")
+    except (TypeError, ValueError):
+        return None
+
+    try:
+        hora = datetime.strptime(hora_str, "%H:%M").time()
+    except (TypeError, ValueError):
+        return dt
+
+    return datetime.combine(dt.date(), hora)
+
+
+# Monta o filtro de intervalo (dias inteiros) para um campo `datetime`.
+# `data_ini` e `data_fim` são objetos `date` (ou `None` para deixar o
+#       intervalo aberto); o dia final é incluído no intervalo.
+def intervalo_de_datas(data_ini, data_fim):
+
+    intervalo = {}
+
+    if data_ini:
+        intervalo["$gte"] = datetime(data_ini.year, data_ini.month, data_ini.day)
+
+    if data_fim:
+        intervalo["$lt"] = datetime(data_fim.year, data_fim.month, data_fim.day) + timedelta(days=1)
+
+    return intervalo
+
+
+# Migração única: preenche `dt_entrada`/`dt_saida` nas reservas antigas,
+#       que só possuem as datas em texto.
+# É idempotente: só visita reservas sem `dt_entrada` (consulta atendida
+#       pelo índice do campo) e grava tudo em um único `bulk_write`.
+# Reservas com data de entrada inválida recebem `dt_entrada = False`
+#       para não serem revisitadas a cada inicialização.
+def migrar_datas_reservas():
+
+    operacoes = []
+
+    campos = {"data_entrada": 1, "hora_entrada": 1, "data_saida": 1, "hora_saida": 1}
+
+    for r in colecao_reservas.find({"dt_entrada": None}, campos):
+
+        dt_entrada = converter_data_reserva(r.get("data_entrada"), r.get("hora_entrada"))
+
+        novos = {"dt_entrada": dt_entrada if dt_entrada else False}
+
+        dt_saida = converter_data_reserva(r.get("data_saida"), r.get("hora_saida"))
+
+        if dt_saida:
+            novos["dt_saida"] = dt_saida
+
+        operacoes.append(UpdateOne({"_id": r["_id"]}, {"$set": novos}))
+
+    if operacoes:
+        colecao_reservas.bulk_write(operacoes, ordered=False)
+
+    return len(operacoes)
+
+
+# Executa a migração ao iniciar o sistema (sem efeito se já concluída).
+migrar_datas_reservas()
+
+
+
+# ---------------------------------------------------------------------
+# Motor de tarifas
+# ---------------------------------------------------------------------
+# As regras de cobrança ficam na coleção "tarifas", um documento por bloco
+#       (o bloco "*" vale para os blocos sem regra própria):
+#
+#   {"bloco": "*", "valor_hora": 8.0, "teto_diario": None,
+#    "faixas": [{"inicio": "22:00", "fim": "06:00", "valor_hora": 5.0}]}
+#
+# - "valor_hora": valor cobrado nos horários fora das faixas.
+# - "faixas": horários com valor próprio (diurno/noturno, pico, etc.);
+#       uma faixa com "inicio" maior que "fim" atravessa a meia-noite.
+# - "teto_diario": valor máximo cobrado por dia do calendário (opcional).
+#
+# Ao iniciar, cada regra é compilada em uma tabela de intervalos do dia
+#       com o custo acumulado em cada limite. Assim o valor de qualquer
+#       estadia é calculado em memória, com poucas buscas binárias, sem
+#       consultar o banco a cada cálculo.
+
+# Minutos em um dia, o limite final das tabelas de tarifa.
+MINUTOS_DIA = 24 * 60
+
+# Regra usada quando a coleção ainda não possui nenhuma tarifa:
+#       R$ 8,00 por hora, sem faixas nem teto diário.
+TARIFA_PADRAO = {"bloco": "*", "valor_hora": 8.0, "teto_diario": None, "faixas": []}
+
+# Tabelas compiladas, por bloco, preenchidas por `carregar_tarifas()`.
+tabelas_tarifas = {}
+
+
+# Converte "HH:MM" na quantidade de minutos desde a meia-noite.
+def minutos_de_horario(horario):
+
+    horas, minutos = horario.split(":")
+
+    return int(horas) * 60 + int(minutos)
+
+
+# Compila uma regra de tarifa em uma tabela de intervalos do dia.
+# A tabela contém os limites dos intervalos (em minutos), o valor por
+#       minuto de cada intervalo e o custo acumulado até cada limite.
+def compilar_tarifa(regra):
+
+    # Valor por minuto de cada minuto do dia; as faixas são aplicadas em
+    #       ordem, de modo que uma faixa posterior prevalece sobre a anterior.
+    por_minuto = [float(regra.get("valor_hora", 0.0)) / 60.0] * MINUTOS_DIA
+
+    for faixa in regra.get("faixas", []):
+
+        inicio = minutos_de_horario(faixa["inicio"])
+        fim = minutos_de_horario(faixa["fim"])
+        valor = float(faixa["valor_hora"]) / 60.0
+
+        # Faixa que atravessa a meia-noite vira dois trechos no mesmo dia.
+        trechos = [(inicio, fim)] if inicio < fim else [(inicio, MINUTOS_DIA), (0, fim)]
+
+        for ini, fi in trechos:
+            por_minuto[ini:fi] = [valor] * (fi - ini)
+
+    # Agrupa minutos consecutivos de mesmo valor em intervalos.
+    limites = []
+    valores = []
+
+    for minuto, valor in enumerate(por_minuto):
+        if not valores or valores[-1] != valor:
+            limites.append(minuto)
+            valores.append(valor)
+
+    # Custo acumulado desde a meia-noite até o início de cada intervalo.
+    acumulado = [0.0]
+
+    for i in range(1, len(limites)):
+        acumulado.append(acumulado[-1] + (limites[i] - limites[i - 1]) * valores[i - 1])
+
+    tabela = {
+        "limites": limites,
+        "valores": valores,
+        "acumulado": acumulado,
+        "teto_diario": regra.get("teto_diario"),
+    }
+
+    # Valor de um dia inteiro, já limitado pelo teto, usado nas estadias longas.
+    tabela["dia_inteiro"] = custo_no_dia(tabela, 0, MINUTOS_DIA)
+
+    return tabela
+
+
+# Custo acumulado na tabela desde a meia-noite até o minuto `minuto`.
+def custo_ate(tabela, minuto):
+
+    i = bisect_right(tabela["limites"], minuto) - 1
+
+    return tabela["acumulado"][i] + (minuto - tabela["limites"][i]) * tabela["valores"][i]
+
+
+# Custo de permanecer do minuto `inicio` ao minuto `fim` de um mesmo dia,
+#       limitado pelo teto diário, quando houver.
+def custo_no_dia(tabela, inicio, fim):
+
+    custo = custo_ate(tabela, fim) - custo_ate(tabela, inicio)
+
+    if tabela["teto_diario"]:
+        custo = min(custo, float(tabela["teto_diario"]))
+
+    return custo
+
+
+# Lê as regras da coleção "tarifas" e recompila as tabelas em memória.
+# Se não existir a regra geral (bloco "*"), ela é criada com `TARIFA_PADRAO`.
+def carregar_tarifas():
+
+    colecao_tarifas.update_one({"bloco": "*"},
+                               {"$setOnInsert": dict(TARIFA_PADRAO)},
+                               upsert=True)
+
+    novas = {}
+
+    for regra in colecao_tarifas.find({}, {"_id": 0}):
+        novas[regra["bloco"]] = compilar_tarifa(regra)
+
+    # Troca as tabelas de uma vez, sem deixar o dicionário pela metade.
+    tabelas_tarifas.clear()
+    tabelas_tarifas.update(novas)
+
+
+# Calcula o valor de uma estadia no bloco `bloco`, entre os `datetime`
+#       `dt_ent` e `dt_sai`, usando apenas as tabelas em memória.
+# Cada dia do calendário é cobrado separadamente e limitado pelo teto diário.
+def calcular_valor_estadia(bloco, dt_ent, dt_sai):
+
+    if dt_sai <= dt_ent:
+        return 0.0
+
+    tabela = tabelas_tarifas.get(bloco) or tabelas_tarifas["*"]
+
+    min_ent = dt_ent.hour * 60 + dt_ent.minute + dt_ent.second / 60.0
+    min_sai = dt_sai.hour * 60 + dt_sai.minute + dt_sai.second / 60.0
+
+    dias = (dt_sai.date() - dt_ent.date()).days
+
+    # Entrada e saída no mesmo dia.
+    if dias == 0:
+        return round(custo_no_dia(tabela, min_ent, min_sai), 2)
+
+    # Primeiro dia (da entrada até a meia-noite), dias inteiros
+    #       intermediários e último dia (da meia-noite até a saída).
+    valor = (custo_no_dia(tabela, min_ent, MINUTOS_DIA)
+             + (dias - 1) * tabela["dia_inteiro"]
+             + custo_no_dia(tabela, 0, min_sai))
+
+    return round(valor, 2)
+
+
+# Recalcula, com as tarifas atuais, o faturamento das reservas finalizadas
+#       cuja entrada está entre `data_ini` e `data_fim` (objetos `date`).
+# O preço de cada estadia é calculado em memória e apenas somado: o
+#       `valor_total` gravado é o valor já cobrado do cliente e não é alterado.
+# Retorna a tupla (reservas analisadas, reservas cujo valor recalculado
+#       difere do cobrado, faturamento cobrado, faturamento recalculado).
+def recalcular_faturamento(data_ini, data_fim):
+
+    filtro = {"dt_entrada": intervalo_de_datas(data_ini, data_fim),
+              "status": "Finalizado"}
+
+    campos = {"bloco": 1, "dt_entrada": 1, "dt_saida": 1, "valor_total": 1}
+
+    analisadas = 0
+    divergentes = 0
+    faturamento_cobrado = 0.0
+    faturamento_recalculado = 0.0
+
+    for r in colecao_reservas.find(filtro, campos):
+
+        analisadas += 1
+
+        cobrado = r.get("valor_total", 0)
+        cobrado = cobrado if isinstance(cobrado, (int, float)) else 0
+
+        faturamento_cobrado += cobrado
+
+        # Reservas sem data de saída válida entram com o valor cobrado.
+        if not isinstance(r.get("dt_saida"), datetime):
+            faturamento_recalculado += cobrado
+            continue
+
+        valor = calcular_valor_estadia(r.get("bloco"), r["dt_entrada"], r["dt_saida"])
+        faturamento_recalculado += valor
+
+        if valor != cobrado:
+            divergentes += 1
+
+    return analisadas, divergentes, round(faturamento_cobrado, 2), round(faturamento_recalculado, 2)
+
+
+# Compila as tarifas ao iniciar o sistema.
+carregar_tarifas()
+
 
 
 # Define a função `centralizar_janela` que centraliza uma janela na tela.
@@ -622,6 +922,94 @@ def tela_dashboard():
 
 
 
+# -------------------------------------------------------------------------
+# Consulta paginada do relatório de reservas
+# -------------------------------------------------------------------------
+
+# Quantidade de reservas trazidas do MongoDB em cada página do relatório.
+TAMANHO_PAGINA_RELATORIO = 200
+
+# Intervalo (ms) com que a tela de relatório confere o fim da exportação.
+INTERVALO_EXPORTACAO_MS = 100
+
+# O relatório só lista reservas com `dt_entrada` do tipo data: as marcadas
+#       com `False` por migrar_datas_reservas() ficariam fora da ordem da
+#       paginação (booleanos vêm antes das datas no MongoDB) e a chave
+#       `(False, _id)` encerraria a listagem na primeira página.
+SO_DATA_ENTRADA_VALIDA = {"dt_entrada": {"$type": "date"}}
+
+
+# Busca uma página de reservas que atendem a `query`, em ordem cronológica.
+# A paginação é por chave (keyset): `apos` é a chave (dt_entrada, _id) da
+#       última reserva da página anterior e a consulta continua a partir
+#       dela pelo índice, sem `skip` (que fica mais lento a cada página).
+# Retorna a lista de documentos e a chave da próxima página, ou `None`
+#       quando não há mais reservas.
+def buscar_pagina_reservas(query, apos=None, tamanho=TAMANHO_PAGINA_RELATORIO):
+
+    condicoes = [query, SO_DATA_ENTRADA_VALIDA]
+
+    # Continua exatamente depois da última reserva já carregada; o `_id`
+    #       desempata reservas com a mesma data e hora de entrada.
+    if apos:
+        dt_apos, id_apos = apos
+        condicoes.append({"$or": [
+            {"dt_entrada": {"$gt": dt_apos}},
+            {"dt_entrada": dt_apos, "_id": {"$gt": id_apos}},
+        ]})
+
+    filtro = {"$and": condicoes}
+
+    pagina = list(colecao_reservas.find(filtro)
+                  .sort([("dt_entrada", 1), ("_id", 1)])
+                  .limit(tamanho))
+
+    # Uma página incompleta indica que o resultado terminou.
+    if len(pagina) < tamanho:
+        return pagina, None
+
+    ultima = pagina[-1]
+
+    return pagina, (ultima["dt_entrada"], ultima["_id"])
+
+
+# Percorre todas as reservas de `query`, página por página, sem manter
+#       o resultado completo em memória (usado na exportação).
+def percorrer_reservas(query, tamanho=TAMANHO_PAGINA_RELATORIO):
+
+    apos = None
+
+    while True:
+
+        pagina, apos = buscar_pagina_reservas(query, apos, tamanho)
+
+        for doc in pagina:
+            yield doc
+
+        if apos is None:
+            return
+
+
+# Calcula no servidor, com uma agregação `$group`, a quantidade de
+#       reservas de `query` e a soma dos seus valores totais (as mesmas
+#       reservas listadas por buscar_pagina_reservas()).
+# Retorna a tupla (quantidade, soma_valor).
+def totalizar_reservas(query):
+
+    resultado = list(colecao_reservas.aggregate([
+        {"$match": {"$and": [query, SO_DATA_ENTRADA_VALIDA]}},
+        {"$group": {"_id": None,
+                    "quantidade": {"$sum": 1},
+                    "soma_valor": {"$sum": "$valor_total"}}}
+    ]))
+
+    if not resultado:
+        return 0, 0.0
+
+    return resultado[0]["quantidade"], resultado[0]["soma_valor"]
+
+
+
 # -------------------------------------------------------------------------
 # Tela de Relatório (Treeview + Filtros)
 # -------------------------------------------------------------------------
@@ -845,11 +1233,17 @@ def tela_relatorio(parent):
     #       serão exibidas por vez.
     tv = ttk.Treeview(frame_tv, columns=colunas, show="headings", height=20)
 
+    # Cria a barra de rolagem vertical da tabela.
+    # As páginas seguintes do relatório são carregadas conforme o
+    #       usuário rola a tabela (ver `ao_rolar_tabela`).
+    barra_rolagem = ttk.Scrollbar(frame_tv, orient="vertical", command=tv.yview)
+    barra_rolagem.pack(side="right", fill="y")
+
     # Posiciona a tabela na interface gráfica.
     # `fill="both"` permite que a tabela expanda tanto na horizontal
     #       quanto na vertical, ocupando todo o espaço disponível.
     # `expand=True` faz com que a tabela cresça conforme o espaço da interface.
-    tv.pack(fill="both", expand=True)
+    tv.pack(side="left", fill="both", expand=True)
 
     # Loop para configurar cada coluna definida na tabela.
     for c in colunas:
@@ -868,6 +1262,132 @@ def tela_relatorio(parent):
     #       para 50 pixels, economizando espaço.
     tv.column("id", width=50)
 
+    # Rótulo com o total de reservas e a soma dos valores do filtro atual.
+    # Os totais vêm de uma agregação no servidor, e não das linhas
+    #       já carregadas na tabela.
+    lbl_resumo = ttk.Label(frame_main,
+                           text="Total de reservas: 0   |   Soma Valor: R$ 0,00")
+    lbl_resumo.pack(pady=5)
+
+    # Estado da consulta paginada exibida na tabela.
+    # - "query": filtro aplicado por último.
+    # - "apos": chave (dt_entrada, _id) da última reserva carregada.
+    # - "fim": indica que todas as páginas já foram carregadas.
+    # - "carregando": evita buscar a mesma página duas vezes durante a rolagem.
+    # - "agendada": já existe uma carga de página na fila do Tkinter.
+    # - "exportando": uma exportação está em andamento.
+    estado_relatorio = {"query": None, "apos": None, "fim": True, "carregando": False,
+                        "agendada": False, "exportando": False}
+
+
+    # Formata um valor no padrão monetário brasileiro.
+    # Valores não numéricos são exibidos como "0,00".
+    def formatar_valor(valor):
+
+        # Verifica se o valor obtido é um número inteiro (int) ou
+        #       de ponto flutuante (float).
+        # Isso garante que o valor pode ser formatado corretamente.
+        if isinstance(valor, (int, float)):
+
+            # Formata o valor para exibição no formato monetário brasileiro.
+            # `f"{valor:,.2f}"` formata o número com duas casas decimais e separadores de milhar.
+            # `.replace(",", "X").replace(".", ",").replace("X", ".")` ajusta a formatação
+            # para seguir o padrão brasileiro (ponto como separador de
+            #       milhar e vírgula como decimal).
+            return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+        # Caso o valor não seja numérico, define "0,00"
+        #       como valor padrão para exibição.
+        return "0,00"
+
+
+    # Monta a tupla de valores de uma reserva, na ordem de `colunas`.
+    # É usada tanto para a tabela quanto para a exportação.
+    def valores_linha(d):
+
+        return (
+
+            # Converte o identificador único (_id) para string
+            #       antes de inseri-lo na tabela.
+            str(d["_id"]),
+
+            # CPF e nome do cliente associado à reserva.
+            d.get("cliente_cpf", ""),
+            d.get("cliente_nome", ""),
+
+            # Placa e modelo do veículo associado à reserva.
+            d.get("veiculo_placa", ""),
+            d.get("veiculo_modelo", ""),
+
+            # Data e hora de entrada da reserva.
+            d.get("data_entrada", ""),
+            d.get("hora_entrada", ""),
+
+            # Data e hora de saída da reserva.
+            d.get("data_saida", ""),
+            d.get("hora_saida", ""),
+
+            # Bloco e número da vaga reservada.
+            d.get("bloco", ""),
+            d.get("numero_vaga", ""),
+
+            # Status atual da reserva.
+            # O status pode ser "Reservado", "Finalizado", "Cancelado" ou "Ocupada".
+            d.get("status", ""),
+
+            # Valor monetário corretamente formatado.
+            formatar_valor(d.get("valor_total", 0))
+
+        )
+
+
+    # Carrega a próxima página do filtro atual e a acrescenta à tabela.
+    def carregar_pagina():
+
+        estado_relatorio["agendada"] = False
+
+        # Nada a carregar: sem filtro aplicado, resultado completo
+        #       ou uma página já em carregamento.
+        if estado_relatorio["fim"] or estado_relatorio["carregando"]:
+            return
+
+        estado_relatorio["carregando"] = True
+
+        try:
+
+            pagina, apos = buscar_pagina_reservas(estado_relatorio["query"],
+                                                  estado_relatorio["apos"])
+
+            # Insere os dados processados na Treeview (`tv`), que representa a tabela de exibição.
+            # O comando `tv.insert("", END, values=(...))` adiciona uma
+            #       nova linha ao final da tabela.
+            for d in pagina:
+                tv.insert("", END, values=valores_linha(d))
+
+            estado_relatorio["apos"] = apos
+            estado_relatorio["fim"] = apos is None
+
+        finally:
+            estado_relatorio["carregando"] = False
+
+
+    # Recebe as mudanças de posição da tabela (`yscrollcommand`).
+    # Atualiza a barra de rolagem e, quando a parte visível chega
+    #       perto do fim das linhas carregadas, agenda a próxima página.
+    # Isso também preenche a tabela enquanto as linhas não ocupam a
+    #       área visível inteira.
+    # Inserir uma página dispara este retorno de novo; com "agendada", só
+    #       uma carga fica na fila por vez, e a seguinte só é pedida se a
+    #       tabela continuar perto do fim depois dela.
+    def ao_rolar_tabela(primeiro, ultimo):
+
+        barra_rolagem.set(primeiro, ultimo)
+
+        if float(ultimo) >= 0.9 and not estado_relatorio["fim"] and not estado_relatorio["agendada"]:
+            estado_relatorio["agendada"] = True
+            janela.after_idle(carregar_pagina)
+
+    tv.configure(yscrollcommand=ao_rolar_tabela)
 
 
     # Define a função `filtrar()` para aplicar filtros e atualizar os dados na tabela.
@@ -901,16 +1421,19 @@ def tela_relatorio(parent):
         di_ = date_ini.get_date()
         df_ = date_fim.get_date()
 
-        # Se o usuário não alterar as datas, o DateEntry
-        #       automaticamente define o dia atual.
-        # Convertendo as datas para string no formato `dd/mm/yyyy`.
-        di_str = di_.strftime("%d/%m/%Y") if di_ else ""
-        df_str = df_.strftime("%d/%m/%Y") if df_ else ""
-
         # Inicializa um dicionário `query` vazio que será
         #       preenchido com os filtros escolhidos.
         query = {}
 
+        # O intervalo de datas é aplicado pelo próprio MongoDB sobre o
+        #       campo nativo `dt_entrada`, que possui índice.
+        # Se o usuário não alterar as datas, o DateEntry
+        #       automaticamente define o dia atual.
+        intervalo = intervalo_de_datas(di_, df_)
+
+        if intervalo:
+            query["dt_entrada"] = intervalo
+
         # Verifica se o campo CPF foi preenchido pelo usuário.
         # Se `cpf_` não estiver vazio, adiciona um filtro na query.
         # `"cliente_cpf": cpf_` filtra apenas reservas do cliente com esse CPF.
@@ -935,221 +1458,160 @@ def tela_relatorio(parent):
         if st_:
             query["status"] = st_
 
-        # Executa a busca na coleção `colecao_reservas` com os filtros aplicados.
-        # `list(colecao_reservas.find(query))` retorna todos os
-        #       documentos que correspondem aos filtros.
-        docs = list(colecao_reservas.find(query))
+        # Guarda o filtro e reinicia a paginação.
+        # Apenas a primeira página é buscada agora; as demais são
+        #       carregadas conforme a tabela é rolada.
+        estado_relatorio.update(query=query, apos=None, fim=False)
 
-        # Inicializa a lista `results` para armazenar os registros
-        #       finais após a filtragem por data.
-        results = []
+        # Totais do filtro inteiro calculados no servidor.
+        quantidade, soma_valor = totalizar_reservas(query)
 
-        # Percorre todos os documentos retornados da
-        #       consulta `colecao_reservas.find(query)`.
-        for r in docs:
-
-            # Obtém a data de entrada da reserva do dicionário `r`.
-            # Se a chave "data_entrada" não existir, retorna uma string vazia `""`.
-            dtent = r.get("data_entrada", "")
-
-            try:
-
-                # Tenta converter a string da data de entrada (`dtent`)
-                #       para um objeto `datetime`.
-                # O formato esperado é `"%d/%m/%Y"` (exemplo: "25/02/2024").
-                dtobj = datetime.strptime(dtent, "%d/%m/%Y")
-
-                # Extrai apenas a parte da data (sem horário) para
-                #       comparações futuras.
-                dtdate = dtobj.date()
-
-            except:
-
-                # Se ocorrer um erro na conversão (formato inválido ou string vazia),
-                # define `dtobj` e `dtdate` como `None` para evitar
-                #       falhas nas comparações.
-                dtobj = None
-                dtdate = None
-
-            # Filtro data início/fim
-            # Inicializa a variável `ok` como `True`. Se alguma condição de
-            #       filtro não for atendida, ela será alterada para `False`.
-            ok = True
+        lbl_resumo.config(
+            text=f"Total de reservas: {quantidade}   |   Soma Valor: R$ {formatar_valor(soma_valor)}")
 
-            # Se a string `di_str` (data de início) não estiver vazia,
-            #       converte para `date` e filtra as datas menores.
-            if di_str:
+        carregar_pagina()
 
-                # Converte a string `di_str` para um objeto `date` (`diobj`) no
-                #       formato `"%d/%m/%Y"`.
-                diobj = datetime.strptime(di_str, "%d/%m/%Y").date()
 
-                # Se `dtdate` (data da reserva) existir e for menor que a
-                #       data de início (`diobj`), marca `ok` como `False` para excluir esse registro.
-                if dtdate and dtdate < diobj:
-                    ok = False
-
-            # Se a string `df_str` (data de fim) não estiver vazia, converte
-            #       para `date` e filtra as datas maiores.
-            if df_str:
-
-                # Converte a string `df_str` para um objeto `date` (`dfobj`) no formato `"%d/%m/%Y"`.
-                dfobj = datetime.strptime(df_str, "%d/%m/%Y").date()
-
-                # Se `dtdate` (data da reserva) existir e for maior que a
-                #       data de fim (`dfobj`), marca `ok` como `False` para excluir esse registro.
-                if dtdate and dtdate > dfobj:
-                    ok = False
-
-            # Se `ok` ainda for `True`, significa que a reserva passou por todos os
-            #       filtros e deve ser adicionada à lista `results`.
-            if ok:
-                results.append(r)
-
-        # Percorre cada item da lista de resultados para processar e
-        #       formatar os valores antes da exibição.
-        for d in results:
-
-            # Obtém o valor total da reserva a partir do dicionário.
-            # `d.get("valor_total", 0)` verifica se existe o campo "valor_total".
-            # Caso o campo não exista, assume 0 como valor padrão.
-            valor = d.get("valor_total", 0)
-
-            # Verifica se o valor obtido é um número inteiro (int) ou
-            #       de ponto flutuante (float).
-            # Isso garante que o valor pode ser formatado corretamente.
-            if isinstance(valor, (int, float)):
+    # Define a função `limpar_`, que é responsável por limpar os
+    #       campos de entrada e resetar os filtros.
+    def limpar_():
 
-                # Formata o valor para exibição no formato monetário brasileiro.
-                # `f"{valor:,.2f}"` formata o número com duas casas decimais e separadores de milhar.
-                # `.replace(",", "X").replace(".", ",").replace("X", ".")` ajusta a formatação
-                # para seguir o padrão brasileiro (ponto como separador de
-                #       milhar e vírgula como decimal).
-                valor_formatado = f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        # Apaga o conteúdo do campo de entrada do CPF.
+        entry_cpf.delete(0, END)
 
-            else:
+        # Apaga o conteúdo do campo de entrada da placa do veículo.
+        entry_placa.delete(0, END)
 
-                # Caso o valor não seja numérico, define "0,00"
-                #       como valor padrão para exibição.
-                valor_formatado = "0,00"
+        # Apaga o conteúdo do campo de entrada do bloco.
+        entry_bloco.delete(0, END)
 
-            # Insere os dados processados na Treeview (`tv`), que representa a tabela de exibição.
-            # O comando `tv.insert("", END, values=(...))` adiciona uma
-            #       nova linha ao final da tabela.
-            tv.insert("", END, values=(
+        # Reseta a seleção do campo de status para um valor vazio.
+        combo_st.set("")
 
-                # Converte o identificador único (_id) para string
-                #       antes de inseri-lo na tabela.
-                str(d["_id"]),
+        # Reseta os campos de seleção de data para a data atual.
+        date_ini.set_date(datetime.now())  # Define a data inicial como hoje.
+        date_fim.set_date(datetime.now())  # Define a data final como hoje.
 
-                # Obtém e insere o CPF do cliente associado à reserva.
-                # Se não houver CPF no documento, insere uma string vazia.
-                d.get("cliente_cpf", ""),
+        # Remove todas as linhas da Treeview (`tv`), limpando
+        #       completamente a tabela de exibição.
+        tv.delete(*tv.get_children())
 
-                # Obtém e insere o nome do cliente.
-                # Se o nome não existir no documento, insere uma string vazia.
-                d.get("cliente_nome", ""),
+        # Descarta o filtro aplicado e zera os totais.
+        estado_relatorio.update(query=None, apos=None, fim=True)
+        lbl_resumo.config(text="Total de reservas: 0   |   Soma Valor: R$ 0,00")
 
-                # Obtém e insere a placa do veículo associado à reserva.
-                # Se não houver placa registrada, insere uma string vazia.
-                d.get("veiculo_placa", ""),
 
-                # Obtém e insere o modelo do veículo.
-                # Se não houver modelo no documento, insere uma string vazia.
-                d.get("veiculo_modelo", ""),
+    # Define a função `exportar_excel`, que exporta as reservas do
+    #       filtro atual para um arquivo Excel.
+    def exportar_excel():
 
-                # Obtém e insere a data de entrada da reserva.
-                # Se não houver data registrada, insere uma string vazia.
-                d.get("data_entrada", ""),
+        # Sem filtro aplicado não há o que exportar.
+        if estado_relatorio["query"] is None:
+            messagebox.showwarning("Aviso",
+                                   "Aplique um filtro antes de exportar.",
+                                   parent=janela)
+            return
 
-                # Obtém e insere a hora de entrada da reserva.
-                # Se não houver hora registrada, insere uma string vazia.
-                d.get("hora_entrada", ""),
+        # Uma exportação por vez (ambas gravariam o mesmo arquivo).
+        if estado_relatorio["exportando"]:
+            messagebox.showinfo("Aguarde",
+                                "A exportação anterior ainda está em andamento.",
+                                parent=janela)
+            return
 
-                # Obtém e insere a data de saída da reserva.
-                # Se não houver data de saída registrada, insere uma string vazia.
-                d.get("data_saida", ""),
+        estado_relatorio["exportando"] = True
 
-                # Obtém e insere a hora de saída da reserva.
-                # Se não houver hora de saída registrada, insere uma string vazia.
-                d.get("hora_saida", ""),
+        # Resultado da thread de exportação: linhas gravadas ou o erro.
+        exportacao = {"fim": False, "linhas": 0, "erro": None}
 
-                # Obtém e insere o bloco onde a vaga está localizada.
-                # Se não houver informação do bloco, insere uma string vazia.
-                d.get("bloco", ""),
+        # Grava a planilha fora da thread da interface.
+        # No modo `constant_memory` o xlsxwriter grava cada linha em
+        #       disco assim que a próxima começa, e as reservas são lidas
+        #       do MongoDB página por página: o relatório inteiro nunca fica
+        #       em memória, nem na tabela nem na exportação.
+        def gravar(query):
 
-                # Obtém e insere o número da vaga associada à reserva.
-                # Se não houver número de vaga registrado, insere uma string vazia.
-                d.get("numero_vaga", ""),
+            try:
 
-                # Obtém e insere o status atual da reserva.
-                # O status pode ser "Reservado", "Finalizado", "Cancelado" ou "Ocupada".
-                # Se não houver status registrado, insere uma string vazia.
-                d.get("status", ""),
+                wb = xlsxwriter.Workbook("relatorio.xlsx", {"constant_memory": True})
+                ws = wb.add_worksheet("Relatório")
 
-                # Usa a variável `valor_formatado` para inserir o
-                #       valor monetário corretamente formatado.
-                valor_formatado
+                # Primeira linha com os nomes das colunas.
+                ws.write_row(0, 0, colunas)
 
-            ))
+                # Exporta todas as reservas do filtro, não apenas as já carregadas na tabela.
+                for linha, d in enumerate(percorrer_reservas(query), start=1):
+                    ws.write_row(linha, 0, valores_linha(d))
+                    exportacao["linhas"] = linha
 
+                # Fecha a pasta de trabalho, concluindo o arquivo "relatorio.xlsx".
+                wb.close()
 
-    # Define a função `limpar_`, que é responsável por limpar os
-    #       campos de entrada e resetar os filtros.
-    def limpar_():
+            except Exception as e:
+                exportacao["erro"] = e
 
-        # Apaga o conteúdo do campo de entrada do CPF.
-        entry_cpf.delete(0, END)
+            finally:
+                exportacao["fim"] = True
 
-        # Apaga o conteúdo do campo de entrada da placa do veículo.
-        entry_placa.delete(0, END)
+        # Confere o andamento na thread do Tkinter, que é a única que
+        #       pode mexer nos widgets e exibir mensagens.
+        def acompanhar():
 
-        # Apaga o conteúdo do campo de entrada do bloco.
-        entry_bloco.delete(0, END)
+            # A janela foi fechada: a exportação termina sem avisos.
+            if not janela.winfo_exists():
+                return
 
-        # Reseta a seleção do campo de status para um valor vazio.
-        combo_st.set("")
+            if not exportacao["fim"]:
+                janela.after(INTERVALO_EXPORTACAO_MS, acompanhar)
+                return
 
-        # Reseta os campos de seleção de data para a data atual.
-        date_ini.set_date(datetime.now())  # Define a data inicial como hoje.
-        date_fim.set_date(datetime.now())  # Define a data final como hoje.
+            estado_relatorio["exportando"] = False
 
-        # Remove todas as linhas da Treeview (`tv`), limpando
-        #       completamente a tabela de exibição.
-        tv.delete(*tv.get_children())
+            if exportacao["erro"] is not None:
+                messagebox.showerror("Erro",
+                                     f"Falha ao exportar o relatório: {exportacao['erro']}",
+                                     parent=janela)
+                return
 
+            # Exibe uma mensagem de sucesso informando que o relatório foi exportado.
+            # O parâmetro `parent=janela` define que o alerta será
+            #       exibido dentro da janela principal.
+            messagebox.showinfo("Exportado",
+                                f"{exportacao['linhas']} reservas exportadas para relatorio.xlsx",
+                                parent=janela)
 
-    # Define a função `exportar_excel`, que exporta os dados da
-    #       tabela (Treeview) para um arquivo Excel.
-    def exportar_excel():
+        threading.Thread(target=gravar, args=(estado_relatorio["query"],), daemon=True).start()
+        janela.after(INTERVALO_EXPORTACAO_MS, acompanhar)
 
-        # Cria uma lista vazia para armazenar as linhas da tabela.
-        rows = []
 
-        # Percorre todos os itens (linhas) da Treeview.
-        for item_id in tv.get_children():
+    # Define a função `recalcular_valores`, que recalcula com as tarifas
+    #       atuais o faturamento das reservas finalizadas no período
+    #       selecionado, sem alterar os valores já cobrados.
+    def recalcular_valores():
 
-            # Obtém os valores de cada linha.
-            rowvals = tv.item(item_id, "values")
+        di_ = date_ini.get_date()
+        df_ = date_fim.get_date()
 
-            # Adiciona os valores obtidos à lista de linhas.
-            rows.append(rowvals)
+        if not messagebox.askyesno(
+                "Confirmação",
+                f"Recalcular com as tarifas atuais o faturamento das reservas "
+                f"finalizadas entre {di_.strftime('%d/%m/%Y')} e {df_.strftime('%d/%m/%Y')}?\n"
+                f"Os valores cobrados não serão alterados.",
+                parent=janela):
+            return
 
-        # `rows` agora contém todas as linhas da tabela como uma lista de tuplas.
-        # Criamos um DataFrame do Pandas usando os dados coletados.
-        df = pd.DataFrame(rows, columns=colunas)
+        # Relê as regras, para considerar tarifas alteradas no banco.
+        carregar_tarifas()
 
-        # Exportamos o DataFrame para um arquivo Excel chamado "relatorio.xlsx".
-        # O parâmetro `index=False` garante que o Pandas não
-        #       inclua uma coluna de índice no Excel.
-        df.to_excel("relatorio.xlsx", index=False)
+        analisadas, divergentes, cobrado, recalculado = recalcular_faturamento(di_, df_)
 
-        # Exibe uma mensagem de sucesso informando que o relatório foi exportado.
-        # O parâmetro `parent=janela` define que o alerta será
-        #       exibido dentro da janela principal.
-        messagebox.showinfo("Exportado",
-                            "Relatório exportado para relatorio.xlsx",
-                            parent=janela)
+        messagebox.showinfo(
+            "Recalculado",
+            f"Reservas analisadas: {analisadas}\n"
+            f"Reservas com valor diferente do cobrado: {divergentes}\n"
+            f"Faturamento cobrado: R$ {formatar_valor(cobrado)}\n"
+            f"Faturamento com as tarifas atuais: R$ {formatar_valor(recalculado)}",
+            parent=janela)
 
 
     # Cria um container (frame) para os botões dentro do frame principal.
@@ -1193,6 +1655,13 @@ def tela_relatorio(parent):
                style="MyButton.TButton",
                command=exportar_excel).pack(side="left", padx=10)
 
+    # Cria um botão para recalcular o faturamento do período
+    #       selecionado com as tarifas atuais.
+    ttk.Button(frame_btn,
+               text="Recalcular Valores",
+               style="MyButton.TButton",
+               command=recalcular_valores).pack(side="left", padx=10)
+
     # Ao abrir a tela, já carrega todos os dados disponíveis, sem filtro aplicado.
     # A função `filtrar()` é chamada automaticamente para preencher a tabela.
     filtrar()
@@ -1266,6 +1735,37 @@ def criar_estilo_geral(janela):
 # Mapa de Vagas (com Scrollbars, Calendar e filtragem por data e bloco)
 # -------------------------------------------------------------------------
 
+# Retorna a ocupação das vagas em uma data, em uma única consulta.
+# `data_sel`: data no formato "dd/mm/aaaa".
+# `bloco`: quando informado, limita a consulta a esse bloco.
+# O resultado é um dicionário {(bloco, numero_vaga): status}, onde status
+#       é "Ocupada" ou "Reservada"; vagas ausentes do dicionário estão livres.
+def obter_ocupacao_vagas(data_sel, bloco=None):
+
+    # Considera apenas as reservas ativas (reservadas ou ocupadas) da data,
+    #       buscando pelo intervalo do dia no campo nativo `dt_entrada`.
+    dia = converter_data_reserva(data_sel)
+
+    filtro = {"dt_entrada": intervalo_de_datas(dia, dia) if dia else None,
+              "status": {"$in": ["Reservado", "Ocupada"]}}
+
+    if bloco:
+        filtro["bloco"] = bloco
+
+    ocupacao = {}
+
+    # A projeção traz somente os campos necessários para montar o mapa.
+    for reserva in colecao_reservas.find(filtro, {"_id": 0, "bloco": 1, "numero_vaga": 1, "status": 1}):
+
+        chave = (reserva["bloco"], reserva["numero_vaga"])
+
+        # Se houver mais de uma reserva ativa para a vaga, "Ocupada" prevalece.
+        if reserva["status"] == "Ocupada" or chave not in ocupacao:
+            ocupacao[chave] = "Ocupada" if reserva["status"] == "Ocupada" else "Reservada"
+
+    return ocupacao
+
+
 # Define a função `tela_mapa_reservas()` que cria a
 #       interface para o mapa de reservas.
 # `janela_pai`: Parâmetro que representa a janela principal da
@@ -1443,299 +1943,129 @@ def tela_mapa_reservas(janela_pai):
     container_botoes.pack(pady=5)
 
 
+    # Estado do mapa exibido, preservado entre as atualizações.
+    # `botoes`: dicionário {(bloco, numero_vaga): botão} com os botões já criados.
+    # `status`: dicionário {(bloco, numero_vaga): status} com a cor exibida em cada botão.
+    # `layout`: lista ordenada das vagas exibidas; se não mudar, os
+    #       botões são reaproveitados e apenas recoloridos.
+    # `data`: data atualmente exibida, usada pelos botões ao serem clicados.
+    estado_mapa = {"botoes": {}, "status": {}, "layout": [], "data": None}
+
+    # Aparência de cada estado da vaga: (legenda, cor de fundo).
+    aparencia_status = {
+        "Ocupada": ("🟥 Ocupada", "#F44336"),  # Vermelho
+        "Reservada": ("🟡 Reservada", "#FFC107"),  # Amarelo
+        "Livre": ("🟩 Livre", "#4CAF50")  # Verde
+    }
+
+    # Cria o botão de uma vaga na posição informada do grid.
+    def criar_botao_vaga(bloco, numero_vaga, linha, coluna):
+
+        botao_vaga = tk.Button(frame_mapa,
+                               width=12,
+                               height=3,
+                               fg="white",
+                               font=("Arial", 10, "bold"),
+                               relief="raised",
+                               borderwidth=2,
+                               padx=5,
+                               pady=5,
+                               highlightbackground="#D1D1D1",
+                               activebackground="#616161")
+
+        # Ao clicar, abre o popup de ações da vaga para a data exibida no mapa.
+        # `carregar_mapa` é passado para recarregar o mapa após a ação.
+        def acao_vaga(bloco_vaga=bloco, num_vaga=numero_vaga):
+            popup_acoes_vaga_mapa(janela, bloco_vaga, num_vaga,
+                                  estado_mapa["data"], carregar_mapa)
+
+        botao_vaga.configure(command=acao_vaga)
+
+        # `padx=8` e `pady=8` adicionam espaçamento ao redor do botão.
+        botao_vaga.grid(row=linha, column=coluna, padx=8, pady=8)
+
+        return botao_vaga
+
     # Define a função carregar_mapa
-    # Essa função é responsável por carregar os dados do mapa de reservas,
-    # limpando os elementos anteriores e aplicando os filtros selecionados.
-    def carregar_mapa():
-
-        # Limpa o conteúdo anterior do mapa.
-        # `winfo_children()` retorna todos os widgets filhos do frame `frame_mapa`.
-        # `widget.destroy()` remove cada widget do frame,
-        #       limpando a área para o novo conteúdo.
-        for widget in frame_mapa.winfo_children():
-            widget.destroy()
-
-        # Pega a data selecionada no calendário.
-        # `calendario.get_date()` retorna a data que foi
-        #       selecionada no calendário,
-        #       no formato especificado (dd/MM/yyyy).
+    # Essa função é responsável por carregar os dados do mapa de reservas
+    #       aplicando os filtros selecionados.
+    # As reservas da data são lidas em UMA consulta (`obter_ocupacao_vagas`)
+    #       e, quando as vagas exibidas não mudam, apenas os botões cujo
+    #       estado mudou são recoloridos (sem destruir e recriar o mapa).
+    def carregar_mapa(event=None):
+
+        # Pega a data selecionada no calendário (formato dd/MM/yyyy).
         data_selecionada = calendario.get_date()
 
         # Pega o bloco selecionado no combobox de blocos.
-        # `var_bloco.get()` retorna o valor do bloco selecionado.
-        # `.strip()` remove espaços extras do início e fim da string
-        #       para garantir que o valor esteja limpo.
         bloco_selecionado = var_bloco.get().strip()
 
-        # Verifica se o valor selecionado para o bloco é "Todos"
-        # Se o valor selecionado for "Todos", a consulta ao banco de
-        #       dados irá retornar todas as vagas
-        #       que não têm o status "Removido". Isso é feito
-        #       utilizando a condição `{"status": {"$ne": "Removido"}}`,
-        #       onde `$ne` significa "não é igual a". Ou seja, a
-        #       consulta vai excluir qualquer vaga com status "Removido".
-        if bloco_selecionado == "Todos":
+        # Busca as vagas que não estão com o status "Removido".
+        # Quando um bloco específico é selecionado, filtra também pelo bloco.
+        # A projeção traz apenas os campos usados para desenhar o mapa.
+        filtro_vagas = {"status": {"$ne": "Removido"}}
 
-            # Quando "Todos" é selecionado, busca todas as
-            #       vagas com status diferente de "Removido".
-            vagas = list(colecao_vagas.find({"status": {"$ne": "Removido"}}))
+        if bloco_selecionado != "Todos":
+            filtro_vagas["bloco"] = bloco_selecionado
 
-        else:
+        vagas = list(colecao_vagas.find(filtro_vagas, {"_id": 0, "bloco": 1, "numero_vaga": 1}))
 
-            # Quando um bloco específico é selecionado, busca
-            #       todas as vagas desse bloco específico que
-            #       não estão com o status "Removido".
-            vagas = list(colecao_vagas.find({"bloco": bloco_selecionado, "status": {"$ne": "Removido"}}))
-
-        # Ordena a lista de vagas primeiro por "bloco" e depois por "numero_vaga"
-        # A função `sort()` organiza a lista `vagas` de acordo com o valor do bloco e o número da vaga.
-        # A chave de ordenação (key) é definida por uma função `lambda` que retorna uma tupla contendo:
-        # - `vaga["bloco"]` para garantir que as vagas serão agrupadas pelo bloco
-        # - `int(vaga["numero_vaga"])` para garantir que as vagas sejam ordenadas
-        #           numericamente dentro de cada bloco
-        # A função `int()` é usada para garantir que o número da
-        #       vaga seja tratado como um número inteiro para ordenação correta.
+        # Ordena as vagas por bloco e, dentro do bloco, numericamente pelo número.
         vagas.sort(key=lambda vaga: (vaga["bloco"], int(vaga["numero_vaga"])))
 
-        # Define o número de colunas por linha para a criação dos botões
-        # A variável `colunas_por_linha` determina quantos botões de
-        #       vaga serão exibidos em cada linha do mapa.
-        # Aqui, estamos especificando que queremos 6 botões de vagas por linha.
-        colunas_por_linha = 6
-
-        # Inicializa as variáveis `linha` e `coluna` que serão usadas
-        #       para controlar onde cada botão de vaga será colocado
-        # O valor inicial de `linha` é 0, indicando que começaremos na primeira linha.
-        # O valor inicial de `coluna` é 0, indicando que começaremos na primeira coluna.
-        linha = 0
-        coluna = 0
-
-        # Itera sobre cada vaga na lista de vagas ordenadas
-        # `for vaga in vagas:` começa um loop que vai percorrer
-        #       todas as vagas que foram ordenadas na linha anterior
-        # Cada elemento de `vagas` será armazenado na variável `vaga` dentro do loop.
-        for vaga in vagas:
-
-            # Recupera o valor do campo "bloco" da vaga
-            # `bloco = vaga["bloco"]` armazena o nome do bloco da
-            #       vaga atual em uma variável chamada `bloco`
-            # Isso é feito para utilizar esse valor mais tarde
-            #       na consulta à base de dados.
-            bloco = vaga["bloco"]
-
-            # Recupera o número da vaga
-            # `numero_vaga = vaga["numero_vaga"]` armazena o número da
-            #       vaga atual em uma variável chamada `numero_vaga`
-            # Esse número será usado na consulta para verificar se a
-            #       vaga já está reservada ou ocupada.
-            numero_vaga = vaga["numero_vaga"]
-
-            # Busca se há uma reserva para a vaga na data selecionada
-            # `colecao_reservas.find_one({...})` executa uma consulta para
-            #       verificar se existe uma reserva para a vaga
-            # A consulta utiliza os parâmetros:
-            # - `"bloco": bloco` para filtrar pelo bloco da vaga.
-            # - `"numero_vaga": numero_vaga` para filtrar pelo número da vaga.
-            # - `"data_entrada": data_selecionada` para verificar a
-            #       reserva na data selecionada.
-            # - `"status": {"$in": ["Reservado", "Ocupada"]}` para
-            #       garantir que a vaga esteja reservada ou ocupada.
-            # Caso uma reserva seja encontrada, ela será armazenada na variável `reserva`.
-            reserva = colecao_reservas.find_one({
-
-                "bloco": bloco,  # Filtro pelo bloco
-                "numero_vaga": numero_vaga,  # Filtro pelo número da vaga
-                "data_entrada": data_selecionada,  # Filtro pela data de entrada
-                "status": {"$in": ["Reservado", "Ocupada"]}  # Verifica se a vaga está reservada ou ocupada
-
-            })
-
-            # Verifica se foi encontrada uma reserva para a vaga
-            # `if reserva:` verifica se a variável `reserva` contém um
-            #       valor (ou seja, se a consulta à base de dados retornou uma reserva).
-            # Caso não tenha sido encontrada nenhuma reserva, `reserva`
-            #       será `None` e a execução passará para o bloco `else`.
-            if reserva:
-
-                # Verifica se o status da reserva é "Ocupada"
-                # `if reserva["status"] == "Ocupada":` verifica se o status da
-                #       reserva retornada pela consulta é "Ocupada".
-                # Caso o status seja "Ocupada", o código define que a vaga está ocupada.
-                if reserva["status"] == "Ocupada":
-
-                    # Define o status como "Ocupada"
-                    # `status = "Ocupada"` armazena o status "Ocupada" para ser
-                    #       usado em outras partes do código, se necessário.
-                    status = "Ocupada"
-
-                    # Cria o texto que será exibido na interface com o número do bloco e da vaga
-                    # `texto = f"{bloco}-{numero_vaga}\n🟥 Ocupada"` define o texto a
-                    #       ser mostrado na interface,
-                    # informando o bloco, o número da vaga e o status "Ocupada", além
-                    #       de adicionar o emoji correspondente.
-                    texto = f"{bloco}-{numero_vaga}\n🟥 Ocupada"
-
-                    # Define a cor de fundo como vermelha
-                    # `cor_fundo = "#F44336"` atribui a cor vermelha (HEX: #F44336) à variável `cor_fundo`,
-                    # para indicar visualmente que a vaga está ocupada.
-                    cor_fundo = "#F44336"  # Vermelho
-
-                else:
-
-                    # Caso o status seja diferente de "Ocupada", verifica se é "Reservada"
-                    # Caso o status seja "Reservada", o código define que a vaga está reservada.
-                    status = "Reservada"
-
-                    # Cria o texto que será exibido na interface com o
-                    #       número do bloco e da vaga
-                    # `texto = f"{bloco}-{numero_vaga}\n🟡 Reservada"` define o
-                    #       texto a ser mostrado na interface,
-                    # informando o bloco, o número da vaga e o status "Reservada",
-                    #       além de adicionar o emoji correspondente.
-                    texto = f"{bloco}-{numero_vaga}\n🟡 Reservada"
-
-                    # Define a cor de fundo como amarela
-                    # `cor_fundo = "#FFC107"` atribui a cor
-                    #       amarela (HEX: #FFC107) à variável `cor_fundo`,
-                    # para indicar visualmente que a vaga está reservada.
-                    cor_fundo = "#FFC107"  # Amarelo
+        # Chaves (bloco, numero_vaga) na ordem em que serão exibidas.
+        layout = [(vaga["bloco"], vaga["numero_vaga"]) for vaga in vagas]
 
-            else:
+        # Carrega a ocupação de todas as vagas da data em uma única consulta.
+        ocupacao = obter_ocupacao_vagas(data_selecionada,
+                                        None if bloco_selecionado == "Todos" else bloco_selecionado)
 
-                # Caso não tenha sido encontrada uma reserva, a vaga está livre
-                # `status = "Livre"` define o status como "Livre",
-                #       pois não há reserva para a vaga.
-                status = "Livre"
-
-                # Cria o texto que será exibido na interface com o
-                #       número do bloco e da vaga
-                # `texto = f"{bloco}-{numero_vaga}\n🟩 Livre"` define o
-                #       texto a ser mostrado na interface,
-                # informando o bloco, o número da vaga e o status "Livre",
-                #       além de adicionar o emoji correspondente.
-                texto = f"{bloco}-{numero_vaga}\n🟩 Livre"
-
-                # Define a cor de fundo como verde
-                # `cor_fundo = "#4CAF50"` atribui a cor verde (HEX: #4CAF50) à
-                #       variável `cor_fundo`,
-                #       para indicar visualmente que a vaga está livre.
-                cor_fundo = "#4CAF50"  # Verde
-
-            # Botão da vaga
-            # Cria um botão para cada vaga no mapa
-            # `botao_vaga = tk.Button(...)` cria um objeto de botão para
-            #       representar uma vaga no mapa.
-
-            # `frame_mapa` é o contêiner onde o botão será exibido.
-            # `text=texto` define o texto que aparecerá no botão. O `texto` é gerado na
-            #       parte anterior do código, dependendo do status da
-            #       vaga (livre, reservada, ocupada).
-            # `width=12` define a largura do botão em termos de caracteres. Ajusta a
-            #       largura do botão para que o texto caiba de forma confortável.
-            # `height=3` define a altura do botão, garantindo que o botão tenha uma
-            #       área adequada para visualização.
-            # `bg=cor_fundo` define a cor de fundo do botão. A cor de fundo (`cor_fundo`) muda
-            #       dependendo do status da vaga: vermelho para ocupada, amarelo para
-            #       reservada e verde para livre.
-            # `fg="white"` define a cor do texto dentro do botão como branca, para
-            #       garantir boa visibilidade sobre o fundo colorido.
-            # `font=("Arial", 10, "bold")` define a fonte do texto como Arial, com
-            #       tamanho 10 e em negrito. Isso dá um visual mais chamativo ao texto.
-            # `relief="raised"` define o estilo de relevo do botão, o que cria uma
-            #       aparência de botão "pressionado" ou "em alto", adicionando
-            #       profundidade ao botão.
-            # `borderwidth=2` define a largura da borda do botão. Um valor maior
-            #       pode tornar a borda mais visível.
-            # `padx=5` e `pady=5` adicionam preenchimento dentro do botão. `padx`
-            #       adiciona espaçamento horizontal e `pady` adiciona espaçamento vertical,
-            #       ajudando a ajustar o tamanho e a aparência do botão.
-            # `highlightbackground="#D1D1D1"` define a cor de fundo do botão quando ele
-            #       não está em foco. Isso garante que o botão tenha uma aparência
-            #       consistente quando não está ativo.
-            # `activebackground="#616161"` define a cor de fundo do botão quando ele é
-            #       pressionado ou ativado. Isso cria um feedback visual para o
-            #       usuário ao clicar no botão.
-            botao_vaga = tk.Button(frame_mapa,
-                                   text=texto,
-                                   width=12,
-                                   height=3,
-                                   bg=cor_fundo,
-                                   fg="white",
-                                   font=("Arial", 10, "bold"),
-                                   relief="raised",
-                                   borderwidth=2,
-                                   padx=5,
-                                   pady=5,
-                                   highlightbackground="#D1D1D1",
-                                   activebackground="#616161")
-
-            # Define a função `acao_vaga` com dois parâmetros: `bloco_vaga` e `num_vaga`.
-            # `bloco_vaga` e `num_vaga` recebem valores padrões (valores de `bloco` e
-            #       `numero_vaga` do código anterior) para quando a função for
-            #       chamada sem argumentos explícitos.
-            # A função chama outra função chamada `popup_acoes_vaga_mapa`
-            #       passando os parâmetros necessários, que abre uma
-            #       janela de ações para a vaga específica.
-            def acao_vaga(bloco_vaga=bloco, num_vaga=numero_vaga):
-
-                # Chama a função popup_acoes_vaga_mapa para exibir uma tela de ações
-                #       relacionadas à vaga específica.
-                # `janela` é a janela principal do aplicativo, `bloco_vaga` e
-                #       `num_vaga` são os dados da vaga.
-                # `data_selecionada` é a data que foi escolhida pelo usuário.
-                # `carregar_mapa` é uma função que recarrega o mapa após
-                #       uma ação ser realizada (como uma reserva, por exemplo).
-                popup_acoes_vaga_mapa(janela, bloco_vaga, num_vaga, data_selecionada, carregar_mapa)
-
-            # Configura o botão `botao_vaga` para chamar a função `acao_vaga`
-            #       quando for clicado.
-            # Isso faz com que o comportamento do botão seja definido de acordo
-            #       com a função `acao_vaga` para abrir o popup de ações para a vaga.
-            botao_vaga.configure(command=acao_vaga)
-
-            # Coloca o botão na grid (tabela) na posição específica, definida
-            #       pelas variáveis `linha` e `coluna`.
-            # `padx=8` e `pady=8` adicionam espaçamento interno ao redor do botão na
-            #       grid, garantindo que o botão não fique colado nas bordas.
-            botao_vaga.grid(row=linha, column=coluna, padx=8, pady=8)
-
-            # Incrementa a variável `coluna` em 1 para passar para a
-            #       próxima coluna na grid.
-            # Isso permite que os botões de vagas sejam colocados em
-            #       colunas sucessivas da grid.
-            coluna += 1
-
-            # Verifica se o número de colunas já atingiu o limite definido
-            #       em `colunas_por_linha`.
-            # Se `coluna` for maior ou igual a `colunas_por_linha`, significa
-            #       que a linha atual está cheia e é necessário passar para a próxima linha.
-            # Nesse caso, `coluna` é resetada para 0, para começar uma nova linha.
-            if coluna >= colunas_por_linha:
-
-                # Reseta a coluna para 0, começando a nova linha.
-                coluna = 0
-
-                # Incrementa a variável `linha` para passar para a
-                #       próxima linha da grid.
-                linha += 1
-
-        # Atualiza a interface de tarefas pendentes no canvas.
-        # `canvas_mapa.update_idletasks()` força a atualização do
-        #       canvas, aplicando quaisquer mudanças ou alterações
-        #       feitas na interface.
-        # Isso garante que o canvas seja atualizado para refletir
-        #       corretamente a posição de seus elementos antes de
-        #       qualquer outra operação.
-        canvas_mapa.update_idletasks()
+        # Atualiza a data usada pelos botões ao serem clicados.
+        estado_mapa["data"] = data_selecionada
+
+        # Se o conjunto de vagas mudou (outro bloco, vagas criadas ou
+        #       removidas), o grid é reconstruído.
+        if layout != estado_mapa["layout"]:
+
+            for widget in frame_mapa.winfo_children():
+                widget.destroy()
+
+            estado_mapa["botoes"].clear()
+            estado_mapa["status"].clear()
+            estado_mapa["layout"] = layout
+
+            # Define o número de botões de vagas exibidos em cada linha do mapa.
+            colunas_por_linha = 6
+
+            for indice, (bloco, numero_vaga) in enumerate(layout):
+                estado_mapa["botoes"][(bloco, numero_vaga)] = criar_botao_vaga(
+                    bloco, numero_vaga,
+                    indice // colunas_por_linha,
+                    indice % colunas_por_linha)
+
+        # Recolore apenas os botões cujo estado mudou desde a última atualização.
+        for chave, botao_vaga in estado_mapa["botoes"].items():
+
+            # Vagas sem reserva ativa na data estão livres.
+            status = ocupacao.get(chave, "Livre")
+
+            if estado_mapa["status"].get(chave) == status:
+                continue
 
-        # Atualiza a região de rolagem do canvas para que a área
-        #       de rolagem cubra todos os elementos desenhados.
-        # `canvas_mapa.bbox("all")` retorna as coordenadas (caixa delimitadora) de
-        #       todos os itens desenhados no canvas.
-        # `canvas_mapa.configure(scrollregion=...)` ajusta a região de rolagem do
-        #       canvas para cobrir a área necessária para exibir todos os elementos.
+            legenda, cor_fundo = aparencia_status[status]
+            bloco, numero_vaga = chave
+            botao_vaga.configure(text=f"{bloco}-{numero_vaga}\n{legenda}", bg=cor_fundo)
+            estado_mapa["status"][chave] = status
+
+        # Força a atualização do canvas e ajusta a região de rolagem
+        #       para cobrir todos os botões desenhados.
+        canvas_mapa.update_idletasks()
         canvas_mapa.configure(scrollregion=canvas_mapa.bbox("all"))
 
+    # Recarrega o mapa automaticamente quando a data ou o bloco mudarem.
+    calendario.bind("<<CalendarSelected>>", carregar_mapa)
+    combo_bloco.bind("<<ComboboxSelected>>", carregar_mapa)
+
 
     # Botões de ações
     # Cria uma lista de tuplas, onde cada tupla contém o texto e o comando do botão
@@ -1994,12 +2324,15 @@ def popup_acoes_vaga_mapa(parent, bloco, num_vaga, data_sel, callback_recarregar
         # Isso evita que o código quebre caso a data já esteja no formato correto ou inválido.
         data_formatada = data_sel
 
+    # 🔹 Intervalo do dia selecionado sobre o campo nativo `dt_entrada`.
+    dia = converter_data_reserva(data_formatada)
+
     # 🔹 Buscar no banco de dados apenas as reservas para a data específica
     # A função `find_one()` do MongoDB retorna o primeiro documento que satisfaz os critérios especificados.
     reserva_existente = colecao_reservas.find_one({
         "bloco": bloco,  # Filtra pelo bloco onde a vaga está localizada.
         "numero_vaga": num_vaga,  # Filtra pelo número da vaga dentro do bloco.
-        "data_entrada": data_formatada,  # Filtra pela data formatada corretamente.
+        "dt_entrada": intervalo_de_datas(dia, dia) if dia else None,  # Filtra pelo dia selecionado.
         "status": {"$in": ["Reservado", "Ocupada"]}
         # Filtra apenas reservas que estejam em status "Reservado" ou "Ocupada".
     })
@@ -2525,11 +2858,10 @@ def popup_finalizar_reserva(parent, reserva_id, callback_recarregar):
             #       foi realizado corretamente.
             return 0.0
 
-        # Multiplica a diferença de horas pelo valor fixo da
-        #       tarifa por hora (R$ 8,00).
-        # Isso determina o valor total a ser cobrado pelo
-        #       tempo de permanência.
-        valor = dif_horas * 8.0
+        # Calcula o valor da estadia pelo motor de tarifas, conforme
+        #       as regras do bloco da vaga (faixas horárias e teto diário).
+        # O cálculo usa as tabelas compiladas em memória, sem acessar o banco.
+        valor = calcular_valor_estadia(doc_r.get("bloco"), dt_ent, dt_sai)
 
         # Atualiza o rótulo na interface gráfica para exibir o
         #       valor calculado ao usuário.
@@ -2589,6 +2921,7 @@ def popup_finalizar_reserva(parent, reserva_id, callback_recarregar):
                 "$set": {
                     "data_saida": data_saida_str,  # Define a data de saída fornecida pelo usuário.
                     "hora_saida": hr_sai,  # Define a hora de saída fornecida pelo usuário.
+                    "dt_saida": converter_data_reserva(data_saida_str, hr_sai),  # Data/hora de saída nativas.
                     "valor_total": valor,  # Registra o valor total calculado para a estadia.
                     "status": "Finalizado"  # Marca a reserva como finalizada.
                 }
@@ -3198,6 +3531,10 @@ def popup_reservar(parent, bloco, num_vaga, data_sel, callback_recarregar):
             # Armazena a hora de entrada informada pelo usuário.
             "hora_entrada": hr_,
 
+            # Armazena data e hora de entrada como `datetime`, campo
+            #       usado nos filtros de intervalo de datas.
+            "dt_entrada": converter_data_reserva(data_sel, hr_),
+
             # Define a data de saída como "-" (indica que
             #       ainda não foi definida).
             "data_saida": "-",
@@ -3283,6 +3620,58 @@ def popup_reservar(parent, bloco, num_vaga, data_sel, callback_recarregar):
 # CRUD de Blocos (gera Vagas)
 # -------------------------------------------------------------------------
 
+# Ajusta as vagas de um bloco para que ele tenha exatamente `qtd` vagas
+#       numeradas de "1" até `qtd`.
+# Compara as vagas existentes com as desejadas e grava somente a diferença:
+#       - cria as vagas que faltam;
+#       - remove as vagas excedentes, exceto as que têm reserva ativa
+#         ("Reservado" ou "Ocupada"), que são preservadas.
+# Todas as inserções e remoções vão ao banco em um único `bulk_write`.
+# Como só a diferença é gravada, repetir a operação após uma falha
+#       completa o bloco sem duplicar vagas.
+# Retorna uma tupla (criadas, removidas, preservadas) com os números das vagas.
+def provisionar_vagas(bloco, qtd):
+
+    # Números das vagas que já existem no bloco.
+    existentes = {v["numero_vaga"] for v in
+                  colecao_vagas.find({"bloco": bloco}, {"_id": 0, "numero_vaga": 1})}
+
+    # Números das vagas que o bloco deve ter (armazenados como string).
+    desejadas = {str(i) for i in range(1, qtd + 1)}
+
+    # Ordena numericamente para inserir e informar as vagas em sequência.
+    a_criar = sorted(desejadas - existentes, key=int)
+    excedentes = sorted(existentes - desejadas, key=int)
+
+    # Vagas excedentes com reserva ativa não podem ser removidas.
+    preservadas = []
+
+    if excedentes:
+        com_reserva = set(colecao_reservas.distinct("numero_vaga", {
+            "bloco": bloco,
+            "numero_vaga": {"$in": excedentes},
+            "status": {"$in": ["Reservado", "Ocupada"]}
+        }))
+        preservadas = [n for n in excedentes if n in com_reserva]
+
+    removidas = [n for n in excedentes if n not in preservadas]
+
+    # Monta as operações: uma inserção por vaga nova e uma
+    #       única remoção para todas as vagas excedentes.
+    operacoes = [InsertOne({"bloco": bloco, "numero_vaga": n, "status": "Livre"})
+                 for n in a_criar]
+
+    if removidas:
+        operacoes.append(DeleteMany({"bloco": bloco, "numero_vaga": {"$in": removidas}}))
+
+    # Envia tudo em uma única ida ao banco.
+    # `ordered=False` permite ao servidor aplicar as operações em paralelo.
+    if operacoes:
+        colecao_vagas.bulk_write(operacoes, ordered=False)
+
+    return a_criar, removidas, preservadas
+
+
 # Define uma função chamada `tela_blocos_crud` que recebe `janela_pai` como parâmetro.
 # Esta função cria uma nova janela para gerenciar blocos.
 def tela_blocos_crud(janela_pai):
@@ -3545,35 +3934,23 @@ def tela_blocos_crud(janela_pai):
         limpar_campos()
 
 
-    # Define a função `criar_vagas` para criar vagas de
-    #       estacionamento associadas a um bloco específico.
+    # Define a função `criar_vagas` para criar (ou redimensionar) as
+    #       vagas de estacionamento associadas a um bloco específico.
     # `bloco`: Nome do bloco onde as vagas serão criadas.
-    # `qtd`: Número total de vagas a serem criadas.
+    # `qtd`: Número total de vagas que o bloco deve ter.
+    # Apenas a diferença entre as vagas atuais e as desejadas é gravada,
+    #       em uma única escrita em lote (ver `provisionar_vagas`).
     def criar_vagas(bloco, qtd):
 
-        # Remove todas as vagas existentes associadas ao bloco
-        #       informado antes de criar novas.
-        # `delete_many({"bloco": bloco})` apaga todas as vagas que
-        #       pertencem ao bloco para evitar duplicação.
-        colecao_vagas.delete_many({"bloco": bloco})
-
-        # Loop para criar a quantidade de vagas especificada.
-        # `range(1, qtd + 1)`: Gera números de 1 até `qtd`,
-        #       garantindo a sequência das vagas.
-        for i in range(1, qtd + 1):
-
-            # Insere uma nova vaga no banco de dados.
-            # `insert_one()` adiciona um novo documento contendo as informações da vaga.
-            # `"bloco": bloco` associa a vaga ao bloco correspondente.
-            # `"numero_vaga": str(i)` define um número sequencial para
-            #       cada vaga (convertido para string).
-            # `"status": "Livre"` indica que a vaga está disponível para uso imediato.
-            colecao_vagas.insert_one({
-                "bloco": bloco,
-                "numero_vaga": str(i),
-                "status": "Livre"
-            })
+        criadas, removidas, preservadas = provisionar_vagas(bloco, qtd)
 
+        # Avisa quando alguma vaga acima da nova quantidade não pôde ser
+        #       removida por ter reserva ativa.
+        if preservadas:
+            messagebox.showwarning("Aviso",
+                                   "As vagas " + ", ".join(preservadas) +
+                                   " possuem reservas ativas e não foram removidas.",
+                                   parent=janela)
 
     # Define a função para alterar um bloco existente
     # `def alterar():` indica que essa função será chamada ao
@@ -4944,6 +5321,13 @@ def tela_historico_veiculo_com_filtro(parent, placa, modelo):
         #       deve ser igual à placa do veículo selecionado.
         query = {"veiculo_placa": placa}
 
+        # Adiciona o intervalo de datas à consulta, aplicado pelo MongoDB
+        #       sobre o campo nativo `dt_entrada` (índice placa + data).
+        intervalo = intervalo_de_datas(di_, df_)
+
+        if intervalo:
+            query["dt_entrada"] = intervalo
+
         # Se o usuário selecionou um status, adiciona a condição de
         #       filtro pelo status na consulta.
         if st_:
@@ -4953,9 +5337,8 @@ def tela_historico_veiculo_com_filtro(parent, placa, modelo):
         #       resultados em uma lista `docs`.
         # `colecao_reservas.find(query)` busca os registros que
         #       atendem aos critérios definidos em `query`.
-        # `list(colecao_reservas.find(query))` converte os resultados da
-        #       consulta em uma lista para manipulação posterior.
-        docs = list(colecao_reservas.find(query))
+        # `sort("dt_entrada", 1)` devolve as reservas em ordem cronológica.
+        docs = list(colecao_reservas.find(query).sort("dt_entrada", 1))
 
         # Cria uma lista vazia `final_results`, que armazenará os
         #       dados formatados para exibição na tabela.
@@ -4964,46 +5347,11 @@ def tela_historico_veiculo_com_filtro(parent, placa, modelo):
         # Percorre cada documento retornado na consulta ao banco de dados.
         for r in docs:
 
-            # Obtém a string da data de entrada do documento.
-            # Se o campo "data_entrada" não existir, retorna uma string vazia ("").
-            dtent_str = r.get("data_entrada", "")
-
-            # Tenta converter a string da data de entrada para um
-            #       objeto do tipo `datetime.date`.
-            try:
-
-                # Usa `datetime.strptime(dtent_str, "%d/%m/%Y")` para interpretar a
-                #       string como uma data no formato "dd/mm/yyyy".
-                # O método `.date()` extrai apenas a parte da data,
-                #       ignorando a informação de horário.
-                dtent = datetime.strptime(dtent_str, "%d/%m/%Y").date()
-
-            except:
-
-                # Se houver erro na conversão (por exemplo, se a
-                #       string estiver vazia ou em formato incorreto),
-                # define `dtent` como `None`, indicando que a data
-                #       não pôde ser processada.
-                dtent = None
-
             # Define `ok = True` para indicar que, por padrão, o
             #       registro será incluído na lista final.
+            # O intervalo de datas já foi aplicado na consulta.
             ok = True
 
-            # Se a data de entrada foi extraída corretamente (não é `None`),
-            #       verifica se ela está dentro do intervalo desejado.
-            if dtent:
-
-                # Se a data de entrada for anterior à data de início do
-                #       filtro, o registro será excluído (`ok = False`).
-                if dtent < di_:
-                    ok = False
-
-                # Se a data de entrada for posterior à data de fim do filtro, o
-                #       registro também será excluído (`ok = False`).
-                if dtent > df_:
-                    ok = False
-
             # Se a variável `ok` ainda for `True`, o registro será
             #       considerado válido e passará por mais verificações.
             if ok:
@@ -6385,13 +6733,20 @@ def tela_historico_cliente_com_filtro(parent, cpf_cliente, nome_cliente):
         #      desse cliente sejam recuperadas.
         query = {"cliente_cpf": cpf_cliente}
 
+        # O intervalo de datas é aplicado pelo MongoDB sobre o campo
+        #      nativo `dt_entrada` (índice CPF + data de entrada).
+        intervalo = intervalo_de_datas(filtro_data_ini, filtro_data_fim)
+
+        if intervalo:
+            query["dt_entrada"] = intervalo
+
         # Executa a consulta no banco de dados para encontrar todas as
         #      reservas que correspondem ao CPF do cliente.
         # `colecao_reservas.find(query)` retorna um cursor com os registros encontrados.
-        # `list(colecao_reservas.find(query))` converte esse cursor em
-        #      uma lista de dicionários,
-        #      onde cada dicionário representa uma reserva do cliente.
-        docs = list(colecao_reservas.find(query))
+        # `list(...)` converte esse cursor em uma lista de dicionários,
+        #      onde cada dicionário representa uma reserva do cliente,
+        #      em ordem cronológica (`sort("dt_entrada", 1)`).
+        docs = list(colecao_reservas.find(query).sort("dt_entrada", 1))
 
         # Inicializa a variável `soma_valor` com 0.0 para acumular o valor
         #      total das reservas do cliente.
@@ -6453,51 +6808,6 @@ def tela_historico_cliente_com_filtro(parent, cpf_cliente, nome_cliente):
             # Caso o campo não exista, retorna uma string vazia (`""`).
             veiculo_placa = d.get("veiculo_placa", "")
 
-            # =========================================================================
-            # Filtro por intervalo de datas
-            # =========================================================================
-
-            # --------------------------------------------------------------
-            # Validação da Data de Entrada da Reserva
-            # --------------------------------------------------------------
-
-            # Verifica se o campo `val_de` (Data de Entrada) contém algum valor.
-            # Isso é necessário para evitar erros ao tentar converter um
-            #      valor nulo ou inválido.
-            if val_de:
-
-                try:
-
-                    # Converte a string `val_de` (ex: "15/03/2028") para um objeto de data (`date`).
-                    # `datetime.strptime(val_de, "%d/%m/%Y").date()` realiza a conversão utilizando o
-                    # formato de data brasileiro (dia/mês/ano).
-                    # Se a conversão for bem-sucedida, a variável `data_entrada_obj`
-                    #      conterá um objeto de data válido.
-                    data_entrada_obj = datetime.strptime(val_de, "%d/%m/%Y").date()
-
-                except ValueError:
-
-                    # Caso ocorra um erro na conversão (ex: formato inválido),
-                    #      define `data_entrada_obj` como `None`.
-                    # Isso evita que o código tente comparar uma data inválida
-                    #      com os filtros, prevenindo falhas.
-                    data_entrada_obj = None
-
-                # --------------------------------------------------------------
-                # Aplicação do Filtro de Data
-                # --------------------------------------------------------------
-
-                # Se a conversão da data foi bem-sucedida (`data_entrada_obj` não é `None`),
-                # verifica se a data está dentro do intervalo selecionado pelo usuário nos filtros.
-                if data_entrada_obj:
-
-                    # Se a `data_entrada_obj` for menor que `filtro_data_ini` ou maior que `filtro_data_fim`,
-                    # significa que a reserva não está dentro do intervalo especificado.
-                    # O comando `continue` faz com que a reserva seja ignorada e o
-                    #      loop avance para o próximo registro.
-                    if data_entrada_obj < filtro_data_ini or data_entrada_obj > filtro_data_fim:
-                        continue
-
             # =========================================================================
             # Filtro por Status
             # =========================================================================
@@ -0,0 +1,180 @@
+"""
+Baixa de estoque com compensação, compartilhada pelos sistemas que baixam o
+estoque de vários produtos e depois gravam o documento que justifica a baixa
+(uma venda ou uma reserva) sem usar transação.
+
+1. `baixar_estoque()` faz um único `bulk_write` de "$inc" condicionais: cada
+   produto só é decrementado se ainda tiver a quantidade pedida, no próprio
+   servidor, sem a corrida "ler e depois gravar" entre dois atendimentos.
+   Cada produto baixado recebe uma marca {id da operação, quantidade}.
+2. Gravado o documento, `confirmar_baixa()` retira as marcas.
+3. Se algo falhar antes disso, `devolver_baixa()` devolve o estoque apenas
+   dos produtos que ainda têm a marca da operação.
+4. Se o programa cair no meio do caminho, `recuperar_baixas_pendentes()`,
+   chamada ao iniciar, resolve as marcas antigas: devolve o estoque quando o
+   documento não foi gravado e só retira a marca quando foi.
+
+Os nomes dos campos variam de sistema para sistema e são descritos por
+`esquema_estoque()`.
+"""
+
+# Importa as classes de data usadas para calcular a idade das marcas
+from datetime import datetime, timedelta, timezone
+
+# Importa o ObjectId: a idade de uma marca é lida do próprio ID da operação
+from bson.objectid import ObjectId
+
+# Importa a operação de atualização usada nas escritas em lote
+from pymongo import UpdateOne
+
+# Importa a exceção base do PyMongo, usada para compensar baixas interrompidas
+from pymongo.errors import PyMongoError
+
+
+# Marcas mais antigas do que este prazo (em minutos) são consideradas
+#       abandonadas: nenhuma operação leva tanto tempo entre a baixa e a
+#       gravação do documento.
+PRAZO_BAIXA_PENDENTE_MIN = 10
+
+
+# Descreve os campos do estoque de um sistema.
+# - chave: campo que identifica o produto nas quantidades (ex.: "_id", "codigo").
+# - quantidade: campo com o estoque do produto.
+# - marcas: array com as marcas das baixas pendentes.
+# - id_marca: campo da marca com o ID da operação (venda ou reserva).
+# - carimbo: campo opcional que recebe a data/hora (UTC) de cada alteração.
+def esquema_estoque(chave="_id", quantidade="quantidade", marcas="baixas_pendentes",
+                    id_marca="operacao_id", carimbo=None):
+
+    return {"chave": chave, "quantidade": quantidade, "marcas": marcas,
+            "id_marca": id_marca, "carimbo": carimbo}
+
+
+# Acrescenta à atualização o carimbo de data/hora, se o esquema tiver um.
+def _carimbar(atualizacao, esquema):
+
+    if esquema["carimbo"]:
+        atualizacao["$set"] = {esquema["carimbo"]: datetime.now(timezone.utc)}
+
+    return atualizacao
+
+
+# Monta as operações de baixa de `quantidades` ({chave do produto: quantidade}).
+# Com `marca_id`, cada produto baixado recebe a marca da operação.
+def operacoes_baixa(quantidades, esquema, marca_id=None):
+
+    operacoes = []
+
+    for chave, qtd in quantidades.items():
+
+        atualizacao = {"$inc": {esquema["quantidade"]: -qtd}}
+
+        if marca_id is not None:
+            atualizacao["$push"] = {esquema["marcas"]: {esquema["id_marca"]: marca_id, "qtd": qtd}}
+
+        operacoes.append(UpdateOne({esquema["chave"]: chave, esquema["quantidade"]: {"$gte": qtd}},
+                                   _carimbar(atualizacao, esquema)))
+
+    return operacoes
+
+
+# Baixa o estoque de todos os produtos, marcando-os com `marca_id`.
+# Retorna True se todos tinham estoque; se algum não tinha (ou não existe),
+#       devolve o que foi baixado e retorna False. Uma falha do banco no meio
+#       do lote também é compensada antes de ser repassada.
+def baixar_estoque(produtos, quantidades, marca_id, esquema):
+
+    if not quantidades:
+        return True
+
+    try:
+        resultado = produtos.bulk_write(operacoes_baixa(quantidades, esquema, marca_id), ordered=False)
+
+    except PyMongoError:
+        devolver_baixa(produtos, quantidades, marca_id, esquema)
+        raise
+
+    if resultado.matched_count < len(quantidades):
+        devolver_baixa(produtos, quantidades, marca_id, esquema)
+        return False
+
+    return True
+
+
+# Devolve ao estoque as baixas de `marca_id` (operação que não foi gravada).
+# Só os produtos que ainda têm a marca são alterados, então chamar esta
+#       função mais de uma vez não devolve o estoque em dobro.
+def devolver_baixa(produtos, quantidades, marca_id, esquema):
+
+    if not quantidades:
+        return
+
+    campo_marca = f"{esquema['marcas']}.{esquema['id_marca']}"
+
+    produtos.bulk_write([
+        UpdateOne({esquema["chave"]: chave, campo_marca: marca_id},
+                  _carimbar({"$inc": {esquema["quantidade"]: qtd},
+                             "$pull": {esquema["marcas"]: {esquema["id_marca"]: marca_id}}}, esquema))
+        for chave, qtd in quantidades.items()
+    ], ordered=False)
+
+
+# Operação gravada: retira as marcas de `marca_id`, e as baixas passam a valer.
+def confirmar_baixa(produtos, marca_id, esquema):
+
+    produtos.update_many({f"{esquema['marcas']}.{esquema['id_marca']}": marca_id},
+                         {"$pull": {esquema["marcas"]: {esquema["id_marca"]: marca_id}}})
+
+
+# Menor ObjectId ainda considerado recente: IDs gerados antes dele (há mais
+#       de `prazo_min` minutos) pertencem a operações abandonadas.
+def limite_pendencia(prazo_min=PRAZO_BAIXA_PENDENTE_MIN):
+
+    return ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(minutes=prazo_min))
+
+
+# Resolve as marcas com mais de `prazo_min` minutos deixadas por uma queda.
+# `documentos` é a coleção das operações (vendas ou reservas) e
+#       `campo_documento` o campo em que ela guarda o ID da operação.
+# Marcas recentes não são tocadas: podem ser de operações em andamento em
+#       outro caixa ou atendimento.
+# Retorna a quantidade de marcas resolvidas.
+def recuperar_baixas_pendentes(produtos, documentos, esquema, campo_documento="_id",
+                               prazo_min=PRAZO_BAIXA_PENDENTE_MIN):
+
+    limite = limite_pendencia(prazo_min)
+    marcas, id_marca = esquema["marcas"], esquema["id_marca"]
+
+    pendentes = list(produtos.find({f"{marcas}.{id_marca}": {"$lt": limite}},
+                                   {esquema["chave"]: 1, marcas: 1}))
+
+    if not pendentes:
+        return 0
+
+    antigas = {marca[id_marca] for p in pendentes for marca in p[marcas] if marca[id_marca] < limite}
+
+    # Operações que chegaram a ser gravadas (uma consulta para todas as marcas).
+    gravadas = {d[campo_documento] for d in documentos.find({campo_documento: {"$in": list(antigas)}},
+                                                            {campo_documento: 1})}
+
+    operacoes = []
+
+    for p in pendentes:
+        for marca in p[marcas]:
+
+            if marca[id_marca] >= limite:
+                continue
+
+            atualizacao = {"$pull": {marcas: {id_marca: marca[id_marca]}}}
+
+            if marca[id_marca] not in gravadas:
+                atualizacao["$inc"] = {esquema["quantidade"]: marca["qtd"]}
+                _carimbar(atualizacao, esquema)
+
+            operacoes.append(UpdateOne({esquema["chave"]: p[esquema["chave"]],
+                                        f"{marcas}.{id_marca}": marca[id_marca]},
+                                       atualizacao))
+
+    produtos.bulk_write(operacoes, ordered=False)
+
+    return len(operacoes)
@@ -0,0 +1,560 @@
+"""
+Manifesto de índices compartilhado pelos doze sistemas do repositório.
+
+Cada sistema declara aqui, de forma centralizada, os índices de que suas
+consultas precisam. Ao iniciar, o sistema chama `aplicar_indices(banco, "projetoNN")`,
+que cria os índices de forma idempotente (criar um índice que já existe
+não faz nada).
+
+O módulo também pode ser executado pela linha de comando:
+
+    python indices_mongodb.py aplicar [projetoNN ...]    # cria os índices
+    python indices_mongodb.py relatorio [projetoNN ...]  # índices ausentes / sem uso ($indexStats)
+    python indices_mongodb.py verificar                  # confere se o manifesto cobre os filtros do código
+"""
+
+# Importa o argparse para interpretar os argumentos da linha de comando
+import argparse
+
+# Importa o ast para analisar o código-fonte dos sistemas sem executá-lo
+import ast
+
+# Importa os módulos os e sys para localizar arquivos e encerrar com código de saída
+import os
+import sys
+
+# Importa o cliente do MongoDB e as constantes de ordenação dos índices
+from pymongo import MongoClient, ASCENDING
+
+# Importa a exceção base do PyMongo, usada para não interromper a
+#       inicialização do sistema caso um índice não possa ser criado, e a
+#       exceção de servidor inacessível, que encerra a criação dos índices
+from pymongo.errors import PyMongoError, ServerSelectionTimeoutError
+
+
+# Pasta raiz do repositório (onde este arquivo está)
+PASTA_RAIZ = os.path.dirname(os.path.abspath(__file__))
+
+# URI padrão usada por todos os sistemas
+URI_PADRAO = "mongodb://localhost:27017/"
+
+
+# Cria a descrição de um índice.
+# `campos` são nomes de campos (ordem crescente) ou tuplas `(campo, direção)`.
+# `opcoes` são repassadas ao `create_index` (ex.: unique=True).
+def indice(*campos, **opcoes):
+
+    chaves = [c if isinstance(c, tuple) else (c, ASCENDING) for c in campos]
+
+    return {"chaves": chaves, "opcoes": opcoes}
+
+
+# Colação para buscas "começa com" sem distinção de maiúsculas e acentos.
+# Um índice criado com ela só é usado por consultas que informem a mesma
+#       colação (ex.: `find(...).collation(COLACAO_BUSCA)`).
+COLACAO_BUSCA = {"locale": "pt", "strength": 1}
+
+
+###############################################################################
+# MANIFESTO DE ÍNDICES POR SISTEMA
+###############################################################################
+
+# Para cada sistema:
+# - "arquivo": caminho do código-fonte (usado pela verificação de cobertura)
+# - "banco": nome do banco de dados usado pelo sistema
+# - "apelidos": nomes de variáveis/atributos que apontam para cada coleção
+#       (quando o nome da variável é diferente do nome da coleção)
+# - "indices": índices de cada coleção
+MANIFESTO = {
+
+    "projeto01": {
+        "arquivo": "Projeto01_gerenciador_de_tarefas/Gerenciador+de+Tarefas.py",
+        "banco": "gerenciador_tarefas_db",
+        "apelidos": {"colecao": "tarefas"},
+        "indices": {
+            "tarefas": [indice("status")],
+        },
+    },
+
+    "projeto02": {
+        "arquivo": "Projeto02_agendamento_de_consultas/Projeto+de+Agendamento+de+Consultas.py",
+        "banco": "agendamento_db",
+        "apelidos": {
+            "colecao_clientes": "clientes",
+            "colecao_medicos": "medicos",
+            "colecao_consultas": "consultas",
+        },
+        "indices": {
+            "consultas": [
+                indice("medico_id", "data"),
+                indice("data"),
+                indice("cliente_id"),
+            ],
+        },
+    },
+
+    "projeto03": {
+        "arquivo": "Projeto03_sistema_de_reserva_de_passagem/Reserva+de+Passagens.py",
+        "banco": "reserva_onibus_db",
+        "apelidos": {"colecao_reservas": "reservas"},
+        "indices": {
+            "reservas": [indice("dia", "lugar")],
+        },
+    },
+
+    "projeto04": {
+        "arquivo": "Projeto04_sistema_de_supermercado/Sistema+de+Supermercado.py",
+        "banco": "supermercado_db",
+        "apelidos": {
+            "colecao_produtos": "produtos",
+            "colecao_clientes": "clientes",
+            "colecao_funcionarios": "funcionarios",
+            "colecao_vendas": "vendas",
+            "colecao_usuarios": "usuarios",
+            "colecao_fornecedores": "fornecedores",
+            "colecao_vendas_diarias": "vendas_diarias",
+        },
+        "indices": {
+            "produtos": [indice("codigo"), indice("quantidade"), indice("atualizado_em"),
+                         indice("baixas_pendentes.venda_id", sparse=True), indice("validade_data")],
+            "clientes": [indice("codigo"), indice("cpf_cnpj")],
+            "fornecedores": [indice("nome")],
+            "funcionarios": [indice("id_func")],
+            "usuarios": [indice("usuario", unique=True), indice("id_func")],
+            "vendas": [indice("data"), indice("venda_id"), indice("cliente_codigo", "data")],
+            "vendas_diarias": [indice("dia", "produto_codigo", "fornecedor", "pagamento", unique=True)],
+        },
+    },
+
+    "projeto05": {
+        "arquivo": "Projeto05_sistema_para_clinica_veterinaria/Sistema+para+Clínica+Veterinária.py",
+        "banco": "clinica_veterinaria",
+        "apelidos": {},
+        "indices": {
+            "agenda": [indice("data_agendamento")],
+            "estoque": [indice("nome_produto")],
+            "estoque_transacoes": [indice("id_produto")],
+            "medicos": [indice("nome")],
+        },
+    },
+
+    "projeto06": {
+        "arquivo": "Projeto06_sistema_de_cabelereiro/Sistema+de+Cabelereiro.py",
+        "banco": "salao_profissional_completo",
+        "apelidos": {
+            "colecao_clientes": "clientes",
+            "colecao_servicos": "servicos",
+            "colecao_produtos": "produtos",
+            "colecao_funcionarios": "funcionarios",
+            "colecao_agendamentos": "agendamentos",
+            "colecao_usuarios": "usuarios",
+            "colecao_relatorios": "relatorios",
+            "colecao_financeiro": "financeiro",
+        },
+        "indices": {
+            "agendamentos": [indice("data", "inicio"), indice("cliente")],
+            "funcionarios": [indice("nome")],
+            "produtos": [indice("nome")],
+            "usuarios": [indice("login")],
+        },
+    },
+
+    "projeto07": {
+        "arquivo": "Projeto07_sistema_de_reserva_de_cinema/Sistema+de+Reserva+de+Cinema.py",
+        "banco": "cinema_db",
+        "apelidos": {},
+        "indices": {
+            "reservas": [indice("sessao_id"),
+                         indice("cliente.nome", collation=COLACAO_BUSCA),
+                         indice("cliente.telefone", collation=COLACAO_BUSCA),
+                         indice("assentos_reservados", collation=COLACAO_BUSCA)],
+            "sessoes": [indice("filme_id"), indice("sala_id", "data")],
+            "ocupacao_assentos": [indice("sessao_id", "assento", unique=True),
+                                  indice("reserva_id")],
+        },
+    },
+
+    "projeto08": {
+        "arquivo": "Projeto08_sistema_de_reserva_de_campo_e_quadra/Sistema+de+Reserva+de+Campo+e+Quadra.py",
+        "banco": "sistema_completo_db",
+        "apelidos": {
+            "colecao_reservas": "reservas",
+            "col_reservas": "reservas",
+            "colecao_fornecedores": "fornecedores",
+            "colecao_clientes": "clientes",
+            "colecao_produtos": "produtos",
+            "colecao_lugares": "lugares",
+            "colecao_agenda": "agenda_lugares",
+        },
+        "indices": {
+            "reservas": [indice("lugar_id", "data", "hora_inicial"), indice("cliente_id")],
+            "agenda_lugares": [indice("lugar_id", "data", unique=True),
+                               indice("reivindicacoes.reserva_id", sparse=True)],
+            "produtos": [indice("baixas_pendentes.reserva_id", sparse=True)],
+            "clientes": [indice("cpf")],
+            "lugares": [indice("nome")],
+        },
+    },
+
+    "projeto09": {
+        "arquivo": "Projeto09_sistema_de_gerenciador_de_escola/Sistema+de+Gerenciamento+Escolar.py",
+        "banco": "escola",
+        "apelidos": {
+            "col_alunos": "alunos",
+            "col_professores": "professores",
+            "col_turmas": "turmas",
+            "col_notas": "notas",
+            "col_faltas": "faltas",
+        },
+        "indices": {
+            "alunos": [indice("turma")],
+            "professores": [indice("disciplina")],
+            "turmas": [indice("nome_turma"), indice("professor_responsavel")],
+            "notas": [indice("id_aluno", "disciplina")],
+            "faltas": [indice("id_aluno", "disciplina", "data_falta")],
+        },
+    },
+
+    "projeto10": {
+        "arquivo": "Projeto10_loja_de_briquedo/Loja+de+Brinquedos.py",
+        "banco": "loja_brinquedos",
+        "apelidos": {
+            "col_usuarios": "usuarios",
+            "col_fornecedores": "fornecedores",
+            "col_produtos": "produtos",
+            "col_clientes": "clientes",
+            "col_vendas": "vendas",
+        },
+        "indices": {
+            "usuarios": [indice("usuario")],
+            "fornecedores": [indice("nome")],
+            "produtos": [indice("codigo"), indice("fornecedor_id"),
+                         indice("vendas_pendentes.venda_id", sparse=True)],
+            "vendas": [indice("cliente_id"), indice("itens.produto_id"), indice("vendedor_id")],
+        },
+    },
+
+    "projeto11": {
+        "arquivo": "Projeto11_sistema_gerenciador_de_pousadas/Sistema+Gerenciamento+de+Pousadas.py",
+        "banco": "gerenciamento_pousada",
+        "apelidos": {
+            "usuarios_collection": "usuarios",
+            "quartos_collection": "quartos",
+            "reservas_collection": "reservas",
+            "hospedes_collection": "hospedes",
+            "produtos_collection": "produtos",
+        },
+        "indices": {
+            "usuarios": [indice("login")],
+            "quartos": [indice("numero_quarto")],
+            "reservas": [indice("numero_quarto", "status"), indice("hospedes"),
+                         indice("produtos.nome")],
+            "produtos": [indice("nome")],
+        },
+    },
+
+    "projeto12": {
+        "arquivo": "Projeto12_controle_vagas_de_estacionamento/Controle+de+Vagas+de+Estacionamento.py",
+        "banco": "Vagas_Estacionamento_db",
+        "apelidos": {
+            "colecao_usuarios": "usuarios",
+            "colecao_clientes": "clientes",
+            "colecao_veiculos": "veiculos",
+            "colecao_blocos": "blocos",
+            "colecao_vagas": "vagas",
+            "colecao_reservas": "reservas",
+            "colecao_tarifas": "tarifas",
+        },
+        "indices": {
+            "usuarios": [indice("usuario")],
+            "clientes": [indice("cpf")],
+            "veiculos": [indice("placa"), indice("proprietario"), indice("status")],
+            "blocos": [indice("nome")],
+            "vagas": [indice("bloco", "numero_vaga"), indice("status")],
+            "reservas": [indice("dt_entrada", "bloco", "numero_vaga"),
+                         indice("dt_entrada", "_id"),
+                         indice("bloco", "numero_vaga", "status"),
+                         indice("cliente_cpf", "dt_entrada"),
+                         indice("veiculo_placa", "dt_entrada")],
+            "tarifas": [indice("bloco", unique=True)],
+        },
+    },
+}
+
+
+###############################################################################
+# APLICAÇÃO DOS ÍNDICES
+###############################################################################
+
+# Código de erro do MongoDB para um índice que já existe com as mesmas
+#       chaves e outras opções (ex.: passou a ser único no manifesto).
+CODIGO_CONFLITO_OPCOES = 85
+
+
+# Campos da descrição de um índice (index_information) que não são opções
+#       de criação.
+CAMPOS_NAO_OPCOES = ("key", "v", "ns")
+
+
+# Converte a descrição de um índice existente (index_information) nas
+#       opções para recriá-lo igual: nome, colação, sparse,
+#       partialFilterExpression, unique, expireAfterSeconds etc.
+# A versão da colação é informada pelo servidor e não é aceita na criação.
+def _opcoes_indice_existente(descricao):
+
+    opcoes = {campo: valor for campo, valor in descricao.items() if campo not in CAMPOS_NAO_OPCOES}
+
+    if "collation" in opcoes:
+        opcoes["collation"] = {campo: valor for campo, valor in opcoes["collation"].items()
+                               if campo != "version"}
+
+    return opcoes
+
+
+# Cria um índice do manifesto. Se já existir um índice com as mesmas chaves
+#       e outras opções, ele é trocado pelo do manifesto; se o novo não puder
+#       ser criado (ex.: dados duplicados), o índice antigo é refeito com as
+#       suas opções originais (lidas antes de removê-lo) e o erro é repassado.
+def _criar_indice(colecao, ind):
+
+    try:
+        colecao.create_index(ind["chaves"], **ind["opcoes"])
+
+    except PyMongoError as e:
+
+        if getattr(e, "code", None) != CODIGO_CONFLITO_OPCOES:
+            raise
+
+        # Nome do índice em conflito: o do manifesto ou o gerado pelo
+        #       pymongo a partir das chaves (ex.: "lugar_id_1_data_1").
+        nome = ind["opcoes"].get("name") or "_".join(f"{campo}_{direcao}"
+                                                      for campo, direcao in ind["chaves"])
+
+        descricao = colecao.index_information().get(nome)
+
+        if descricao is None:
+            raise
+
+        colecao.drop_index(nome)
+
+        try:
+            colecao.create_index(ind["chaves"], **ind["opcoes"])
+        except PyMongoError:
+            colecao.create_index(descricao["key"], **_opcoes_indice_existente(descricao))
+            raise
+
+
+# Cria no banco `banco` todos os índices declarados para o sistema `sistema`.
+# É seguro chamar a cada inicialização: índices existentes não são recriados.
+# Falhas (ex.: dados duplicados impedindo um índice único) são apenas
+#       informadas no console para não impedir o sistema de abrir.
+# Se o servidor não responder, os índices restantes não são tentados: cada
+#       um esperaria de novo o tempo limite de seleção do servidor.
+def aplicar_indices(banco, sistema):
+
+    for nome_colecao, indices in MANIFESTO[sistema]["indices"].items():
+        for ind in indices:
+            try:
+                _criar_indice(banco[nome_colecao], ind)
+            except ServerSelectionTimeoutError as e:
+                print(f"Aviso: MongoDB inacessível; índices de '{sistema}' não aplicados: {e}")
+                return
+            except PyMongoError as e:
+                print(f"Aviso: não foi possível criar o índice {ind['chaves']} "
+                      f"em '{nome_colecao}': {e}")
+
+
+###############################################################################
+# RELATÓRIO DE ÍNDICES AUSENTES E SEM USO ($indexStats)
+###############################################################################
+
+# Gera, para um sistema, a lista de índices do manifesto que ainda não existem
+#       no banco e a lista de índices existentes que nunca foram usados.
+# Retorna um dicionário {colecao: {"ausentes": [...], "sem_uso": [...]}}.
+def relatorio_indices(banco, sistema):
+
+    relatorio = {}
+    indices_manifesto = MANIFESTO[sistema]["indices"]
+
+    # Analisa as coleções do manifesto e também as que já existem no banco.
+    colecoes = set(indices_manifesto) | set(banco.list_collection_names())
+
+    for nome_colecao in sorted(colecoes):
+
+        colecao = banco[nome_colecao]
+
+        # Chaves dos índices existentes, no mesmo formato do manifesto.
+        existentes = [list(info["key"]) for info in colecao.index_information().values()]
+
+        ausentes = [ind["chaves"] for ind in indices_manifesto.get(nome_colecao, [])
+                    if [tuple(c) for c in ind["chaves"]] not in
+                    [[tuple(c) for c in chaves] for chaves in existentes]]
+
+        # `$indexStats` informa quantas vezes cada índice foi usado
+        #       desde a última reinicialização do servidor.
+        sem_uso = [estat["name"] for estat in colecao.aggregate([{"$indexStats": {}}])
+                   if estat["name"] != "_id_" and estat["accesses"]["ops"] == 0]
+
+        if ausentes or sem_uso:
+            relatorio[nome_colecao] = {"ausentes": ausentes, "sem_uso": sem_uso}
+
+    return relatorio
+
+
+###############################################################################
+# VERIFICAÇÃO ESTÁTICA DE COBERTURA
+###############################################################################
+
+# Métodos do PyMongo cujo primeiro argumento é um filtro
+METODOS_COM_FILTRO = {
+    "find", "find_one", "update_one", "update_many", "delete_one", "delete_many",
+    "count_documents", "replace_one", "find_one_and_update",
+    "find_one_and_delete", "find_one_and_replace",
+}
+
+
+# Retorna as "formas" de um filtro literal: cada forma é o conjunto de
+#       campos consultados juntos. Um `$or` gera uma forma por ramo.
+def _formas_do_filtro(no):
+
+    campos = set()
+    ramos = []
+
+    for chave, valor in zip(no.keys, no.values):
+
+        # Ignora `**expansao` e chaves que não são texto literal.
+        if not (isinstance(chave, ast.Constant) and isinstance(chave.value, str)):
+            continue
+
+        if chave.value in ("$or", "$and") and isinstance(valor, ast.List):
+            sub = [f for elem in valor.elts if isinstance(elem, ast.Dict)
+                   for f in _formas_do_filtro(elem)]
+            if chave.value == "$and":
+                campos |= set().union(*sub) if sub else set()
+            else:
+                ramos.extend(sub)
+
+        elif not chave.value.startswith("$") and chave.value != "_id":
+            campos.add(chave.value)
+
+    if ramos:
+        return [frozenset(campos | r) for r in ramos]
+
+    return [frozenset(campos)]
+
+
+# Percorre o código de um sistema e retorna uma lista de
+#       (linha, coleção, campos) para cada filtro literal encontrado.
+def _filtros_do_codigo(sistema):
+
+    config = MANIFESTO[sistema]
+    caminho = os.path.join(PASTA_RAIZ, config["arquivo"])
+
+    with open(caminho, encoding="utf-8") as arquivo:
+        arvore = ast.parse(arquivo.read())
+
+    filtros = []
+
+    for no in ast.walk(arvore):
+
+        if not (isinstance(no, ast.Call) and isinstance(no.func, ast.Attribute)
+                and no.func.attr in METODOS_COM_FILTRO
+                and no.args and isinstance(no.args[0], ast.Dict)):
+            continue
+
+        # Nome da variável/atributo usado como coleção (ex.: `colecao_reservas`, `db.reservas`).
+        alvo = no.func.value
+        nome = alvo.attr if isinstance(alvo, ast.Attribute) else getattr(alvo, "id", None)
+        nome_colecao = config["apelidos"].get(nome, nome)
+
+        for campos in _formas_do_filtro(no.args[0]):
+            if campos:
+                filtros.append((no.lineno, nome_colecao, campos))
+
+    return filtros
+
+
+# Verifica se todos os filtros literais do código de um sistema podem usar
+#       algum índice do manifesto, isto é, se existe um índice cujo primeiro
+#       campo faz parte do filtro.
+# Limitação: só o primeiro campo de cada índice é conferido. Um filtro em
+#       {a, c} conta como coberto por (a, b, c), embora o índice só sirva
+#       para o prefixo `a`; a ordem dos demais campos (igualdade antes de
+#       intervalo e ordenação) precisa ser revista com explain().
+# Retorna a lista de filtros não cobertos (vazia quando está tudo certo).
+def verificar_cobertura(sistema):
+
+    indices = MANIFESTO[sistema]["indices"]
+    nao_cobertos = []
+
+    for linha, nome_colecao, campos in _filtros_do_codigo(sistema):
+
+        primeiros = {ind["chaves"][0][0] for ind in indices.get(nome_colecao, [])}
+
+        if not primeiros & campos:
+            nao_cobertos.append((linha, nome_colecao, sorted(campos)))
+
+    return nao_cobertos
+
+
+###############################################################################
+# LINHA DE COMANDO
+###############################################################################
+
+def main(argumentos=None):
+
+    parser = argparse.ArgumentParser(description="Gerencia os índices MongoDB dos sistemas.")
+    parser.add_argument("comando", choices=["aplicar", "relatorio", "verificar"])
+    parser.add_argument("sistemas", nargs="*", help="ex.: projeto04 projeto12 (padrão: todos)")
+    parser.add_argument("--uri", default=URI_PADRAO, help="URI de conexão com o MongoDB")
+    args = parser.parse_args(argumentos)
+
+    sistemas = args.sistemas or sorted(MANIFESTO)
+
+    for sistema in sistemas:
+        if sistema not in MANIFESTO:
+            parser.error(f"sistema desconhecido: {sistema}")
+
+    # A verificação de cobertura não precisa de conexão com o banco.
+    if args.comando == "verificar":
+
+        falhas = 0
+
+        for sistema in sistemas:
+            for linha, nome_colecao, campos in verificar_cobertura(sistema):
+                print(f"{sistema}: linha {linha}: filtro {campos} em "
+                      f"'{nome_colecao}' sem índice no manifesto")
+                falhas += 1
+
+        print("Manifesto cobre todos os filtros." if not falhas
+              else f"{falhas} filtro(s) sem índice.")
+
+        return 1 if falhas else 0
+
+    cliente = MongoClient(args.uri)
+
+    for sistema in sistemas:
+
+        banco = cliente[MANIFESTO[sistema]["banco"]]
+
+        if args.comando == "aplicar":
+            aplicar_indices(banco, sistema)
+            print(f"{sistema}: índices aplicados em '{banco.name}'.")
+            continue
+
+        relatorio = relatorio_indices(banco, sistema)
+
+        if not relatorio:
+            print(f"{sistema}: nenhum índice ausente ou sem uso.")
+
+        for nome_colecao, dados in relatorio.items():
+            for chaves in dados["ausentes"]:
+                print(f"{sistema}.{nome_colecao}: AUSENTE {chaves}")
+            for nome in dados["sem_uso"]:
+                print(f"{sistema}.{nome_colecao}: SEM USO {nome}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())